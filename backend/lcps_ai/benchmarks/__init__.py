@@ -0,0 +1 @@
+"""Benchmark suite for the assistant's hot paths (run: python -m benchmarks)"""
@@ -0,0 +1,87 @@
+"""
+Run the benchmark suite
+
+Usage (from backend/lcps_ai):
+    python -m benchmarks                                  # deterministic stub models
+    python -m benchmarks --models real                    # the configured models
+    python -m benchmarks --filter database --filter parser
+    python -m benchmarks --output results.json
+    python -m benchmarks --compare baseline.json          # exit 1 on regressions
+
+Everything runs against a scratch database and caches in a temporary
+directory, so the real assistant data is never touched.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.fixtures import use_scratch_storage
+
+
+def main():
+    """Entry point"""
+    parser = argparse.ArgumentParser(description='Benchmark the LCPS AI assistant')
+    parser.add_argument('--models', choices=['stub', 'real'], default='stub',
+                        help='Deterministic stub models (default) or the configured real models')
+    parser.add_argument('--filter', action='append', default=[],
+                        help='Only run benchmarks whose ID contains this text (repeatable)')
+    parser.add_argument('--repeat', type=int, default=7, help='Timed rounds per benchmark')
+    parser.add_argument('--output', type=Path, help='Write the results to this JSON file')
+    parser.add_argument('--compare', type=Path, help='Baseline JSON file to compare medians against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative slowdown reported as a regression (default 0.2 = 20%%)')
+    args = parser.parse_args()
+    
+    # Service mode: no browser tabs, speech or voice prompts while timing
+    os.environ['LCPS_AI_HEADLESS'] = '1'
+    if args.models == 'stub':
+        from benchmarks.stubs import install_stub_models
+        install_stub_models()
+    
+    # Numeric suffix only, so the path cannot contain an intent keyword
+    scratch = Path(tempfile.gettempdir()) / f"lcps-bench-{os.getpid()}"
+    scratch.mkdir(parents=True, exist_ok=True)
+    try:
+        use_scratch_storage(scratch)
+        
+        from main import LCPSAssistant
+        from benchmarks import runner
+        from benchmarks.suite import build_suite
+        
+        assistant = LCPSAssistant(use_voice=False, load_models=True)
+        benchmarks = build_suite(assistant, scratch / "fixtures")
+        if args.filter:
+            benchmarks = [b for b in benchmarks if any(text in b.id for text in args.filter)]
+        
+        print(f"Running {len(benchmarks)} benchmarks ({args.models} models, {args.repeat} rounds)\n")
+        results = runner.run_benchmarks(
+            benchmarks, args.repeat,
+            on_result=lambda benchmark_id, stats: print(runner.format_result(benchmark_id, stats), flush=True)
+        )
+        for summarizer in assistant._summarizers.values():
+            summarizer.close()
+        
+        meta = runner.environment(args.models)
+        if args.output:
+            runner.save_results(args.output, meta, results)
+            print(f"\nResults written to {args.output}")
+        
+        failed = any('error' in stats for stats in results.values())
+        if args.compare:
+            baseline = runner.load_results(args.compare)
+            if baseline['meta'].get('models') != args.models:
+                print(f"\nWarning: the baseline used {baseline['meta'].get('models')} models")
+            print(f"\nCompared with {args.compare} (commit {baseline['meta'].get('commit')}):")
+            rows = runner.compare(results, baseline['results'], args.threshold)
+            runner.print_comparison(rows, args.threshold)
+            failed = failed or any(row['regressed'] for row in rows)
+        return 1 if failed else 0
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Scratch storage and generated PDF/Word fixtures for the benchmarks
+"""
+from pathlib import Path
+from typing import Dict, List
+
+
+def use_scratch_storage(directory: Path):
+    """
+    Point the database and caches at a scratch directory
+    
+    Must run before the assistant (or the service) is built, so benchmark
+    and load-test traffic never lands in the real assistant data.
+    """
+    import config.settings as settings
+    
+    settings.DATABASE_PATH = directory / "assistant.db"
+    settings.CACHE_DIR = directory / "cache"
+    settings.DOCUMENT_CACHE_DIR = directory / "document_cache"
+    settings.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    settings.DOCUMENT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+
+# Sentence pool for fixture text; fixed so every run parses the same bytes
+_SENTENCES = [
+    "The library extends its opening hours during the examination period.",
+    "Students must submit the assignment through the course portal before the deadline.",
+    "Lecture notes for the data structures module cover trees, heaps and graphs.",
+    "The physics laboratory session on Thursday focuses on measuring wave interference.",
+    "Fee payment for the spring semester closes at the end of the month.",
+    "Group projects are assessed on the report, the presentation and peer review.",
+    "The timetable lists each class with its room, lecturer and weekly slot.",
+    "Revision workshops are held every Friday afternoon in the main hall.",
+]
+
+
+def fixture_lines(page: int, count: int) -> List[str]:
+    """Deterministic lines of text for one page"""
+    return [
+        f"{_SENTENCES[(page + line) % len(_SENTENCES)]} (page {page + 1}, line {line + 1})"
+        for line in range(count)
+    ]
+
+
+def write_pdf(path: Path, pages: List[List[str]]):
+    """Write a minimal text PDF (one Helvetica text block per page)"""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{4 + 2 * index} 0 R" for index in range(len(pages))), len(pages)
+        ),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for index, lines in enumerate(pages):
+        escaped = (line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines)
+        stream = "BT /F1 10 Tf 40 800 Td 12 TL " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * index} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    
+    output = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    path.write_bytes(output.encode('latin-1'))
+
+
+def write_docx(path: Path, paragraphs: List[str], table_rows: int = 0):
+    """Write a Word document with the given paragraphs and an optional table"""
+    from docx import Document
+    
+    document = Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    if table_rows:
+        table = document.add_table(rows=table_rows, cols=3)
+        for index, row in enumerate(table.rows):
+            row.cells[0].text = f"Week {index + 1}"
+            row.cells[1].text = _SENTENCES[index % len(_SENTENCES)]
+            row.cells[2].text = "Room B12"
+    document.save(str(path))
+
+
+def make_fixtures(directory: Path) -> Dict[str, Path]:
+    """
+    Create the benchmark documents
+    
+    Returns:
+        Fixture name -> path
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    fixtures = {
+        'pdf_small': directory / "small.pdf",
+        'pdf_large': directory / "large.pdf",
+        'docx': directory / "notes.docx",
+    }
+    write_pdf(fixtures['pdf_small'], [fixture_lines(page, 40) for page in range(3)])
+    write_pdf(fixtures['pdf_large'], [fixture_lines(page, 50) for page in range(60)])
+    write_docx(fixtures['docx'], [line for page in range(5) for line in fixture_lines(page, 30)], table_rows=20)
+    return fixtures
@@ -0,0 +1,182 @@
+"""
+Timing, statistics and baseline comparison for the benchmarks
+"""
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.suite import Benchmark
+
+
+RESULTS_VERSION = 1
+
+
+def time_benchmark(benchmark: Benchmark, repeat: int = 7, min_time: float = 0.05) -> Dict:
+    """
+    Time a benchmark
+    
+    Without setup, calls are looped timeit-style, enough per round to fill
+    min_time, so fast operations are not lost in timer resolution. With a
+    setup, every call is timed on its own (the setup runs between them).
+    
+    Returns:
+        Per-call statistics in seconds
+    """
+    if benchmark.setup is None:
+        func = benchmark.func
+        func()  # Warm-up: first-call imports, caches, lazy loads
+        number = 1
+        while True:
+            elapsed = _time_loop(func, number)
+            if elapsed >= min_time or number >= 1_000_000:
+                break
+            number *= 10 if elapsed < min_time / 10 else 2
+        samples = [_time_loop(func, number) / number for _ in range(repeat)]
+    else:
+        benchmark.func(benchmark.setup())
+        number = 1
+        samples = []
+        for _ in range(repeat):
+            state = benchmark.setup()
+            start = time.perf_counter()
+            benchmark.func(state)
+            samples.append(time.perf_counter() - start)
+    
+    samples.sort()
+    return {
+        'rounds': repeat,
+        'number': number,
+        'min': samples[0],
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'p95': samples[min(len(samples) - 1, round(0.95 * (len(samples) - 1)))],
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def _time_loop(func, number: int) -> float:
+    # Collections are paused as timeit does, so one round cannot pay for another's garbage
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - start
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def run_benchmarks(benchmarks: List[Benchmark], repeat: int = 7, on_result=None) -> Dict[str, Dict]:
+    """Time every benchmark, calling on_result(id, stats) as each one finishes"""
+    results = {}
+    for benchmark in benchmarks:
+        try:
+            stats = time_benchmark(benchmark, repeat)
+        except Exception as e:
+            stats = {'error': f"{type(e).__name__}: {e}"}
+        results[benchmark.id] = stats
+        if on_result:
+            on_result(benchmark.id, stats)
+    return results
+
+
+def environment(models: str) -> Dict:
+    """Describe where the results were taken, for comparing runs"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, timeout=5, cwd=Path(__file__).parent
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'version': RESULTS_VERSION,
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'models': models,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+
+def save_results(path: Path, meta: Dict, results: Dict[str, Dict]):
+    """Write results as JSON"""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'meta': meta, 'results': results}, file, indent=2, sort_keys=True)
+
+
+def load_results(path: Path) -> Dict:
+    """Read results written by save_results()"""
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def compare(current: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[Dict]:
+    """
+    Compare median timings against a baseline
+    
+    Args:
+        current: Results of this run
+        baseline: Results of the baseline run
+        threshold: Relative slowdown that counts as a regression (0.2 = 20%)
+    
+    Returns:
+        One row per benchmark present in both runs, with its ratio and
+        whether it regressed
+    """
+    rows = []
+    for benchmark_id, stats in current.items():
+        before = baseline.get(benchmark_id)
+        if not before or 'median' not in before or 'median' not in stats:
+            continue
+        ratio = stats['median'] / before['median'] if before['median'] else float('inf')
+        rows.append({
+            'id': benchmark_id,
+            'baseline': before['median'],
+            'current': stats['median'],
+            'ratio': ratio,
+            'regressed': ratio > 1 + threshold,
+        })
+    return rows
+
+
+def format_duration(seconds: float) -> str:
+    """Human-readable duration with a unit suited to its size"""
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def format_result(benchmark_id: str, stats: Dict) -> str:
+    """One report line for a benchmark"""
+    if 'error' in stats:
+        return f"{benchmark_id:<45} ERROR {stats['error']}"
+    return (
+        f"{benchmark_id:<45} median {format_duration(stats['median']):>10}"
+        f"  p95 {format_duration(stats['p95']):>10}  min {format_duration(stats['min']):>10}"
+    )
+
+
+def print_comparison(rows: List[Dict], threshold: float, stream=sys.stdout):
+    """Print the comparison table, regressions marked"""
+    for row in rows:
+        marker = "REGRESSED" if row['regressed'] else ""
+        print(
+            f"{row['id']:<45} {format_duration(row['baseline']):>10} -> {format_duration(row['current']):>10}"
+            f"  x{row['ratio']:.2f} {marker}",
+            file=stream
+        )
+    regressions = sum(row['regressed'] for row in rows)
+    print(f"\n{regressions} of {len(rows)} benchmarks slower than the baseline by more than {threshold:.0%}",
+          file=stream)
@@ -0,0 +1,202 @@
+"""
+Deterministic stand-ins for torch, transformers and sentence_transformers
+
+They let the benchmarks exercise every code path around the models (intent
+routing, chunking, TextRank, caching, storage) in milliseconds, on machines
+without the ML stack, and with the same results on every run. Timings taken
+with them measure the assistant's own overhead, not model inference.
+"""
+import hashlib
+import sys
+import types
+from contextlib import contextmanager
+from typing import List, Union
+
+import numpy as np
+
+
+EMBEDDING_DIM = 384
+STUB_REPLY = "That sounds interesting, tell me more about it."
+
+
+def _token_vector(token: str) -> np.ndarray:
+    # Seeded by the token's digest (not hash(), which is salted per process)
+    seed = int.from_bytes(hashlib.md5(token.encode()).digest()[:4], 'little')
+    return np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)
+
+
+class StubSentenceTransformer:
+    """Bag-of-words encoder: each word maps to a fixed random vector"""
+    
+    max_seq_length = 256  # Like MiniLM, words past this are ignored
+    
+    def __init__(self, *args, **kwargs):
+        self._vectors = {}
+    
+    @property
+    def tokenizer(self) -> 'StubTokenizer':
+        return _TOKENIZER
+    
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               convert_to_tensor: bool = False, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split()[:self.max_seq_length]:
+                vector = self._vectors.get(token)
+                if vector is None:
+                    vector = self._vectors[token] = _token_vector(token)
+                embeddings[row] += vector
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.maximum(norms, 1e-12)
+        return embeddings[0] if single else embeddings
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        return EMBEDDING_DIM
+    
+    def save(self, path: str, **kwargs):
+        pass
+
+
+def _cos_sim(a, b) -> np.ndarray:
+    a = np.atleast_2d(np.asarray(a, dtype=np.float32))
+    b = np.atleast_2d(np.asarray(b, dtype=np.float32))
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    return a @ b.T
+
+
+class _Ids(np.ndarray):
+    """Token ID array with the tensor methods the AI engine calls"""
+    
+    def to(self, device):
+        return self
+
+
+class StubTokenizer:
+    """Whitespace tokenizer with a vocabulary grown on demand"""
+    
+    model_max_length = 1024
+    eos_token = "<eos>"
+    pad_token = None
+    eos_token_id = 0
+    pad_token_id = 0
+    
+    def __init__(self):
+        self._ids = {self.eos_token: 0}
+        self._words = [self.eos_token]
+    
+    def _id(self, word: str) -> int:
+        if word not in self._ids:
+            self._ids[word] = len(self._words)
+            self._words.append(word)
+        return self._ids[word]
+    
+    def __call__(self, texts, add_special_tokens: bool = True, **kwargs):
+        if isinstance(texts, str):
+            return {'input_ids': [self._id(word) for word in texts.split()]}
+        return {'input_ids': [[self._id(word) for word in text.split()] for text in texts]}
+    
+    def encode(self, text: str, return_tensors=None, truncation: bool = False, max_length: int = None, **kwargs):
+        ids = [self._id(word) for word in text.replace(self.eos_token, f" {self.eos_token}").split()]
+        if truncation and max_length:
+            ids = ids[-max_length:]
+        return np.array([ids], dtype=np.int64).view(_Ids)
+    
+    def decode(self, ids, skip_special_tokens: bool = True, **kwargs) -> str:
+        words = (self._words[int(i)] for i in ids)
+        if skip_special_tokens:
+            words = (word for word in words if word != self.eos_token)
+        return " ".join(words)
+    
+    def num_special_tokens_to_add(self) -> int:
+        return 2
+    
+    @classmethod
+    def from_pretrained(cls, *args, **kwargs):
+        return _TOKENIZER
+    
+    def save_pretrained(self, path: str, **kwargs):
+        pass
+
+
+# One vocabulary shared by the chat model and its tokenizer
+_TOKENIZER = StubTokenizer()
+
+
+class StubCausalLM:
+    """Chat model that always replies with STUB_REPLY"""
+    
+    @classmethod
+    def from_pretrained(cls, *args, **kwargs):
+        return cls()
+    
+    def to(self, device):
+        return self
+    
+    def eval(self):
+        return self
+    
+    def generate(self, inputs, **kwargs):
+        reply = [_TOKENIZER._id(word) for word in STUB_REPLY.split()] + [_TOKENIZER.eos_token_id]
+        return np.concatenate([np.asarray(inputs), np.array([reply], dtype=np.int64)], axis=1)
+    
+    def save_pretrained(self, path: str, **kwargs):
+        pass
+
+
+class StubSummarizationPipeline:
+    """Summarizer that keeps the first max_length words of each input"""
+    
+    def __init__(self):
+        self.tokenizer = _TOKENIZER
+    
+    def __call__(self, texts, max_length: int = 150, min_length: int = 0, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        return [{'summary_text': " ".join(text.split()[:max_length])} for text in texts]
+
+
+def _pipeline(task: str, *args, **kwargs):
+    if task != "summarization":
+        raise ValueError(f"The stub transformers module has no '{task}' pipeline")
+    return StubSummarizationPipeline()
+
+
+@contextmanager
+def _no_grad():
+    yield
+
+
+def install_stub_models():
+    """
+    Register the stub modules in sys.modules
+    
+    Must run before anything imports torch, transformers or
+    sentence_transformers (main and the summarizer import them lazily, so
+    calling this before building the assistant is enough).
+    """
+    torch = types.ModuleType('torch')
+    torch.cuda = types.SimpleNamespace(is_available=lambda: False)
+    torch.no_grad = _no_grad
+    torch.set_num_threads = lambda threads: None
+    torch.get_num_threads = lambda: 1
+    
+    transformers = types.ModuleType('transformers')
+    transformers.pipeline = _pipeline
+    transformers.AutoTokenizer = StubTokenizer
+    transformers.AutoModelForCausalLM = StubCausalLM
+    transformers.AutoModelForSeq2SeqLM = StubCausalLM
+    
+    sentence_transformers = types.ModuleType('sentence_transformers')
+    sentence_transformers.SentenceTransformer = StubSentenceTransformer
+    sentence_transformers.util = types.SimpleNamespace(cos_sim=_cos_sim)
+    
+    sys.modules.update({
+        'torch': torch,
+        'transformers': transformers,
+        'sentence_transformers': sentence_transformers,
+    })
@@ -0,0 +1,237 @@
+"""
+Benchmark definitions for the assistant's hot paths
+"""
+import itertools
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+from benchmarks.fixtures import make_fixtures
+
+
+@dataclass
+class Benchmark:
+    """
+    One timed operation
+    
+    When setup is given it runs (untimed) before every call and its return
+    value is passed to func, so the operation always starts from the same
+    state (e.g. a fresh row to delete, an empty response cache).
+    """
+    group: str
+    name: str
+    func: Callable
+    setup: Optional[Callable[[], Any]] = None
+    
+    @property
+    def id(self) -> str:
+        return f"{self.group}.{self.name}"
+
+
+# One request per intent; each must be routed to the intent it is filed under
+INTENT_SAMPLES = {
+    'schedule': "What is my schedule on Monday?",
+    'deadline': "Show my exam deadlines",
+    'task': "Show my pending tasks",
+    'weather': "What's the weather in Paris?",
+    'calculate': "calculate (12 + 8) * 3 / 4",
+    'youtube': "search youtube for linear algebra lectures",
+    'joke': "tell me a joke",
+    'conversation': "hello, how are you?",
+}
+
+# No intent keyword occurs in this one, so detection falls through to the encoder
+SEMANTIC_SAMPLE = "Any plans for the upcoming break?"
+
+CALCULATOR_SAMPLES = {
+    'simple': "2 + 2",
+    'words': "what is 12 multiplied by 7 plus 3",
+    'nested': "((15 + 5) * (3 - 1)) / 4 ** 2",
+    'functions': "what is 15% of 200 plus sqrt(2) * sin(pi / 4)",
+}
+
+STATISTICS_SAMPLES = {
+    'mean': "average of 78, 91, 85, 88, 69, 94, 73",
+    'long_list': "median and 90th percentile of " + ", ".join(str(i * 37 % 1000) for i in range(10000)),
+    'grade_needed': "homework 92 (20%), midterm 78 (30%): what do I need on the final to get a B?",
+}
+
+# About 10k tokens: dozens of encoder windows
+DOCUMENT_SAMPLE = " ".join(
+    f"Section {index}. The assignment is due before the exam. Check the weather forecast for rain. "
+    f"Remind me to add a task to my schedule. Summarize the key points of the lecture."
+    for index in range(200)
+)
+
+# Every entity kind, repeated to a few kilobytes, for the extraction scan itself
+ENTITY_SAMPLE = "exams and tuition fees due friday or tomorrow, 15% of 200 in New York; " * 50
+
+# Canned lookup so the weather benchmarks never touch the network
+WEATHER_REPLY = {
+    'city': 'Paris', 'country': 'FR', 'temperature': 18.5, 'feels_like': 17.9,
+    'humidity': 62, 'pressure': 1015, 'description': 'scattered clouds',
+    'wind_speed': 3.6, 'icon': '03d'
+}
+
+
+def seed_database(db, rows: int = 200):
+    """Fill the benchmark database to a realistic size"""
+    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+    types = ['exam', 'fee', 'library', 'assignment']
+    for index in range(rows):
+        db.add_task(f"Task {index}", "Seeded task", ['low', 'medium', 'high'][index % 3], "2030-01-15")
+        db.add_deadline(types[index % len(types)], f"Deadline {index}", "2030-02-01", "Seeded deadline")
+        db.add_conversation(f"Seeded question {index}", f"Seeded answer {index}")
+    for index in range(rows // 4):
+        db.add_timetable_entry(days[index % len(days)], f"{9 + index % 8}:00", f"Subject {index}", "Room A1")
+
+
+def build_suite(assistant, fixtures_dir: Path) -> List[Benchmark]:
+    """
+    Create every benchmark
+    
+    Args:
+        assistant: A warmed-up LCPSAssistant whose storage points at a scratch directory
+        fixtures_dir: Where the document fixtures are generated
+    
+    Returns:
+        Benchmarks in run order
+    """
+    from modules.calculator import Calculator
+    from storage import CacheManager
+    from storage.document_cache import DocumentCache
+    from utils.document_parser import DocumentParser
+    
+    analyzer = assistant.intent_analyzer
+    db = assistant.db
+    cache = CacheManager()
+    fixtures = make_fixtures(fixtures_dir)
+    counter = itertools.count()
+    
+    seed_database(db)
+    assistant.weather.get_weather = lambda city: dict(WEATHER_REPLY, city=city)
+    
+    samples = dict(INTENT_SAMPLES, summarize=f"Summarize document: {fixtures['pdf_small']}")
+    for intent, text in samples.items():
+        detected = analyzer.match_keywords(text)
+        if detected != intent:
+            raise RuntimeError(f"Benchmark sample for '{intent}' is routed to '{detected}': {text!r}")
+    if analyzer.match_keywords(SEMANTIC_SAMPLE) is not None:
+        raise RuntimeError(f"Semantic benchmark sample matches a keyword: {SEMANTIC_SAMPLE!r}")
+    
+    def unique(prefix: str) -> str:
+        return f"{prefix}-{next(counter)}"
+    
+    benchmarks = [
+        # The memo is emptied first so these measure classification itself
+        Benchmark('intent', 'detect_keyword', lambda _: analyzer.detect_intent(INTENT_SAMPLES['calculate']),
+                  setup=analyzer.memo.clear),
+        Benchmark('intent', 'detect_keyword_miss', lambda: analyzer.match_keywords(SEMANTIC_SAMPLE)),
+        Benchmark('intent', 'detect_semantic', lambda _: analyzer.detect_intent(SEMANTIC_SAMPLE),
+                  setup=analyzer.memo.clear),
+        Benchmark('intent', 'detect_memo_hit', lambda: analyzer.detect_intent(SEMANTIC_SAMPLE)),
+        Benchmark('intent', 'predict_top3', lambda _: analyzer.predict_intents(SEMANTIC_SAMPLE, k=3),
+                  setup=analyzer.memo.clear),
+        Benchmark('intent', 'document', lambda: analyzer.analyze_document_intent(DOCUMENT_SAMPLE)),
+    ]
+    for intent, text in samples.items():
+        benchmarks.append(Benchmark(
+            'entities', intent,
+            lambda text=text, intent=intent: analyzer.extract_entities(text, intent)
+        ))
+    benchmarks.append(Benchmark('entities', 'all_long', lambda: analyzer.entity_extractor.extract(ENTITY_SAMPLE)))
+    calculator = Calculator()
+    for name, expression in CALCULATOR_SAMPLES.items():
+        benchmarks.append(Benchmark('calculator', name, lambda expression=expression: calculator.calculate(expression)))
+    for name, query in STATISTICS_SAMPLES.items():
+        benchmarks.append(Benchmark('statistics', name, lambda query=query: assistant.statistics.answer(query)))
+    
+    cache.set("benchmark hit", "cached response")
+    benchmarks += [
+        Benchmark('cache', 'get_hit', lambda: cache.get("benchmark hit")),
+        Benchmark('cache', 'get_miss', lambda: cache.get("benchmark miss")),
+        Benchmark('cache', 'set', lambda: cache.set(unique("benchmark set"), "cached response")),
+    ]
+    
+    benchmarks += _database_benchmarks(db, unique)
+    
+    parser_cases = {
+        'pdf_small_auto': lambda: DocumentParser.parse_document(str(fixtures['pdf_small'])),
+        'pdf_large_auto': lambda: DocumentParser.parse_document(str(fixtures['pdf_large'])),
+        'pdf_large_pypdf2': lambda: DocumentParser.parse_pdf(str(fixtures['pdf_large']), method='pypdf2'),
+        'pdf_small_pdfplumber': lambda: DocumentParser.parse_pdf(str(fixtures['pdf_small']), method='pdfplumber'),
+        'pdf_small_bytes': lambda data=fixtures['pdf_small'].read_bytes(): DocumentParser.parse_bytes(data, "small.pdf"),
+        'docx': lambda: DocumentParser.parse_document(str(fixtures['docx'])),
+    }
+    benchmarks += [Benchmark('parser', name, func) for name, func in parser_cases.items()]
+    
+    # End to end: the response and document caches are emptied before each
+    # call so every intent runs its handler; 'cached' measures the cache hit
+    document_cache = DocumentCache()
+    
+    def cold_caches():
+        assistant.cache.clear()
+        document_cache.clear()
+    
+    for intent, text in samples.items():
+        benchmarks.append(Benchmark(
+            'process_input', intent,
+            lambda _, text=text: assistant.process_input(text),
+            setup=cold_caches
+        ))
+    assistant.process_input(INTENT_SAMPLES['weather'])
+    benchmarks.append(Benchmark(
+        'process_input', 'cached',
+        lambda: assistant.process_input(INTENT_SAMPLES['weather'])
+    ))
+    return benchmarks
+
+
+def _database_benchmarks(db, unique: Callable[[str], str]) -> List[Benchmark]:
+    """One benchmark per Database CRUD method"""
+    def new_task():
+        return db.add_task(unique("Task"), "Benchmark task", "high", "2030-01-15")
+    
+    def new_deadline():
+        return db.add_deadline('exam', unique("Deadline"), "2030-02-01")
+    
+    def new_entry():
+        return db.add_timetable_entry('Monday', "10:00", unique("Subject"), "Room B2")
+    
+    def new_job(upload: Optional[bytes] = None):
+        job_id = uuid.uuid4().hex
+        db.add_summary_job(job_id, "notes.pdf", 'fast', 150, 50, upload=upload)
+        return job_id
+    
+    job_id = new_job(upload=b"%PDF-1.4 benchmark upload")
+    db.cache_response("benchmark-hash", "cached response")
+    upload = b"x" * (256 * 1024)
+    
+    return [
+        Benchmark('database', 'add_task', lambda: new_task()),
+        Benchmark('database', 'get_tasks', lambda: db.get_tasks()),
+        Benchmark('database', 'complete_task', db.complete_task, setup=new_task),
+        Benchmark('database', 'delete_task', db.delete_task, setup=new_task),
+        Benchmark('database', 'add_deadline', lambda: new_deadline()),
+        Benchmark('database', 'get_deadlines', lambda: db.get_deadlines()),
+        Benchmark('database', 'complete_deadline', db.complete_deadline, setup=new_deadline),
+        Benchmark('database', 'delete_deadline', db.delete_deadline, setup=new_deadline),
+        Benchmark('database', 'add_timetable_entry', lambda: new_entry()),
+        Benchmark('database', 'get_timetable', lambda: db.get_timetable('Monday')),
+        Benchmark('database', 'delete_timetable_entry', db.delete_timetable_entry, setup=new_entry),
+        Benchmark('database', 'add_conversation', lambda: db.add_conversation("Benchmark question", "Benchmark answer")),
+        Benchmark('database', 'get_recent_conversations', lambda: db.get_recent_conversations(10)),
+        Benchmark('database', 'add_summary_job', lambda: new_job()),
+        Benchmark('database', 'add_summary_job_upload', lambda: new_job(upload)),
+        Benchmark('database', 'update_summary_job',
+                  lambda: db.update_summary_job(job_id, status='running', stage='map', chunks_done=3, chunks_total=9)),
+        Benchmark('database', 'get_summary_job', lambda: db.get_summary_job(job_id)),
+        Benchmark('database', 'get_summary_job_upload', lambda: db.get_summary_job_upload(job_id)),
+        Benchmark('database', 'delete_summary_job_upload', db.delete_summary_job_upload,
+                  setup=lambda: new_job(upload)),
+        Benchmark('database', 'get_unfinished_summary_jobs', lambda: db.get_unfinished_summary_jobs()),
+        Benchmark('database', 'cache_response', lambda: db.cache_response(unique("hash"), "cached response")),
+        Benchmark('database', 'get_cached_response', lambda: db.get_cached_response("benchmark-hash")),
+    ]
+
@@ -0,0 +1,64 @@
+"""
+Bundle the AI models for offline use
+
+Downloads the configured models once and saves them under
+models/cache/bundle as safetensors with their tokenizer files and a
+manifest of hashes. Later starts load them from disk without contacting
+the model hub (set LCPS_AI_OFFLINE_MODELS=1 to forbid the hub entirely).
+
+Usage:
+    python bundle_models.py                 # bundle every configured model
+    python bundle_models.py --tier fast     # only the chat/intent models and the 'fast' summarizer
+    python bundle_models.py --verify        # check the bundle against its hashes
+"""
+import sys
+import argparse
+import config.settings as settings
+from utils import model_bundle
+
+
+def main():
+    """Entry point"""
+    parser = argparse.ArgumentParser(description='Bundle LCPS AI models for offline use')
+    parser.add_argument('models', nargs='*', help='Model IDs to bundle (default: all configured models)')
+    parser.add_argument('--tier', action='append', choices=list(settings.SUMMARIZATION_TIERS),
+                        help='Only bundle these summarization tiers (repeatable)')
+    parser.add_argument('--verify', action='store_true', help='Verify the existing bundle instead of building it')
+    args = parser.parse_args()
+    
+    if args.verify:
+        results = model_bundle.verify_bundle()
+        if not results:
+            print("No models are bundled.")
+            return 1
+        for model_name, problems in results.items():
+            status = "OK" if not problems else "; ".join(problems)
+            print(f"{model_name}: {status}")
+        return 0 if not any(results.values()) else 1
+    
+    models = model_bundle.configured_models()
+    if args.tier:
+        keep = {settings.SUMMARIZATION_TIERS[tier] for tier in args.tier}
+        models = {
+            name: kind for name, kind in models.items()
+            if kind != model_bundle.KIND_SEQ2SEQ or name in keep
+        }
+    if args.models:
+        models = {name: models.get(name) for name in args.models}
+    
+    failed = []
+    for model_name, kind in models.items():
+        try:
+            entry = model_bundle.bundle_model(model_name, kind)
+            size = sum(info['size'] for info in entry['files'].values())
+            print(f"✓ {model_name}: {len(entry['files'])} files, {size / (1024 * 1024):.0f} MB")
+        except Exception as e:
+            print(f"✗ {model_name}: {e}")
+            failed.append(model_name)
+    
+    print(f"\nBundle: {settings.MODEL_BUNDLE_DIR}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
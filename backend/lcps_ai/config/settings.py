@@ -16,11 +16,35 @@ DATABASE_PATH = STORAGE_DIR / "assistant.db"
 # Models Configuration
 CONVERSATIONAL_MODEL = "microsoft/DialoGPT-medium"  # For general conversation
 SUMMARIZATION_MODEL = "facebook/bart-large-cnn"  # For document summarization
+
+# Summarization quality/latency tiers (distilled models trade quality for speed)
+SUMMARIZATION_TIERS = {
+    'fast': "sshleifer/distilbart-cnn-6-6",
+    'balanced': "sshleifer/distilbart-cnn-12-6",
+    'best': SUMMARIZATION_MODEL,
+}
+SUMMARIZATION_INTERACTIVE_TIER = 'fast'  # Requests answered while the user waits
+SUMMARIZATION_BACKGROUND_TIER = 'best'  # Queued/background summarization jobs
 SENTENCE_TRANSFORMER_MODEL = "all-MiniLM-L6-v2"  # For intent analysis
 
+# Intent classifier (trained with: python train_intent_classifier.py)
+INTENT_CLASSIFIER_PATH = MODELS_DIR / "intent_classifier.npz"  # Weight matrix; absent = keyword similarity routing
+INTENT_EMBEDDING_CACHE = MODELS_DIR / "intent_embeddings.npz"  # Corpus embeddings reused across training runs
+INTENT_CLASSIFIER_MIN_CONFIDENCE = 0.5  # Less confident predictions are answered as conversation
+INTENT_MEMO_SIZE = int(os.environ.get('LCPS_AI_INTENT_MEMO_SIZE', '4096'))  # Normalized queries whose intent, entities and embedding are kept (0 = off)
+INTENT_MEMO_MAX_CHARS = 500  # Longer inputs (number lists, pasted text) are not memoized
+INTENT_MEMO_WARM_QUERIES = 200  # Most frequent logged queries classified at start-up
+DOCUMENT_INTENT_BATCH_SIZE = 32  # Document windows per encoder call in analyze_document_intent
+
+# Offline model bundle (built with: python bundle_models.py)
+MODEL_BUNDLE_DIR = MODELS_DIR / "bundle"  # Safetensors + tokenizer files + manifest.json
+MODELS_OFFLINE = os.environ.get('LCPS_AI_OFFLINE_MODELS', '0') in ['1', 'true', 'True']  # Never contact the model hub
+
 # Cache Configuration
 CACHE_SIZE_LIMIT = 500 * 1024 * 1024  # 500 MB
 CACHE_TTL = 86400  # 24 hours in seconds
+DOCUMENT_CACHE_DIR = STORAGE_DIR / "document_cache"  # Parsed text and summaries by content hash
+DOCUMENT_CACHE_SIZE_LIMIT = 1024 * 1024 * 1024  # 1 GB
 
 # Weather API
 WEATHER_API_BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
@@ -36,6 +60,26 @@ TTS_VOLUME = 0.9  # 0.0 to 1.0
 # Logging
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+TRACE_SAMPLE_RATE = float(os.environ.get('LCPS_AI_TRACE_SAMPLE_RATE', '0'))  # Fraction of requests traced per stage (0 = off)
+TRACE_LOG_FILE = os.environ.get('LCPS_AI_TRACE_LOG') or None  # JSON-lines file for traces (default: the main log)
+
+# Intent handlers (see core/handler_registry.py)
+HANDLER_TIMEOUTS = {  # Seconds before the user gets a fallback reply; intents not listed have no limit
+    'weather': 8,
+    'summarize': 90,
+    'conversation': 30,
+}
+HANDLER_WORKERS = {'io': 8, 'model': 2, 'document': 2}  # Threads per cost class for handlers with a timeout
+HANDLER_MODULES = [name for name in os.environ.get('LCPS_AI_HANDLER_MODULES', '').split(',') if name]  # Extra modules defining register_handlers(registry, assistant)
+
+# Grade calculations: minimum percentage for each letter grade
+GRADE_SCALE = {
+    'A+': 97, 'A': 93, 'A-': 90,
+    'B+': 87, 'B': 83, 'B-': 80,
+    'C+': 77, 'C': 73, 'C-': 70,
+    'D+': 67, 'D': 63, 'D-': 60,
+}
+STATISTICS_CSV_DIR = Path(os.environ.get('LCPS_AI_CSV_DIR', str(STORAGE_DIR / "datasets")))  # Only CSV files in here can be named in a query
 
 # Task Reminder
 REMINDER_CHECK_INTERVAL = 60  # Check every 60 seconds
@@ -46,7 +90,26 @@ MAX_GENERATION_LENGTH = 100  # Max tokens for response generation
 TEMPERATURE = 0.7  # Creativity vs coherence (0.0 to 1.0)
 TOP_P = 0.9  # Nucleus sampling
 
+# Document Parsing
+PDF_PARSE_WORKERS = int(os.environ.get('LCPS_AI_PDF_WORKERS', '0'))  # 0 = one per CPU core, 1 = sequential
+PDF_PARALLEL_MIN_PAGES = 32  # Smaller PDFs are extracted sequentially
+PDF_MIN_PAGE_CHARS = 20  # Pages with less text than this are retried with pdfplumber
+UPLOAD_MAX_BYTES = int(os.environ.get('LCPS_AI_UPLOAD_MAX_BYTES', str(25 * 1024 * 1024)))  # Largest document accepted over HTTP
+
+# Summarization
+SUMMARIZATION_MAX_INPUT_TOKENS = 1024  # BART encoder limit (special tokens included)
+SUMMARIZATION_CHUNK_OVERLAP = 64  # Tokens of context carried into the next chunk
+SUMMARIZATION_BATCH_SIZE = 4  # Chunks per pipeline forward pass
+SUMMARIZATION_WORKERS = int(os.environ.get('LCPS_AI_SUMMARIZER_WORKERS', '0'))  # 0 = one per CPU core, 1 = in-process
+SUMMARIZATION_PARALLEL_MIN_CHUNKS = 8  # Use the worker pool only for documents at least this long
+SUMMARIZATION_EXTRACTIVE_PREFILTER = True  # Shrink huge documents to their most central sentences first
+SUMMARIZATION_PREFILTER_MAX_CHUNKS = 16  # Chunks of text kept for the abstractive stage when pre-filtering
+SUMMARY_JOB_WORKERS = int(os.environ.get('LCPS_AI_SUMMARY_JOB_WORKERS', '2'))  # Background jobs run at once
+TEXTRANK_MAX_SENTENCES = 2000  # Sentences per TextRank similarity matrix (bounds memory)
+
 # Ensure directories exist
 STORAGE_DIR.mkdir(parents=True, exist_ok=True)
 CACHE_DIR.mkdir(parents=True, exist_ok=True)
+DOCUMENT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+STATISTICS_CSV_DIR.mkdir(parents=True, exist_ok=True)
 MODELS_DIR.mkdir(parents=True, exist_ok=True)
@@ -2,9 +2,8 @@
 AI Engine using Transformers for conversational AI
 Uses Microsoft's DialoGPT for natural, context-aware conversations
 """
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
 import config.settings as settings
+from utils import model_bundle
 from utils.logger import logger
 from typing import List, Tuple
 
@@ -13,6 +12,8 @@ class AIEngine:
     """Conversational AI engine using DialoGPT"""
     
     def __init__(self):
+        import torch
+        
         self.model_name = settings.CONVERSATIONAL_MODEL
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.model = None
@@ -25,15 +26,18 @@ class AIEngine:
     
     def _load_model(self):
         """Load DialoGPT model and tokenizer"""
+        # Imported here: transformers alone takes seconds to import
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        
         try:
             logger.info(f"Loading model: {self.model_name}")
-            self.tokenizer = AutoTokenizer.from_pretrained(
-                self.model_name,
-                cache_dir=str(settings.MODELS_DIR)
-            )
+            # The offline bundle if present (local safetensors), otherwise the hub cache
+            source, location = model_bundle.locate(self.model_name)
+            self.tokenizer = AutoTokenizer.from_pretrained(source, **location)
             self.model = AutoModelForCausalLM.from_pretrained(
-                self.model_name,
-                cache_dir=str(settings.MODELS_DIR)
+                source,
+                low_cpu_mem_usage=True,  # Load weights straight from the file, skipping random init
+                **location
             )
             self.model.to(self.device)
             self.model.eval()
@@ -81,6 +85,7 @@ class AIEngine:
             ).to(self.device)
             
             # Generate response
+            import torch
             with torch.no_grad():
                 outputs = self.model.generate(
                     inputs,
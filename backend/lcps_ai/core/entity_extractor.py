@@ -0,0 +1,193 @@
+"""
+Entity extraction in one pass over the text
+
+The text is tokenized once with a compiled pattern. Each token is then
+looked up in a phrase index built from the gazetteers (days, relative days,
+deadline types, cities), keyed by first token and tried longest phrase
+first, and numeric tokens become number/percent entities. Every entity
+keeps its character span. The cost is linear in the text length, and
+nothing is compiled after import.
+
+A pasted grade list can hold thousands of numbers, so the entities given
+to handlers keep numbers and percentages as flat lists of values and only
+carry span dictionaries for the (few) gazetteer entities.
+"""
+import re
+from typing import Dict, List, NamedTuple, Tuple
+
+
+class Entity(NamedTuple):
+    """An entity found in the text"""
+    label: str  # 'day', 'relative_day', 'deadline_type', 'city', 'number', 'percent'
+    value: object  # Canonical value ('Monday', 'tomorrow', 'exam', 'New York', 15.0, ...)
+    start: int  # Character span in the original text
+    end: int
+    text: str  # The text as written
+
+
+DAYS = {
+    'Monday': ['monday', 'mondays', 'mon'],
+    'Tuesday': ['tuesday', 'tuesdays', 'tue', 'tues'],
+    'Wednesday': ['wednesday', 'wednesdays', 'wed', 'weds'],
+    'Thursday': ['thursday', 'thursdays', 'thu', 'thur', 'thurs'],
+    'Friday': ['friday', 'fridays', 'fri'],
+    'Saturday': ['saturday', 'saturdays'],
+    'Sunday': ['sunday', 'sundays'],
+}
+
+RELATIVE_DAYS = {
+    'today': ['today', 'tonight', 'this evening'],
+    'tomorrow': ['tomorrow', 'tmrw'],
+    'yesterday': ['yesterday'],
+}
+
+# The deadline types stored in the database, with the words used for them
+DEADLINE_TYPES = {
+    'exam': ['exam', 'exams', 'final exam', 'final exams', 'midterm', 'midterms', 'test', 'tests', 'quiz', 'quizzes'],
+    'fee': ['fee', 'fees', 'tuition', 'payment', 'payments'],
+    'library': ['library', 'library book', 'library books', 'book return'],
+    'assignment': ['assignment', 'assignments', 'homework', 'project', 'projects', 'essay', 'essays'],
+}
+
+CITIES = [
+    'Amsterdam', 'Athens', 'Atlanta', 'Auckland', 'Austin', 'Bangalore', 'Bangkok', 'Barcelona', 'Beijing',
+    'Berlin', 'Bogota', 'Boston', 'Brisbane', 'Brussels', 'Budapest', 'Buenos Aires', 'Cairo', 'Calgary',
+    'Cape Town', 'Chennai', 'Chicago', 'Copenhagen', 'Dallas', 'Delhi', 'Denver', 'Dhaka', 'Dubai', 'Dublin',
+    'Edinburgh', 'Frankfurt', 'Geneva', 'Hanoi', 'Helsinki', 'Hong Kong', 'Houston', 'Hyderabad', 'Istanbul',
+    'Jakarta', 'Johannesburg', 'Karachi', 'Kathmandu', 'Kolkata', 'Kuala Lumpur', 'Lagos', 'Lahore', 'Lima',
+    'Lisbon', 'London', 'Los Angeles', 'Madrid', 'Manchester', 'Manila', 'Melbourne', 'Mexico City', 'Miami',
+    'Milan', 'Montreal', 'Moscow', 'Mumbai', 'Munich', 'Nairobi', 'New Delhi', 'New York', 'New York City',
+    'Osaka', 'Oslo', 'Ottawa', 'Paris', 'Perth', 'Philadelphia', 'Phoenix', 'Prague', 'Pune', 'Rome',
+    'San Diego', 'San Francisco', 'Santiago', 'Sao Paulo', 'Seattle', 'Seoul', 'Shanghai', 'Singapore',
+    'Stockholm', 'Sydney', 'Taipei', 'Tehran', 'Tokyo', 'Toronto', 'Vancouver', 'Vienna', 'Warsaw',
+    'Washington', 'Zurich',
+]
+
+# Words, and numbers with an optional decimal part and percent sign
+_TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)?%?|[^\W\d_]+(?:'[^\W\d_]+)?")
+
+# Intent-specific text entities (precompiled; each is a single scan)
+_CALCULATE_FILLER_PATTERN = re.compile(r'\b(calculate|compute|what is|solve)\b')
+_WEATHER_CITY_PATTERN = re.compile(r'(?:weather (?:in|for) |in )([a-zA-Z ]+?)(?:\?|$| weather)')
+_YOUTUBE_QUERY_PATTERN = re.compile(r'(?:search|find|play|open) (?:youtube for |on youtube )?(.*?)(?:\?|$)')
+
+
+def _phrase_index() -> Dict[str, List[Tuple[Tuple[str, ...], str, object]]]:
+    """First token -> (phrase tokens, label, value), longest phrases first"""
+    entries = []
+    for day, words in DAYS.items():
+        entries += [(word, 'day', day) for word in words]
+    for relative, words in RELATIVE_DAYS.items():
+        entries += [(word, 'relative_day', relative) for word in words]
+    for deadline_type, words in DEADLINE_TYPES.items():
+        entries += [(word, 'deadline_type', deadline_type) for word in words]
+    entries += [(city.lower(), 'city', city) for city in CITIES]
+    
+    index = {}
+    for phrase, label, value in entries:
+        tokens = tuple(phrase.split())
+        index.setdefault(tokens[0], []).append((tokens, label, value))
+    for candidates in index.values():
+        candidates.sort(key=lambda candidate: len(candidate[0]), reverse=True)
+    return index
+
+
+class EntityExtractor:
+    """Gazetteer and number entities with spans, plus the per-intent entities handlers use"""
+    
+    def __init__(self):
+        self._phrases = _phrase_index()
+    
+    def extract(self, text: str) -> List[Entity]:
+        """
+        All entities in the text, in order of appearance
+        
+        Args:
+            text: Input text
+        
+        Returns:
+            Entities with their character spans
+        """
+        matches = list(_TOKEN_PATTERN.finditer(text))
+        tokens = [match.group().lower() for match in matches]
+        entities = []
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token[0].isdigit():
+                match = matches[i]
+                if token.endswith('%'):
+                    entities.append(Entity('percent', float(token[:-1]), match.start(), match.end(), match.group()))
+                else:
+                    entities.append(Entity('number', float(token), match.start(), match.end(), match.group()))
+                i += 1
+                continue
+            
+            for phrase, label, value in self._phrases.get(token, ()):
+                if tuple(tokens[i:i + len(phrase)]) == phrase:
+                    start, end = matches[i].start(), matches[i + len(phrase) - 1].end()
+                    entities.append(Entity(label, value, start, end, text[start:end]))
+                    i += len(phrase)
+                    break
+            else:
+                i += 1
+        return entities
+    
+    def entities_for_intent(self, text: str, intent: str) -> Dict:
+        """
+        The entities a handler needs, plus every entity found
+        
+        Args:
+            text: Input text
+            intent: Detected intent
+        
+        Returns:
+            Dictionary with the intent's entities ('day'/'days',
+            'type'/'types', 'city', 'expression', 'query'), the values of
+            every number and percentage ('numbers', 'percents') and 'spans':
+            the other entities as dictionaries with label, value, start, end
+            and text (use extract() for the spans of numbers)
+        """
+        found = self.extract(text)
+        entities = {}
+        
+        if intent == 'schedule':
+            days = [entity.value for entity in found if entity.label in ('day', 'relative_day')]
+            if days:
+                entities['day'] = days[0]
+                entities['days'] = list(dict.fromkeys(days))
+        
+        elif intent == 'deadline':
+            types = [entity.value for entity in found if entity.label == 'deadline_type']
+            if types:
+                entities['type'] = types[0]
+                entities['types'] = list(dict.fromkeys(types))
+        
+        elif intent == 'calculate':
+            entities['expression'] = _CALCULATE_FILLER_PATTERN.sub('', text.lower()).strip()
+        
+        elif intent == 'weather':
+            city = next((entity.value for entity in found if entity.label == 'city'), None)
+            if city is None:
+                # Not in the gazetteer: "weather in [city]" or "[city] weather"
+                match = _WEATHER_CITY_PATTERN.search(text.lower())
+                if match:
+                    city = match.group(1).strip().title()
+            if city:
+                entities['city'] = city
+        
+        elif intent == 'youtube':
+            match = _YOUTUBE_QUERY_PATTERN.search(text.lower())
+            if match:
+                entities['query'] = match.group(1).strip()
+        
+        numbers = [entity.value for entity in found if entity.label == 'number']
+        percents = [entity.value for entity in found if entity.label == 'percent']
+        spans = [entity._asdict() for entity in found if entity.label not in ('number', 'percent')]
+        if numbers:
+            entities['numbers'] = numbers
+        if percents:
+            entities['percents'] = percents
+        if spans:
+            entities['spans'] = spans
+        return entities
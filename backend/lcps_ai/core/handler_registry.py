@@ -0,0 +1,242 @@
+"""
+Intent handler registry
+
+Each intent is answered by a handler registered with its metadata: a
+timeout, whether its replies may be cached, and a cost class. Cheap
+handlers (database lookups, arithmetic) run inline on the request thread.
+Handlers with a timeout run on a worker pool for their cost class, so a
+slow weather API or model call can't hold up the other classes. Coroutine
+handlers run on a shared event loop. Once a handler misses its deadline,
+the user gets its fallback reply. A timed-out thread can't be stopped and
+finishes in the background, but a timed-out coroutine is cancelled.
+
+Pools and the event loop are started on first use. A forked child doesn't
+inherit their threads, so registries forget them in the child and start
+their own.
+
+Modules can add intents without editing main.py. List the module in
+LCPS_AI_HANDLER_MODULES and define register_handlers(registry, assistant):
+
+    def register_handlers(registry, assistant):
+        assistant.intent_analyzer.intent_patterns['library_hours'] = ['library hours', 'library open']
+        registry.register('library_hours', lambda entities, user_input: "Open 8am-10pm", cacheable=True)
+"""
+import asyncio
+import importlib
+import inspect
+import os
+import threading
+import contextvars
+import weakref
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+import config.settings as settings
+from utils.logger import logger
+from utils import tracing
+
+
+COST_CLASSES = ('cheap', 'io', 'model', 'document')  # inline / network and disk / AI model inference / summaries
+DEFAULT_FALLBACK = "That's taking longer than expected. Please try again in a moment."
+ERROR_REPLY = "I encountered an error processing your request. Could you try rephrasing?"
+
+# Live registries, reset in forked children
+_registries = weakref.WeakSet()
+
+
+@dataclass
+class IntentHandler:
+    """A registered handler and how to run it"""
+    intent: str
+    func: Callable  # func(entities, user_input) -> str, or a coroutine function
+    timeout: Optional[float] = None  # Seconds before the fallback reply; None = no limit
+    cacheable: bool = False  # Replies may be stored in the response cache
+    cache_ttl: int = 3600  # Seconds a cached reply stays valid
+    cost: str = 'cheap'  # One of COST_CLASSES
+    fallback: str = DEFAULT_FALLBACK  # Reply when the timeout is exceeded
+    
+    @property
+    def is_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.func)
+    
+    @property
+    def needs_models(self) -> bool:
+        """Whether the handler can only run once the AI models are loaded"""
+        return self.cost in ('model', 'document')
+
+
+class HandlerRegistry:
+    """Intent -> handler, with per-handler deadlines"""
+    
+    def __init__(self, default_intent: str = 'conversation'):
+        """
+        Args:
+            default_intent: Intent whose handler answers intents nobody registered
+        """
+        self.default_intent = default_intent
+        self._handlers: Dict[str, IntentHandler] = {}
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        _registries.add(self)
+    
+    def register(self, intent: str, func: Callable = None, *, timeout: Optional[float] = None,
+                 cacheable: bool = False, cache_ttl: int = 3600, cost: str = 'cheap',
+                 fallback: str = DEFAULT_FALLBACK, replace: bool = False):
+        """
+        Register the handler for an intent (also usable as a decorator)
+        
+        Args:
+            intent: Intent name
+            func: func(entities, user_input) returning the reply text; may be async
+            timeout: Seconds before the fallback reply is given. An entry in
+                     settings.HANDLER_TIMEOUTS overrides it.
+            cacheable: Whether replies may be stored in the response cache
+            cache_ttl: Seconds a cached reply stays valid
+            cost: 'cheap', 'io', 'model' or 'document'; selects the worker
+                  pool, and 'model' and 'document' handlers wait for the AI
+                  models to load
+            fallback: Reply when the timeout is exceeded
+            replace: Allow replacing an already registered handler
+        
+        Returns:
+            func, so decorated functions stay usable
+        """
+        if func is None:
+            return lambda func: self.register(intent, func, timeout=timeout, cacheable=cacheable,
+                                              cache_ttl=cache_ttl, cost=cost, fallback=fallback, replace=replace)
+        if cost not in COST_CLASSES:
+            raise ValueError(f"Unknown cost class '{cost}' for intent '{intent}' (expected one of {COST_CLASSES})")
+        if intent in self._handlers and not replace:
+            raise ValueError(f"A handler for intent '{intent}' is already registered")
+        
+        timeout = settings.HANDLER_TIMEOUTS.get(intent, timeout)
+        self._handlers[intent] = IntentHandler(intent, func, timeout, cacheable, cache_ttl, cost, fallback)
+        logger.debug(f"Registered handler for '{intent}' ({cost}, timeout {timeout})")
+        return func
+    
+    def get(self, intent: str) -> IntentHandler:
+        """The handler for an intent, or the default intent's handler"""
+        handler = self._handlers.get(intent)
+        if handler is None:
+            handler = self._handlers[self.default_intent]
+        return handler
+    
+    def intents(self) -> List[str]:
+        """Registered intents, in registration order"""
+        return list(self._handlers)
+    
+    def dispatch(self, intent: str, entities: dict, user_input: str) -> Tuple[str, bool]:
+        """
+        Run the handler for an intent within its deadline
+        
+        Args:
+            intent: Detected intent
+            entities: Extracted entities
+            user_input: The user's message
+        
+        Returns:
+            (reply, answered): answered is False when the reply is the
+            timeout fallback or the error message, which must not be cached
+        """
+        handler = self.get(intent)
+        self._count(handler.intent, 'calls')
+        try:
+            if handler.is_async:
+                future = asyncio.run_coroutine_threadsafe(handler.func(entities, user_input), self._event_loop())
+            elif handler.timeout is None:
+                return handler.func(entities, user_input), True
+            else:
+                # Copied so tracing spans opened by the handler land in this request's trace
+                context = contextvars.copy_context()
+                future = self._pool(handler.cost).submit(context.run, handler.func, entities, user_input)
+            try:
+                return future.result(timeout=handler.timeout), True
+            except FutureTimeout:
+                if future.done():
+                    raise  # Raised by the handler itself, not the deadline
+                future.cancel()
+                self._count(handler.intent, 'timeouts')
+                tracing.annotate(handler_timeout=handler.intent)
+                logger.warning(f"Handler for '{handler.intent}' exceeded its {handler.timeout}s timeout")
+                return handler.fallback, False
+        
+        except Exception as e:
+            self._count(handler.intent, 'errors')
+            logger.error(f"Error handling intent '{handler.intent}': {e}")
+            return ERROR_REPLY, False
+    
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Calls, timeouts and errors per intent"""
+        with self._lock:
+            stats = {}
+            for (intent, event), count in self._stats.items():
+                stats.setdefault(intent, {'calls': 0, 'timeouts': 0, 'errors': 0})[event] = count
+            return stats
+    
+    def shutdown(self):
+        """Stop the worker pools and event loop without waiting for running handlers"""
+        with self._lock:
+            for pool in self._pools.values():
+                pool.shutdown(wait=False, cancel_futures=True)
+            self._pools.clear()
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+    
+    def _after_fork(self):
+        """Forget the pools, event loop and lock inherited through fork(); their threads are gone"""
+        self._lock = threading.Lock()
+        self._pools = {}
+        self._loop = None
+    
+    def _count(self, intent: str, event: str):
+        with self._lock:
+            self._stats[intent, event] += 1
+    
+    def _pool(self, cost: str) -> ThreadPoolExecutor:
+        """Worker pool for a cost class, created on first use in this process"""
+        with self._lock:
+            if cost not in self._pools:
+                self._pools[cost] = ThreadPoolExecutor(
+                    max_workers=settings.HANDLER_WORKERS.get(cost, 4),
+                    thread_name_prefix=f"handler-{cost}"
+                )
+            return self._pools[cost]
+    
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop running coroutine handlers, started on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="handler-loop", daemon=True).start()
+            return self._loop
+
+
+def _reset_registries_in_child():
+    for registry in list(_registries):
+        registry._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_registries_in_child)
+
+
+def load_handler_modules(registry: HandlerRegistry, assistant, modules: List[str] = None):
+    """
+    Import handler modules and let each register its intents
+    
+    Args:
+        registry: Registry to add handlers to
+        assistant: The LCPSAssistant, passed to each module's register_handlers
+        modules: Module names (default settings.HANDLER_MODULES)
+    """
+    for name in settings.HANDLER_MODULES if modules is None else modules:
+        try:
+            module = importlib.import_module(name)
+            module.register_handlers(registry, assistant)
+            logger.info(f"Loaded intent handlers from {name}")
+        except Exception as e:
+            logger.error(f"Could not load intent handlers from {name}: {e}")
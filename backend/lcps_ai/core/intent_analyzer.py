@@ -1,19 +1,36 @@
 """
 Intent Analyzer using sentence transformers
 """
-from sentence_transformers import SentenceTransformer, util
+import re
 import config.settings as settings
+from core.entity_extractor import EntityExtractor
+from core.intent_memo import IntentMemo
+from utils import model_bundle
 from utils.logger import logger
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Sentence ends (kept with the sentence) and paragraph breaks
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n{2,}')
+_TOKENIZE_GROUP = 256  # Sentences tokenized per call when cutting documents into windows
 
 
 class IntentAnalyzer:
     """Analyze intent from text and documents"""
     
-    def __init__(self):
+    def __init__(self, load_model: bool = True):
+        """
+        Args:
+            load_model: Load the sentence transformer now; otherwise call
+                        load_model() later (keyword matching works meanwhile)
+        """
         self.model = None
+        self.classifier = None  # Trained IntentClassifier, if one matches the model
+        self.entity_extractor = EntityExtractor()
+        self.memo = IntentMemo(settings.INTENT_MEMO_SIZE, settings.INTENT_MEMO_MAX_CHARS)
+        self._keyword_matrix_cache = None  # (signature, intents, matrix, offsets); see _keyword_matrix
         logger.info("Initializing intent analyzer...")
-        self._load_model()
+        if load_model:
+            self.load_model()
         
         # Define intent categories and their keywords
         self.intent_patterns = {
@@ -21,22 +38,46 @@ class IntentAnalyzer:
             'deadline': ['deadline', 'exam', 'fee', 'library', 'due date', 'assignment', 'submit'],
             'task': ['task', 'todo', 'reminder', 'remind me', 'add task', 'complete task'],
             'weather': ['weather', 'temperature', 'forecast', 'climate', 'rain', 'sunny'],
-            'calculate': ['calculate', 'compute', 'math', 'add', 'subtract', 'multiply', 'divide', 'average', 'plus', 'minus'],
+            'calculate': ['calculate', 'compute', 'math', 'add', 'subtract', 'multiply', 'divide', 'average', 'plus', 'minus',
+                          'percent', '% of', 'sqrt', 'square root',
+                          'mean of', 'median', 'standard deviation', 'percentile', 'statistics', 'weighted', 'grade',
+                          'do i need to get'],
             'summarize': ['summarize', 'summary', 'key points', 'brief', 'main idea', 'tldr'],
             'youtube': ['youtube', 'open youtube', 'search youtube', 'play video', 'watch'],
             'joke': ['joke', 'tell me a joke', 'funny', 'make me laugh', 'humor'],
             'conversation': ['hello', 'hi', 'how are you', 'what\'s up', 'hey', 'good morning', 'good evening'],
         }
+        
+        # Checked before intent_patterns: grade questions mention exams and assignments
+        self.priority_patterns = {
+            'calculate': ['need on the final', 'need on my final', 'weighted average'],
+        }
     
-    def _load_model(self):
+    def load_model(self):
         """Load sentence transformer model"""
+        # Imported here so keyword matching works without loading torch
+        from sentence_transformers import SentenceTransformer
+        
         try:
             logger.info(f"Loading sentence transformer: {settings.SENTENCE_TRANSFORMER_MODEL}")
-            self.model = SentenceTransformer(
+            bundled = model_bundle.resolve(settings.SENTENCE_TRANSFORMER_MODEL)
+            if bundled:
+                # A local directory: loaded without contacting the hub
+                self.model = SentenceTransformer(bundled)
+            else:
+                self.model = SentenceTransformer(
+                    settings.SENTENCE_TRANSFORMER_MODEL,
+                    cache_folder=str(settings.MODELS_DIR)
+                )
+            logger.info("Intent analyzer model loaded!")
+            
+            from core.intent_classifier import IntentClassifier
+            self.classifier = IntentClassifier.load_for(
+                settings.INTENT_CLASSIFIER_PATH,
                 settings.SENTENCE_TRANSFORMER_MODEL,
-                cache_folder=str(settings.MODELS_DIR)
+                self.model.get_sentence_embedding_dimension()
             )
-            logger.info("Intent analyzer model loaded!")
+            self.memo.clear()  # Entries classified by a previous model
         except Exception as e:
             logger.error(f"Error loading intent analyzer model: {e}")
             raise
@@ -51,77 +92,257 @@ class IntentAnalyzer:
         Returns:
             Intent category as string
         """
-        text_lower = text.lower()
+        # Repeated queries are answered from the memo
+        entry = self.memo.lookup(text)
+        if entry is not None:
+            return entry.intent
         
+        intent = self._classify(text)
+        entry = self.memo.entry(text)
+        if entry is not None:
+            entry.intent = intent
+        return intent
+    
+    def _classify(self, text: str) -> str:
+        """Detect intent without the memo"""
         # Simple keyword matching first (faster)
-        for intent, keywords in self.intent_patterns.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    return intent
+        intent = self.match_keywords(text)
+        if intent:
+            return intent
         
         # If no direct match, use semantic similarity
         return self._detect_intent_semantic(text)
     
+    def match_keywords(self, text: str) -> Optional[str]:
+        """
+        Detect intent by keyword matching alone (no model needed)
+        
+        Args:
+            text: Input text
+        
+        Returns:
+            Intent category, or None if no keyword matches
+        """
+        text_lower = text.lower()
+        for patterns in (self.priority_patterns, self.intent_patterns):
+            for intent, keywords in patterns.items():
+                for keyword in keywords:
+                    if keyword in text_lower:
+                        return intent
+        return None
+    
+    def predict_intents(self, text: str, k: int = 3) -> List[Tuple[str, float]]:
+        """
+        Most likely intents for a text, by embedding
+        
+        Args:
+            text: Input text
+            k: Number of intents to return
+        
+        Returns:
+            (intent, score) pairs, best first. Scores are the trained
+            classifier's probabilities, or the best keyword cosine
+            similarity per intent when no classifier is trained.
+        """
+        if self.classifier is not None:
+            return self.classifier.top_k(self.embed(text), k)
+        
+        scores = self._keyword_similarities(text)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+    
+    def embed(self, text: str):
+        """Normalized sentence embedding of a text (memoized)"""
+        entry = self.memo.entry(text)
+        if entry is not None and entry.embedding is not None:
+            return entry.embedding
+        
+        embedding = self.model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
+        if entry is not None:
+            entry.embedding = embedding
+        return embedding
+    
+    def warm_memo(self, texts: List[str]) -> int:
+        """
+        Classify queries ahead of time so their first request is a memo hit
+        
+        Texts no keyword matches are encoded in one batch.
+        
+        Args:
+            texts: Queries, most important first
+        
+        Returns:
+            Number of queries memoized (0 when the memo is disabled)
+        """
+        if not self.memo.max_size:
+            return 0
+        texts = [text for text in texts if len(text) <= self.memo.max_chars][:self.memo.max_size]
+        semantic = [text for text in texts if self.match_keywords(text) is None]
+        if semantic and self.model is not None:
+            embeddings = self.model.encode(semantic, batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+            for text, embedding in zip(semantic, embeddings):
+                self.memo.entry(text).embedding = embedding
+        
+        for text in texts:
+            entry = self.memo.entry(text)
+            entry.intent = self._classify(text)
+            self.extract_entities(text, entry.intent)
+        return len(texts)
+    
+    def _keyword_matrix(self):
+        """
+        Unit-normalized embeddings of every intent keyword, encoded once
+        
+        Re-encoded only when the model or intent_patterns change.
+        
+        Returns:
+            (intents, matrix, offsets): the keywords of intents[i] are rows
+            offsets[i]:offsets[i + 1] of matrix
+        """
+        import numpy as np
+        
+        signature = (id(self.model), tuple((intent, tuple(keywords)) for intent, keywords in self.intent_patterns.items()))
+        cached = self._keyword_matrix_cache
+        if cached is None or cached[0] != signature:
+            keywords = [keyword for group in self.intent_patterns.values() for keyword in group]
+            matrix = self.model.encode(keywords, convert_to_numpy=True, normalize_embeddings=True)
+            offsets = np.cumsum([0] + [len(group) for group in self.intent_patterns.values()])
+            cached = self._keyword_matrix_cache = (signature, list(self.intent_patterns), matrix, offsets)
+        return cached[1:]
+    
+    def _keyword_similarities(self, text: str) -> Dict[str, float]:
+        """Best cosine similarity between the text and each intent's keywords"""
+        import numpy as np
+        
+        intents, matrix, offsets = self._keyword_matrix()
+        similarities = matrix @ self.embed(text)
+        return dict(zip(intents, np.maximum.reduceat(similarities, offsets[:-1]).tolist()))
+    
     def _detect_intent_semantic(self, text: str) -> str:
-        """Use semantic similarity to detect intent"""
+        """Use the trained classifier (or keyword similarity) to detect intent"""
         try:
-            # Encode input text
-            text_embedding = self.model.encode(text, convert_to_tensor=True)
-            
-            # Encode intent patterns
-            max_similarity = -1
-            detected_intent = 'conversation'  # default
-            
-            for intent, keywords in self.intent_patterns.items():
-                # Encode all keywords for this intent
-                keyword_embeddings = self.model.encode(keywords, convert_to_tensor=True)
-                
-                # Calculate similarity
-                similarities = util.cos_sim(text_embedding, keyword_embeddings)
-                max_sim = similarities.max().item()
-                
-                if max_sim > max_similarity:
-                    max_similarity = max_sim
-                    detected_intent = intent
-            
-            return detected_intent if max_similarity > 0.3 else 'conversation'
-            
+            intent, score = self.predict_intents(text, k=1)[0]
+            threshold = settings.INTENT_CLASSIFIER_MIN_CONFIDENCE if self.classifier is not None else 0.3
+            return intent if score >= threshold else 'conversation'
+        
         except Exception as e:
             logger.error(f"Error in semantic intent detection: {e}")
             return 'conversation'
     
-    def analyze_document_intent(self, text: str) -> Dict[str, float]:
+    def analyze_document_intent(self, text: Union[str, Iterable[str]], sections: bool = True) -> Dict:
         """
         Analyze document and return intent scores for different categories
         
+        The document is cut into windows of whole sentences that fit the
+        encoder's input length, so nothing past the first few hundred tokens
+        is truncated away. The windows are encoded in batches and scored
+        against the keyword matrix. The document embedding is the mean of
+        the window embeddings weighted by token count. Only one batch of
+        windows is held at a time, so memory does not grow with the document
+        (apart from the per-section list).
+        
         Args:
-            text: Document text
+            text: Document text, or an iterable of pieces (e.g. pages) to stream
+            sections: Include per-section (window) scores
         
         Returns:
-            Dictionary of intent categories and their scores
+            Dictionary with 'scores' (intent -> mean cosine similarity to its
+            keywords, for the whole document), 'tokens', 'windows' and, if
+            requested, 'sections': index, tokens, preview, best intent and
+            scores of each window. Empty if the document could not be analyzed.
         """
+        import numpy as np
+        
         try:
-            # Encode document
-            doc_embedding = self.model.encode(text, convert_to_tensor=True)
+            intents, matrix, offsets = self._keyword_matrix()
+            counts = np.diff(offsets)
             
-            intent_scores = {}
+            def score(embeddings):
+                return np.add.reduceat(embeddings @ matrix.T, offsets[:-1], axis=1) / counts
             
-            for intent, keywords in self.intent_patterns.items():
-                # Encode keywords
-                keyword_embeddings = self.model.encode(keywords, convert_to_tensor=True)
-                
-                # Calculate average similarity
-                similarities = util.cos_sim(doc_embedding, keyword_embeddings)
-                avg_similarity = similarities.mean().item()
+            pooled = np.zeros(matrix.shape[1], dtype=np.float64)
+            section_scores = []
+            tokens = windows = 0
+            for batch in self._iter_window_batches(text):
+                batch_texts, lengths = zip(*batch)
+                embeddings = self.model.encode(list(batch_texts), batch_size=len(batch_texts),
+                                               convert_to_numpy=True, normalize_embeddings=True)
+                pooled += np.asarray(lengths, dtype=np.float64) @ embeddings
+                tokens += sum(lengths)
+                windows += len(batch)
                 
-                intent_scores[intent] = avg_similarity
-            
-            return intent_scores
+                if sections:
+                    for window, length, scores in zip(batch_texts, lengths, score(embeddings)):
+                        section_scores.append({
+                            'index': len(section_scores),
+                            'tokens': length,
+                            'preview': window[:80],
+                            'intent': intents[int(scores.argmax())],
+                            'scores': dict(zip(intents, scores.tolist()))
+                        })
             
+            if not windows:
+                return {}
+            pooled /= max(np.linalg.norm(pooled), 1e-12)
+            result = {
+                'scores': dict(zip(intents, score(pooled.astype(matrix.dtype)[None, :])[0].tolist())),
+                'tokens': tokens,
+                'windows': windows
+            }
+            if sections:
+                result['sections'] = section_scores
+            return result
+        
         except Exception as e:
             logger.error(f"Error analyzing document intent: {e}")
             return {}
     
+    def _iter_window_batches(self, text: Union[str, Iterable[str]]) -> Iterator[List[Tuple[str, int]]]:
+        """Batches of settings.DOCUMENT_INTENT_BATCH_SIZE (window, token count) pairs"""
+        batch = []
+        for window in self._iter_windows([text] if isinstance(text, str) else text):
+            batch.append(window)
+            if len(batch) == settings.DOCUMENT_INTENT_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def _iter_windows(self, pieces: Iterable[str]) -> Iterator[Tuple[str, int]]:
+        """
+        Pack sentences into windows of at most the encoder's input length
+        
+        A sentence longer than a window is split on token boundaries.
+        
+        Yields:
+            (window text, token count)
+        """
+        tokenizer = self.model.tokenizer
+        max_tokens = self.model.max_seq_length - 2  # Room for [CLS] and [SEP]
+        current, current_tokens = [], 0
+        
+        for piece in pieces:
+            sentences = [sentence for sentence in _SENTENCE_BOUNDARY.split(piece.strip()) if sentence.strip()]
+            for start in range(0, len(sentences), _TOKENIZE_GROUP):
+                group = sentences[start:start + _TOKENIZE_GROUP]
+                for sentence, ids in zip(group, tokenizer(group, add_special_tokens=False)['input_ids']):
+                    if len(ids) > max_tokens:
+                        if current:
+                            yield " ".join(current), current_tokens
+                            current, current_tokens = [], 0
+                        for offset in range(0, len(ids), max_tokens):
+                            window = ids[offset:offset + max_tokens]
+                            yield tokenizer.decode(window, skip_special_tokens=True), len(window)
+                        continue
+                    
+                    if current and current_tokens + len(ids) > max_tokens:
+                        yield " ".join(current), current_tokens
+                        current, current_tokens = [], 0
+                    current.append(sentence)
+                    current_tokens += len(ids)
+        
+        if current:
+            yield " ".join(current), current_tokens
+    
     def extract_entities(self, text: str, intent: str) -> Dict:
         """
         Extract relevant entities based on intent
@@ -131,46 +352,16 @@ class IntentAnalyzer:
             intent: Detected intent
         
         Returns:
-            Dictionary of extracted entities
+            Dictionary of extracted entities; number and percentage values
+            are under 'numbers'/'percents' and other entities, with their
+            spans, under 'spans'
         """
-        import re
-        
-        entities = {}
-        text_lower = text.lower()
-        
-        if intent == 'schedule':
-            # Extract day
-            days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-            for day in days:
-                if day in text_lower:
-                    entities['day'] = day.capitalize()
-                    break
-        
-        elif intent == 'deadline':
-            # Extract deadline type
-            types = ['exam', 'fee', 'library', 'assignment']
-            for dtype in types:
-                if dtype in text_lower:
-                    entities['type'] = dtype
-                    break
-        
-        elif intent == 'calculate':
-            # Extract mathematical expression
-            # Remove common words
-            expr = re.sub(r'\b(calculate|compute|what is|solve)\b', '', text_lower, flags=re.IGNORECASE)
-            entities['expression'] = expr.strip()
-        
-        elif intent == 'weather':
-            # Try to extract city name
-            # Simple pattern: "weather in [city]" or "[city] weather"
-            match = re.search(r'(?:weather (?:in|for) |in )([a-zA-Z ]+?)(?:\?|$| weather)', text_lower)
-            if match:
-                entities['city'] = match.group(1).strip().title()
-        
-        elif intent == 'youtube':
-            # Extract search query
-            match = re.search(r'(?:search|find|play|open) (?:youtube for |on youtube )?(.*?)(?:\?|$)', text_lower)
-            if match:
-                entities['query'] = match.group(1).strip()
+        entry = self.memo.entry(text)
+        # Spans refer to the exact text, so a variant in case or spacing is extracted again
+        if entry is not None and entry.entities is not None and entry.intent == intent and entry.text == text:
+            return dict(entry.entities)  # Callers add keys such as 'tier'
         
+        entities = self.entity_extractor.entities_for_intent(text, intent)
+        if entry is not None and entry.intent == intent and entry.text == text:
+            entry.entities = dict(entities)
         return entities
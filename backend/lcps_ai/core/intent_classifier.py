@@ -0,0 +1,372 @@
+"""
+Linear intent classifier on sentence-transformer embeddings
+
+A multinomial logistic regression over normalized MiniLM embeddings,
+stored as a NumPy weight matrix: classifying a query is one matrix
+multiply and a softmax, with probabilities for every intent.
+
+The training corpus is bootstrapped from the analyzer's keyword lists
+(each keyword alone and in a few carrier sentences), logged conversation
+inputs labelled by keyword match, and optional hand-labelled JSONL files.
+Train it offline with train_intent_classifier.py.
+"""
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.logger import logger
+
+
+FORMAT_VERSION = 1
+
+# Carrier sentences for the bootstrapped keyword examples. The same ones are
+# used for every intent, so they add phrasing variety without adding signal.
+KEYWORD_TEMPLATES = (
+    "{}",
+    "can you help me with {}",
+    "i have a question about {}",
+    "{} please",
+)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class IntentClassifier:
+    """Softmax regression from embeddings to intents"""
+    
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, labels: Sequence[str],
+                 embedding_model: str, metadata: Dict = None):
+        """
+        Args:
+            weights: (embedding_dim, n_intents) weight matrix
+            bias: (n_intents,) bias vector
+            labels: Intent name of each column
+            embedding_model: Sentence transformer the embeddings come from
+            metadata: Training details (examples, accuracy, temperature, ...)
+        """
+        self.weights = np.ascontiguousarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.labels = list(labels)
+        self.embedding_model = embedding_model
+        self.metadata = metadata or {}
+    
+    @property
+    def dimension(self) -> int:
+        return self.weights.shape[0]
+    
+    def predict_proba(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Intent probabilities
+        
+        Args:
+            embeddings: Normalized embedding (dim,) or batch (n, dim)
+        
+        Returns:
+            Probabilities, (n_intents,) or (n, n_intents)
+        """
+        return _softmax(np.asarray(embeddings, dtype=np.float32) @ self.weights + self.bias)
+    
+    def top_k(self, embedding: np.ndarray, k: int = 3) -> List[Tuple[str, float]]:
+        """
+        Most likely intents for one embedding
+        
+        Args:
+            embedding: Normalized embedding (dim,)
+            k: Number of intents to return
+        
+        Returns:
+            (intent, probability) pairs, most likely first
+        """
+        probabilities = self.predict_proba(embedding)
+        order = np.argsort(probabilities)[::-1][:k]
+        return [(self.labels[i], float(probabilities[i])) for i in order]
+    
+    def save(self, path: Path):
+        """Write the classifier as a .npz file (no pickled objects)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as file:
+            np.savez(
+                file,
+                weights=self.weights,
+                bias=self.bias,
+                labels=np.array(self.labels),
+                embedding_model=np.array(self.embedding_model),
+                metadata=np.array(json.dumps(dict(self.metadata, format_version=FORMAT_VERSION)))
+            )
+    
+    @classmethod
+    def load(cls, path: Path) -> 'IntentClassifier':
+        """Read a classifier written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data['metadata']))
+            if metadata.get('format_version') != FORMAT_VERSION:
+                raise ValueError(f"Unsupported intent classifier format: {metadata.get('format_version')}")
+            return cls(data['weights'], data['bias'], [str(label) for label in data['labels']],
+                       str(data['embedding_model']), metadata)
+    
+    @classmethod
+    def load_for(cls, path: Path, embedding_model: str, dimension: int = None) -> Optional['IntentClassifier']:
+        """
+        Load the classifier if it exists and matches the embedding model
+        
+        Args:
+            path: Classifier file
+            embedding_model: Sentence transformer in use
+            dimension: Embedding size of that model, if known
+        
+        Returns:
+            The classifier, or None (semantic routing then falls back to keyword similarity)
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            classifier = cls.load(path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable intent classifier {path}: {e}")
+            return None
+        if classifier.embedding_model != embedding_model or (dimension and classifier.dimension != dimension):
+            logger.warning(
+                f"Ignoring intent classifier trained on {classifier.embedding_model} "
+                f"({classifier.dimension} dims); retrain it for {embedding_model}"
+            )
+            return None
+        logger.info(f"Intent classifier loaded ({len(classifier.labels)} intents, "
+                    f"{classifier.metadata.get('examples', '?')} training examples)")
+        return classifier
+
+
+def bootstrap_corpus(intent_patterns: Dict[str, List[str]], history: Iterable[str] = (),
+                     label_history=None) -> List[Tuple[str, str]]:
+    """
+    Labelled examples from keywords and logged conversations
+    
+    Args:
+        intent_patterns: Intent -> keywords (IntentAnalyzer.intent_patterns)
+        history: Logged user inputs
+        label_history: Function giving an input's intent, or None to skip it
+                       (IntentAnalyzer.match_keywords)
+    
+    Returns:
+        Unique (text, intent) pairs
+    """
+    examples = {}
+    for intent, keywords in intent_patterns.items():
+        for keyword in keywords:
+            for template in KEYWORD_TEMPLATES:
+                examples.setdefault(template.format(keyword), intent)
+    if label_history:
+        for text in history:
+            text = ' '.join(text.lower().split())
+            intent = label_history(text) if text else None
+            if intent:
+                examples.setdefault(text, intent)
+    return list(examples.items())
+
+
+def template_group(text: str) -> str:
+    """The keyword a bootstrapped example was made from (the text itself otherwise)"""
+    for template in KEYWORD_TEMPLATES[1:]:
+        prefix, suffix = template.split("{}")
+        if text.startswith(prefix) and text.endswith(suffix) and len(text) > len(prefix) + len(suffix):
+            return text[len(prefix):len(text) - len(suffix)]
+    return text
+
+
+def load_corpus(path: Path) -> List[Tuple[str, str]]:
+    """Read a JSONL corpus: one {"text": ..., "intent": ...} object per line"""
+    examples = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                examples.append((' '.join(str(record['text']).lower().split()), str(record['intent'])))
+            except (ValueError, KeyError) as e:
+                raise ValueError(f"{path}:{line_number}: expected {{\"text\": ..., \"intent\": ...}} ({e})") from None
+    return examples
+
+
+def encode_cached(model, texts: Sequence[str], cache_path: Path, model_name: str,
+                  batch_size: int = 64) -> np.ndarray:
+    """
+    Normalized embeddings of texts, reusing those cached by earlier runs
+    
+    The cache is a .npz of texts and embeddings for one model; only texts
+    missing from it are encoded.
+    
+    Args:
+        model: SentenceTransformer
+        texts: Texts to embed
+        cache_path: Embedding cache file
+        model_name: Model ID (a cache written for another model is discarded)
+        batch_size: Encoding batch size
+    
+    Returns:
+        (len(texts), dim) float32 array
+    """
+    cache_path = Path(cache_path)
+    cached = {}
+    if cache_path.exists():
+        try:
+            with np.load(cache_path, allow_pickle=False) as data:
+                if str(data['model']) == model_name:
+                    cached = dict(zip((str(text) for text in data['texts']), data['embeddings']))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable embedding cache {cache_path}: {e}")
+    
+    missing = sorted({text for text in texts if text not in cached})
+    if missing:
+        encoded = model.encode(missing, batch_size=batch_size, convert_to_numpy=True,
+                               normalize_embeddings=True)
+        cached.update(zip(missing, np.asarray(encoded, dtype=np.float32)))
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, 'wb') as file:
+            np.savez(file, model=np.array(model_name), texts=np.array(list(cached)),
+                     embeddings=np.stack(list(cached.values())).astype(np.float32))
+    logger.info(f"Embeddings: {len(texts) - len(missing)} cached, {len(missing)} encoded")
+    return np.stack([cached[text] for text in texts]).astype(np.float32)
+
+
+def _fit_temperature(logits: np.ndarray, targets: np.ndarray) -> float:
+    """Temperature minimizing the negative log-likelihood (golden-section search on log T)"""
+    def nll(log_t: float) -> float:
+        scaled = logits / np.exp(log_t)
+        scaled = scaled - scaled.max(axis=1, keepdims=True)
+        log_probs = scaled - np.log(np.exp(scaled).sum(axis=1, keepdims=True))
+        return float(-log_probs[np.arange(len(targets)), targets].mean())
+    
+    low, high = np.log(0.05), np.log(20.0)
+    ratio = (np.sqrt(5) - 1) / 2
+    for _ in range(60):
+        a, b = high - ratio * (high - low), low + ratio * (high - low)
+        if nll(a) < nll(b):
+            high = b
+        else:
+            low = a
+    return float(np.exp((low + high) / 2))
+
+
+def train(embeddings: np.ndarray, intents: Sequence[str], labels: Sequence[str], embedding_model: str,
+          l2: float = 1e-3, epochs: int = 400, learning_rate: float = 0.05, holdout: float = 0.2,
+          groups: Sequence[str] = None, seed: int = 0) -> IntentClassifier:
+    """
+    Fit the classifier
+    
+    Full-batch gradient descent (Adam) on the class-balanced cross-entropy
+    with L2 regularization. When a holdout fraction is set, those examples
+    are kept out of training, used to report accuracy, and used to fit a
+    temperature that calibrates the probabilities (folded into the
+    weights, so inference is unchanged).
+    
+    Args:
+        embeddings: (n, dim) normalized embeddings
+        intents: Intent of each example
+        labels: All intents, in output order
+        embedding_model: Sentence transformer the embeddings come from
+        l2: L2 penalty on the weights
+        epochs: Gradient steps
+        learning_rate: Adam step size
+        holdout: Fraction of examples kept for validation and calibration
+        groups: Group of each example (e.g. template_group()); a group is
+                never split between training and holdout, so the holdout
+                is not made of rephrasings of training examples
+        seed: Random seed for the holdout split
+    
+    Returns:
+        Trained classifier (metadata holds the accuracies and temperature)
+    """
+    labels = list(labels)
+    index = {label: i for i, label in enumerate(labels)}
+    unknown = sorted(set(intents) - set(index))
+    if unknown:
+        raise ValueError(f"Unknown intents in the corpus: {', '.join(unknown)}")
+    
+    x = np.asarray(embeddings, dtype=np.float64)
+    y = np.array([index[intent] for intent in intents])
+    group_ids = np.unique(np.asarray(groups if groups is not None else range(len(y)), dtype=str),
+                          return_inverse=True)[1]
+    shuffled = np.random.default_rng(seed).permutation(group_ids.max() + 1)
+    held = shuffled[:int(len(shuffled) * holdout)] if holdout > 0 else []
+    in_holdout = np.isin(group_ids, held)
+    valid, fit = np.flatnonzero(in_holdout), np.flatnonzero(~in_holdout)
+    
+    x_fit, y_fit = x[fit], y[fit]
+    targets = np.eye(len(labels))[y_fit]
+    # Each intent contributes equally, however many examples it has
+    counts = np.bincount(y_fit, minlength=len(labels)).astype(np.float64)
+    sample_weights = (1.0 / np.maximum(counts, 1))[y_fit]
+    sample_weights /= sample_weights.sum()
+    
+    weights = np.zeros((x.shape[1], len(labels)))
+    bias = np.zeros(len(labels))
+    moments = [np.zeros_like(weights), np.zeros_like(bias)]
+    velocities = [np.zeros_like(weights), np.zeros_like(bias)]
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    started = time.perf_counter()
+    for step in range(1, epochs + 1):
+        error = (_softmax(x_fit @ weights + bias) - targets) * sample_weights[:, None]
+        gradients = [x_fit.T @ error + l2 * weights, error.sum(axis=0)]
+        for parameter, gradient, moment, velocity in zip((weights, bias), gradients, moments, velocities):
+            moment *= beta1
+            moment += (1 - beta1) * gradient
+            velocity *= beta2
+            velocity += (1 - beta2) * gradient ** 2
+            parameter -= learning_rate * (moment / (1 - beta1 ** step)) / (np.sqrt(velocity / (1 - beta2 ** step)) + eps)
+    
+    metadata = {
+        'examples': int(len(y)),
+        'trained_examples': int(len(fit)),
+        'class_counts': {label: int(np.sum(y == i)) for i, label in enumerate(labels)},
+        'train_accuracy': float(np.mean(np.argmax(x_fit @ weights + bias, axis=1) == y_fit)),
+        'l2': l2,
+        'epochs': epochs,
+        'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'train_seconds': round(time.perf_counter() - started, 2),
+    }
+    if len(valid):
+        logits = x[valid] @ weights + bias
+        temperature = _fit_temperature(logits, y[valid])
+        weights, bias = weights / temperature, bias / temperature
+        metadata.update(
+            holdout_examples=int(len(valid)),
+            holdout_accuracy=float(np.mean(np.argmax(logits, axis=1) == y[valid])),
+            temperature=temperature,
+        )
+    return IntentClassifier(weights, bias, labels, embedding_model, metadata)
+
+
+def evaluate(classifier: IntentClassifier, embeddings: np.ndarray, intents: Sequence[str]) -> Dict:
+    """
+    Accuracy, per-intent recall and mean confidence on labelled examples
+    
+    Args:
+        classifier: Trained classifier
+        embeddings: (n, dim) normalized embeddings
+        intents: True intent of each example
+    
+    Returns:
+        Dictionary with accuracy, mean_confidence and recall per intent
+    """
+    probabilities = classifier.predict_proba(embeddings)
+    predicted = [classifier.labels[i] for i in np.argmax(probabilities, axis=1)]
+    correct = np.array([p == t for p, t in zip(predicted, intents)])
+    recall = {}
+    for intent in sorted(set(intents)):
+        mask = np.array([t == intent for t in intents])
+        recall[intent] = float(correct[mask].mean())
+    return {
+        'examples': len(intents),
+        'accuracy': float(correct.mean()) if len(correct) else 0.0,
+        'mean_confidence': float(probabilities.max(axis=1).mean()) if len(correct) else 0.0,
+        'recall': recall,
+    }
@@ -0,0 +1,101 @@
+"""
+Memoized intent classification for repeated queries
+
+Many queries ("what's my schedule", "show deadlines") repeat word for word.
+The memo is a bounded LRU keyed by the normalized text (lower case,
+whitespace collapsed). For each key it keeps the detected intent, the
+extracted entities and the sentence embedding, so classifying a repeat
+costs one dictionary lookup.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass
+class MemoEntry:
+    """What is known about one normalized query"""
+    text: str  # The text the entities were extracted from (their spans refer to it)
+    intent: Optional[str] = None
+    entities: Optional[Dict] = None
+    embedding: object = None  # Normalized sentence embedding (numpy array)
+
+
+class IntentMemo:
+    """Thread-safe LRU of MemoEntry by normalized text, with hit-rate stats"""
+    
+    def __init__(self, max_size: int, max_chars: int):
+        """
+        Args:
+            max_size: Entries kept; 0 disables the memo
+            max_chars: Longer texts (pasted number lists, documents) are not memoized
+        """
+        self.max_size = max_size
+        self.max_chars = max_chars
+        self._entries: 'OrderedDict[str, MemoEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Memo key: lower case with whitespace collapsed"""
+        return ' '.join(text.lower().split())
+    
+    def lookup(self, text: str) -> Optional[MemoEntry]:
+        """The entry for a text, counted as a hit or miss"""
+        if not self.max_size or len(text) > self.max_chars:
+            return None
+        key = self.normalize(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.intent is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+    
+    def entry(self, text: str) -> Optional[MemoEntry]:
+        """
+        The entry for a text, created if needed (not counted in the stats)
+        
+        Returns:
+            The entry to read or fill in, or None if the text is not memoized
+        """
+        if not self.max_size or len(text) > self.max_chars:
+            return None
+        key = self.normalize(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = MemoEntry(text)
+                if len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def clear(self):
+        """Forget every entry (after the model or classifier changes)"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        """Size, hits, misses, evictions and hit rate"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -4,6 +4,9 @@ A conversational AI assistant for students with NLP, task management, and more.
 """
 import sys
 import os
+import re
+import threading
+from typing import Optional
 from colorama import init, Fore, Style
 
 # Initialize colorama for Windows
@@ -12,36 +15,55 @@ init(autoreset=True)
 # Import core components
 from core.ai_engine import AIEngine, JokeGenerator
 from core.intent_analyzer import IntentAnalyzer
+from core.handler_registry import HandlerRegistry, load_handler_modules
 
 # Import modules
 from modules.task_reminder import TaskManager
 from modules.schedule_manager import ScheduleManager
 from modules.deadline_tracker import DeadlineTracker
 from modules.weather import Weather
-from modules.calculator import Calculator
-from modules.summarizer import Summarizer
+from modules.calculator import Calculator, CalculatorSessions, CalculationError
+from modules.statistics_calculator import StatisticsCalculator
 from modules.youtube_handler import YouTubeHandler
-from modules.stt_handler import STTHandler
-from modules.tts_handler import TTSHandler
+# Summarizer and the voice handlers pull in torch/transformers, speech_recognition
+# and pyttsx3, so they are imported on first use instead
 
 # Import storage
 from storage import Database, CacheManager
 
-# Import utilities
+# Import configuration and utilities
+import config.settings as settings
 from utils.logger import logger
-from utils.helpers import get_day_of_week
+from utils.helpers import get_day_of_week, resolve_day, is_headless
+from utils import tracing
+
+
+class ModelsNotReady(RuntimeError):
+    """Raised when a request needs AI models that are still warming up"""
 
 
 class LCPSAssistant:
     """Main LCPS AI Assistant class"""
     
-    def __init__(self, use_voice=False):
-        """Initialize the AI Assistant"""
+    def __init__(self, use_voice=False, load_models=True, local_session=True):
+        """
+        Initialize the AI Assistant
+        
+        Args:
+            use_voice: Enable voice input/output
+            load_models: Load AI models now; otherwise call warm_up() or
+                         start_warm_up() (model-free intents work meanwhile)
+            local_session: Keep calculator variables between requests made
+                           without a session_id (the console user). A shared
+                           service turns this off so anonymous callers never
+                           see each other's results.
+        """
         logger.info("=" * 60)
         logger.info("Initializing LCPS AI Assistant...")
         logger.info("=" * 60)
         
         self.use_voice = use_voice
+        self.local_session = local_session
         self.running = False
         
         # Initialize storage
@@ -49,15 +71,19 @@ class LCPSAssistant:
         self.db = Database()
         self.cache = CacheManager()
         
-        # Initialize core AI components
-        logger.info("Loading AI models (this may take a moment)...")
-        try:
-            self.ai_engine = AIEngine()
-            self.intent_analyzer = IntentAnalyzer()
-        except Exception as e:
-            logger.error(f"Failed to load AI models: {e}")
-            logger.error("Please ensure you have installed all dependencies and have internet connection for first-time model downloads.")
-            sys.exit(1)
+        # Core AI components; models are loaded by warm_up()
+        self.ai_engine = None
+        self.intent_analyzer = IntentAnalyzer(load_model=False)
+        self.warm_up_error = None
+        self._warm_up_done = threading.Event()
+        self.handlers = HandlerRegistry()
+        
+        if load_models:
+            try:
+                self.warm_up()
+            except Exception:
+                logger.error("Please ensure you have installed all dependencies and have internet connection for first-time model downloads.")
+                sys.exit(1)
         
         # Initialize modules
         logger.info("Initializing modules...")
@@ -66,8 +92,11 @@ class LCPSAssistant:
         self.deadline_tracker = DeadlineTracker(self.db)
         self.weather = Weather()
         self.calculator = Calculator()
+        self.calculator_sessions = CalculatorSessions()
+        self.statistics = StatisticsCalculator()
         self.youtube = YouTubeHandler()
         self.joke_generator = JokeGenerator()
+        self._register_handlers()
         
         # Initialize voice handlers (optional)
         self.stt = None
@@ -77,37 +106,111 @@ class LCPSAssistant:
         if use_voice:
             try:
                 logger.info("Initializing voice handlers...")
+                from modules.stt_handler import STTHandler
+                from modules.tts_handler import TTSHandler
                 self.stt = STTHandler()
                 self.tts = TTSHandler()
                 self.tts_enabled = True  # Auto-enable TTS if voice mode
             except Exception as e:
                 logger.warning(f"Voice features unavailable: {e}")
                 self.use_voice = False
-        else:
+        elif not is_headless():
             # Initialize TTS even without voice input for talkback feature
             try:
+                from modules.tts_handler import TTSHandler
                 self.tts = TTSHandler()
                 logger.info("Text-to-speech available (use 'tts on' to enable)")
             except Exception as e:
                 logger.debug(f"TTS unavailable: {e}")
         
-        # Load summarizer lazily (heavy model)
-        self._summarizer = None
+        # Load summarizers lazily (heavy models), one per quality tier
+        self._summarizers = {}
+        self._summarizer_lock = threading.Lock()
         
         logger.info(Fore.GREEN + "✓ LCPS AI Assistant ready!")
         logger.info("=" * 60)
     
+    def warm_up(self):
+        """Load the AI models (blocking)"""
+        logger.info("Loading AI models (this may take a moment)...")
+        try:
+            self.ai_engine = AIEngine()
+            self.intent_analyzer.load_model()
+            logger.info("AI models loaded")
+        except Exception as e:
+            logger.error(f"Failed to load AI models: {e}")
+            self.warm_up_error = e
+            raise
+        finally:
+            self._warm_up_done.set()
+        
+        # After readiness, so serving never waits for it
+        try:
+            queries = self.db.get_frequent_inputs(limit=settings.INTENT_MEMO_WARM_QUERIES)
+            warmed = self.intent_analyzer.warm_memo(queries)
+            logger.info(f"Intent memo warmed with {warmed} frequent queries")
+        except Exception as e:
+            logger.warning(f"Could not warm the intent memo: {e}")
+    
+    def start_warm_up(self) -> threading.Thread:
+        """Load the AI models on a background thread"""
+        def run():
+            try:
+                self.warm_up()
+            except Exception:
+                pass  # Recorded in warm_up_error and reported through readiness
+        
+        thread = threading.Thread(target=run, name="model-warm-up", daemon=True)
+        thread.start()
+        return thread
+    
+    @property
+    def models_ready(self) -> bool:
+        """Whether the AI models finished loading successfully"""
+        return self._warm_up_done.is_set() and self.warm_up_error is None
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until warm-up finishes, returning whether the models are ready"""
+        self._warm_up_done.wait(timeout)
+        return self.models_ready
+    
+    def detect_intent(self, user_input: str) -> str:
+        """
+        Detect intent, using keyword matching alone until the models are ready
+        
+        Raises:
+            ModelsNotReady: If the request needs a model that is still loading
+        """
+        if self.models_ready:
+            return self.intent_analyzer.detect_intent(user_input)
+        
+        # Intents answered without any AI model can be served during warm-up
+        intent = self.intent_analyzer.match_keywords(user_input)
+        if intent is None or self.handlers.get(intent).needs_models:
+            raise ModelsNotReady("AI models are still loading. Please try again shortly.")
+        return intent
+    
     @property
     def summarizer(self):
-        """Lazy load summarizer"""
-        if self._summarizer is None:
-            logger.info("Loading summarization model...")
-            try:
-                self._summarizer = Summarizer()
-            except Exception as e:
-                logger.error(f"Failed to load summarizer: {e}")
-                return None
-        return self._summarizer
+        """Lazy load the interactive-tier summarizer"""
+        return self.get_summarizer()
+    
+    def get_summarizer(self, tier: str = None):
+        """Lazy load the summarizer for a quality tier"""
+        tier = tier or settings.SUMMARIZATION_INTERACTIVE_TIER
+        # The summarizer shares the intent analyzer's encoder, so wait for it to load
+        self.wait_until_ready()
+        with self._summarizer_lock:
+            if tier not in self._summarizers:
+                logger.info(f"Loading summarization model ({tier} tier)...")
+                try:
+                    from modules.summarizer import Summarizer
+                    # Share the intent analyzer's sentence encoder for TextRank
+                    self._summarizers[tier] = Summarizer(tier, encoder=self.intent_analyzer.model)
+                except Exception as e:
+                    logger.error(f"Failed to load summarizer: {e}")
+                    return None
+            return self._summarizers[tier]
     
     def print_welcome(self):
         """Print welcome message"""
@@ -157,6 +260,9 @@ class LCPSAssistant:
 {Fore.YELLOW}Calculations:{Style.RESET_ALL}
   "Calculate 25 + 17"
   "What is 15% of 200?"
+  "Calculate sqrt(2) * ans"
+  "Average of 78, 91, 85" / "90th percentile of ..."
+  "Homework 92 (20%), midterm 78 (30%): what do I need on the final to get a B?"
   
 {Fore.YELLOW}Weather:{Style.RESET_ALL}
   "What's the weather in London?"
@@ -189,8 +295,27 @@ class LCPSAssistant:
         if self.tts_enabled and self.tts and self.tts.is_available():
             self.tts.speak(text)
     
-    def process_input(self, user_input: str) -> str:
-        """Process user input and generate response"""
+    def process_input(self, user_input: str, summary_tier: str = None, session_id: str = None) -> str:
+        """
+        Process user input and generate response
+        
+        Sampled requests (settings.TRACE_SAMPLE_RATE) are traced stage by
+        stage; see utils/tracing.py.
+        
+        Args:
+            user_input: User's message
+            summary_tier: Optional summarization tier override for this request
+            session_id: Caller's session (e.g. the HTTP userId); calculator
+                        `ans` and variables are kept per session
+        
+        Returns:
+            Response text
+        """
+        with tracing.trace("process_input"):
+            return self._process_input(user_input, summary_tier, session_id)
+    
+    def _process_input(self, user_input: str, summary_tier: str = None, session_id: str = None) -> str:
+        """Process user input (the body of process_input)"""
         if not user_input.strip():
             return ""
         
@@ -206,6 +331,8 @@ class LCPSAssistant:
             return ""
         
         if user_input_lower == 'clear':
+            if self.ai_engine is None:
+                raise ModelsNotReady("AI models are still loading. Please try again shortly.")
             self.ai_engine.clear_history()
             return "Conversation history cleared! 🧹"
         
@@ -236,90 +363,97 @@ class LCPSAssistant:
             return "Text-to-speech disabled. 🔇"
         
         # Check cache first
-        cached_response = self.cache.get(user_input)
+        with tracing.span("cache_lookup"):
+            cached_response = self.cache.get(user_input)
         if cached_response:
             logger.info("Retrieved response from cache")
+            tracing.annotate(cached=True)
             return cached_response
         
         # Detect intent
-        intent = self.intent_analyzer.detect_intent(user_input)
-        entities = self.intent_analyzer.extract_entities(user_input, intent)
+        with tracing.span("detect_intent"):
+            intent = self.detect_intent(user_input)
+        with tracing.span("extract_entities"):
+            entities = self.intent_analyzer.extract_entities(user_input, intent)
+        tracing.annotate(intent=intent)
         
         logger.info(f"Detected intent: {intent}")
         if entities:
-            logger.info(f"Extracted entities: {entities}")
-        
-        # Route to appropriate handler
-        response = self._route_intent(intent, entities, user_input)
-        
-        # Cache the response if appropriate
-        if intent in ['weather', 'calculate', 'joke']:
-            self.cache.set(user_input, response, ttl=3600)
+            # Number lists can run to thousands of values; log only their counts
+            logged = {key: value for key, value in entities.items() if key not in ('spans', 'numbers', 'percents')}
+            counts = {key: len(entities[key]) for key in ('spans', 'numbers', 'percents') if key in entities}
+            logger.info(f"Extracted entities: {logged} (counts: {counts})")
+        
+        if summary_tier:
+            entities['tier'] = summary_tier
+        if session_id:
+            entities['session'] = session_id
+        
+        # Route to the registered handler, within its timeout
+        handler = self.handlers.get(intent)
+        with tracing.span(f"handler.{intent}"):
+            response, answered = self.handlers.dispatch(intent, entities, user_input)
+        
+        # Cache the response if appropriate (never a timeout or error reply)
+        if answered and handler.cacheable:
+            with tracing.span("cache_store"):
+                self.cache.set(user_input, response, ttl=handler.cache_ttl)
         
         # Save conversation to database
-        self.db.add_conversation(user_input, response)
+        with tracing.span("db.add_conversation"):
+            self.db.add_conversation(user_input, response)
         
         return response
     
-    def _route_intent(self, intent: str, entities: dict, user_input: str) -> str:
-        """Route intent to appropriate handler"""
-        
-        try:
-            if intent == 'schedule':
-                return self._handle_schedule(entities, user_input)
-            
-            elif intent == 'deadline':
-                return self._handle_deadline(entities, user_input)
-            
-            elif intent == 'task':
-                return self._handle_task(entities, user_input)
-            
-            elif intent == 'weather':
-                return self._handle_weather(entities, user_input)
-            
-            elif intent == 'calculate':
-                return self._handle_calculate(entities, user_input)
-            
-            elif intent == 'summarize':
-                return self._handle_summarize(entities, user_input)
-            
-            elif intent == 'youtube':
-                return self._handle_youtube(entities, user_input)
-            
-            elif intent == 'joke':
-                return self.joke_generator.get_joke()
-            
-            else:  # conversation
-                return self._handle_conversation(user_input)
-        
-        except Exception as e:
-            logger.error(f"Error handling intent '{intent}': {e}")
-            return "I encountered an error processing your request. Could you try rephrasing?"
+    def _register_handlers(self):
+        """Register the built-in intent handlers, then those of settings.HANDLER_MODULES"""
+        register = self.handlers.register
+        register('schedule', self._handle_schedule)
+        register('deadline', self._handle_deadline)
+        register('task', self._handle_task)
+        register('weather', self._handle_weather, cost='io', cacheable=True,
+                 fallback="The weather service is taking too long to respond. Please try again shortly.")
+        # Not cacheable: answers depend on `ans` and variables from earlier calculations
+        register('calculate', self._handle_calculate)
+        # Own pool: summaries that outlive their timeout keep running there, not in chat's
+        register('summarize', self._handle_summarize, cost='document',
+                 fallback="Summarizing this document is taking a while. Please ask again in a minute.")
+        register('youtube', self._handle_youtube)
+        register('joke', lambda entities, user_input: self.joke_generator.get_joke(), cacheable=True)
+        register('conversation', self._handle_conversation, cost='model',
+                 fallback="Sorry, I'm taking too long to think of a reply. Could you ask again?")
+        if settings.HANDLER_MODULES:
+            load_handler_modules(self.handlers, self)
+            # They may have added intent keywords, changing what memoized queries mean
+            self.intent_analyzer.memo.clear()
     
     def _handle_schedule(self, entities: dict, user_input: str) -> str:
         """Handle schedule-related queries"""
         if 'add' in user_input.lower():
             return "To add a class, please use format: 'Add class: [subject] on [day] at [time]'"
         
-        # Show schedule
-        day = entities.get('day')
-        if not day:
-            day = get_day_of_week()
+        # Show schedule for each day mentioned ("monday and tomorrow"), or today
+        days = [resolve_day(day) for day in entities.get('days', [])] or [get_day_of_week()]
+        days = list(dict.fromkeys(days))
         
-        schedule = self.schedule_manager.get_schedule(day)
+        with tracing.span("db.get_schedule"):
+            schedule = [entry for day in days for entry in self.schedule_manager.get_schedule(day)]
         if schedule:
             return self.schedule_manager.format_schedule(schedule)
         else:
-            return f"No classes scheduled for {day}."
+            return f"No classes scheduled for {' or '.join(days)}."
     
     def _handle_deadline(self, entities: dict, user_input: str) -> str:
         """Handle deadline-related queries"""
         if 'add' in user_input.lower():
             return "To add a deadline, use: 'Add deadline: [type] - [title] on [date]'"
         
-        # Show deadlines
-        deadline_type = entities.get('type')
-        deadlines = self.deadline_tracker.get_deadlines(deadline_type=deadline_type)
+        # Show deadlines, only of the types mentioned if any ("exams and fees")
+        deadline_types = entities.get('types')
+        with tracing.span("db.get_deadlines"):
+            deadlines = self.deadline_tracker.get_deadlines()
+        if deadline_types:
+            deadlines = [d for d in deadlines if d['type'].lower() in deadline_types]
         
         if deadlines:
             return self.deadline_tracker.format_deadlines(deadlines)
@@ -338,7 +472,8 @@ class LCPSAssistant:
         
         else:
             # Show tasks
-            tasks = self.task_manager.get_priority_tasks()
+            with tracing.span("db.get_tasks"):
+                tasks = self.task_manager.get_priority_tasks()
             if tasks:
                 return self.task_manager.format_tasks(tasks)
             else:
@@ -348,40 +483,62 @@ class LCPSAssistant:
         """Handle weather queries"""
         city = entities.get('city', 'London')  # Default city
         
-        weather_info = self.weather.get_weather(city)
+        with tracing.span("weather.api"):
+            weather_info = self.weather.get_weather(city)
         return self.weather.format_weather_response(weather_info)
     
     def _handle_calculate(self, entities: dict, user_input: str) -> str:
         """Handle calculation requests"""
         expression = entities.get('expression', user_input)
         
-        result = self.calculator.calculate(expression)
-        if result is not None:
-            return f"📊 Result: {result}"
-        else:
-            return "I couldn't calculate that. Please check your expression."
+        try:
+            # Number lists and grade tables first; anything else is an expression
+            with tracing.span("statistics"):
+                answer = self.statistics.answer(user_input)
+            if answer is not None:
+                return answer
+            with tracing.span("calculator"):
+                result = self.calculator.evaluate(expression, self._calculator_variables(entities.get('session')))
+        except CalculationError as e:
+            logger.warning(f"Calculation error for {expression!r}: {e}")
+            return f"I couldn't calculate that: {e}."
+        return f"📊 Result: {result}"
+    
+    def _calculator_variables(self, session_id: Optional[str]) -> dict:
+        """Calculator variables for a session; without one, the console's own or none"""
+        if session_id:
+            return self.calculator_sessions.variables(session_id)
+        return self.calculator.variables if self.local_session else {}
     
     def _handle_summarize(self, entities: dict, user_input: str) -> str:
         """Handle document summarization"""
-        if not self.summarizer:
+        with tracing.span("summarizer.load"):
+            summarizer = self.get_summarizer(entities.get('tier'))
+        if not summarizer:
             return "Summarization feature is unavailable at the moment."
         
-        # Extract file path from input
-        import re
-        match = re.search(r'summarize\s+(?:document|file)?:?\s*(.+)', user_input, re.IGNORECASE)
-        if match:
-            file_path = match.group(1).strip().strip('"\'')
+        file_path = self.extract_document_path(user_input)
+        if file_path:
             if os.path.exists(file_path):
-                return self.summarizer.summarize_document(file_path)
+                with tracing.span("summarizer.summarize"):
+                    return summarizer.summarize_document(file_path)
             else:
                 return f"File not found: {file_path}"
         else:
             return "Please specify a document path to summarize."
     
+    @staticmethod
+    def extract_document_path(user_input: str) -> Optional[str]:
+        """Extract the file path from a 'Summarize document: <path>' request"""
+        match = re.search(r'summarize\s+(?:document|file)?:?\s*(.+)', user_input, re.IGNORECASE)
+        if match:
+            return match.group(1).strip().strip('"\'')
+        return None
+    
     def _handle_youtube(self, entities: dict, user_input: str) -> str:
         """Handle YouTube operations"""
         query = entities.get('query')
-        headless = os.environ.get('LCPS_AI_HEADLESS', '0') in ['1', 'true', 'True']
+        headless = is_headless()
         
         if query:
             url = self.youtube.search_youtube(query)
@@ -394,9 +551,10 @@ class LCPSAssistant:
                 return f"🎥 YouTube link: {url}"
             return "🎥 Opening YouTube..."
     
-    def _handle_conversation(self, user_input: str) -> str:
+    def _handle_conversation(self, entities: dict, user_input: str) -> str:
         """Handle general conversation"""
-        response = self.ai_engine.generate_response(user_input)
+        with tracing.span("model.generate"):
+            response = self.ai_engine.generate_response(user_input)
         return response
     
     def run(self):
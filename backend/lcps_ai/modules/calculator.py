@@ -1,16 +1,367 @@
 """
 Calculator module for mathematical operations
+
+Expressions are parsed with the `ast` module and checked against an
+allowlist of nodes (numbers, arithmetic operators, a fixed set of math
+functions and constants, and variables). The checked tree is compiled into
+nested closures. Normalized and compiled expressions are kept in LRU
+caches, so a repeated expression is neither re-parsed nor re-validated.
+Nothing is ever passed to eval().
 """
+import ast
+import math
+import operator
 import re
-from typing import Optional
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Mapping, Optional, Union
 from utils.logger import logger
 
 
+Number = Union[int, float]
+
+# Longest expression accepted (after the words are replaced with symbols)
+MAX_EXPRESSION_LENGTH = 500
+# Most AST nodes in an expression. There are no loops or user functions, so
+# each node is evaluated at most once and this also bounds evaluation steps.
+MAX_NODES = 200
+# Largest magnitude of any operand or intermediate result
+MAX_MAGNITUDE = 1e100
+# Largest exponent accepted by ** (results are also bounded by MAX_MAGNITUDE)
+MAX_EXPONENT = 1000
+# Largest n accepted by factorial(n)
+MAX_FACTORIAL = 170
+# Largest number of digits accepted by round(x, ndigits), either way
+MAX_ROUND_DIGITS = 15
+# Normalized and compiled expressions kept in the LRU caches
+COMPILE_CACHE_SIZE = 256
+
+# Name the previous result is stored under
+LAST_RESULT = 'ans'
+# Sessions whose variables CalculatorSessions keeps (least recently used dropped first)
+MAX_SESSIONS = 1000
+
+
+class CalculationError(ValueError):
+    """An expression that cannot be evaluated (invalid, unsupported or out of bounds)"""
+
+
+def _factorial(n: Number) -> int:
+    if n != int(n) or not 0 <= n <= MAX_FACTORIAL:
+        raise CalculationError(f"factorial needs a whole number between 0 and {MAX_FACTORIAL}")
+    return math.factorial(int(n))
+
+
+def _log(x: Number, base: Number = math.e) -> float:
+    return math.log(x, base)
+
+
+def _round(x: Number, ndigits: Optional[Number] = None) -> Number:
+    # Python's round() takes time proportional to |ndigits| for large values
+    if ndigits is None:
+        return round(x)
+    if ndigits != int(ndigits) or abs(ndigits) > MAX_ROUND_DIGITS:
+        raise CalculationError(f"round needs a whole number of digits between {-MAX_ROUND_DIGITS} and {MAX_ROUND_DIGITS}")
+    return round(x, int(ndigits))
+
+
+# Every argument is already bounded by MAX_MAGNITUDE (integers of at most
+# 333 bits), so each function runs in constant time except where an
+# argument is a count (factorial's n, round's digits), which is capped too.
+FUNCTIONS: Dict[str, Callable] = {
+    'sqrt': math.sqrt,
+    'cbrt': lambda x: math.copysign(abs(x) ** (1 / 3), x),
+    'log': _log,
+    'ln': math.log,
+    'log10': math.log10,
+    'log2': math.log2,
+    'exp': math.exp,
+    'sin': math.sin,
+    'cos': math.cos,
+    'tan': math.tan,
+    'asin': math.asin,
+    'acos': math.acos,
+    'atan': math.atan,
+    'sinh': math.sinh,
+    'cosh': math.cosh,
+    'tanh': math.tanh,
+    'degrees': math.degrees,
+    'radians': math.radians,
+    'abs': abs,
+    'round': _round,
+    'floor': math.floor,
+    'ceil': math.ceil,
+    'factorial': _factorial,
+}
+
+CONSTANTS: Dict[str, float] = {
+    'pi': math.pi,
+    'e': math.e,
+    'tau': math.tau,
+}
+
+
+def _check(value: Number) -> Number:
+    """Reject results that are complex, infinite, NaN or too large"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise CalculationError("the result is not a real number")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise CalculationError("the result is not a finite number")
+    if abs(value) > MAX_MAGNITUDE:
+        raise CalculationError("the result is too large")
+    return value
+
+
+def _power(base: Number, exponent: Number) -> Number:
+    """** with the size of the result bounded before it is computed"""
+    if abs(exponent) > MAX_EXPONENT:
+        raise CalculationError(f"exponents are limited to {MAX_EXPONENT}")
+    if base != 0 and exponent * math.log10(abs(base)) > math.log10(MAX_MAGNITUDE):
+        raise CalculationError("the result is too large")
+    return base ** exponent
+
+
+def _divide(a: Number, b: Number) -> float:
+    if b == 0:
+        raise CalculationError("division by zero")
+    return a / b
+
+
+def _floor_divide(a: Number, b: Number) -> Number:
+    if b == 0:
+        raise CalculationError("division by zero")
+    return a // b
+
+
+def _modulo(a: Number, b: Number) -> Number:
+    if b == 0:
+        raise CalculationError("division by zero")
+    return a % b
+
+
+BINARY_OPERATORS: Dict[type, Callable[[Number, Number], Number]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: _divide,
+    ast.FloorDiv: _floor_divide,
+    ast.Mod: _modulo,
+    ast.Pow: _power,
+}
+
+UNARY_OPERATORS: Dict[type, Callable[[Number], Number]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+# Spoken forms, replaced in this order (longer phrases first)
+_WORD_REPLACEMENTS = [
+    (r'\bsquare root of\b', 'sqrt'),
+    (r'\bcube root of\b', 'cbrt'),
+    (r'\bto the power of\b', '**'),
+    (r'\braised to\b', '**'),
+    (r'\bmultiplied by\b', '*'),
+    (r'\bdivided by\b', '/'),
+    (r'\bplus\b', '+'),
+    (r'\bminus\b', '-'),
+    (r'\btimes\b', '*'),
+    (r'\bmultiply\b', '*'),
+    (r'\bdivide\b', '/'),
+    (r'\bpower\b', '**'),
+    (r'\bsquared\b', '**2'),
+    (r'\bcubed\b', '**3'),
+    (r'\bmod(?:ulo)?\b', '%'),
+    (r'\^', '**'),
+    (r'×', '*'),
+    (r'÷', '/'),
+]
+_WORD_PATTERNS = [(re.compile(pattern), symbol) for pattern, symbol in _WORD_REPLACEMENTS]
+
+_FILLER_PATTERN = re.compile(r"\b(?:what is|what's|calculate|compute|solve|evaluate)\b|^\s*let\b|[?!]+\s*$")
+_THOUSANDS_PATTERN = re.compile(r'(?<=\d),(?=\d{3}\b)')
+_NUMBER = r'(\d+(?:\.\d+)?|\.\d+)'
+_PERCENT_OF_PATTERN = re.compile(_NUMBER + r'\s*(?:%|percent)\s+of\b')
+# A percentage unless an operand follows (then % is modulo: "7 % 3", "10 % x")
+_PERCENT_PATTERN = re.compile(_NUMBER + r'\s*(?:%|percent)(?!\s*[\w(.])')
+# "sqrt 16" -> "sqrt(16)"
+_BARE_CALL_PATTERN = re.compile(r'\b(' + '|'.join(FUNCTIONS) + r')\s+' + _NUMBER)
+_ASSIGNMENT_PATTERN = re.compile(r'^\s*([a-z_]\w*)\s*=(?!=)\s*(.+)$')
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def normalize(expression: str) -> str:
+    """
+    Rewrite a spoken or typed expression as Python arithmetic
+    
+    Args:
+        expression: Expression such as "what is 15% of 200" or "2 to the power of 8"
+    
+    Returns:
+        Expression using only symbols, numbers, functions and names
+    """
+    expression = _FILLER_PATTERN.sub('', expression.lower()).strip()
+    expression = _THOUSANDS_PATTERN.sub('', expression)
+    # Words first, so an operator word after a percentage ("50% times 4")
+    # is already a symbol when percentages are told apart from modulo
+    for pattern, symbol in _WORD_PATTERNS:
+        expression = pattern.sub(symbol, expression)
+    expression = _PERCENT_OF_PATTERN.sub(r'(\1/100)*', expression)
+    expression = _PERCENT_PATTERN.sub(r'(\1/100)', expression)
+    expression = _BARE_CALL_PATTERN.sub(r'\1(\2)', expression)
+    return expression.strip()
+
+
+def _build(node: ast.AST) -> Callable[[Mapping[str, Number]], Number]:
+    """Compile an allowlisted AST node into a closure over the variable mapping"""
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise CalculationError(f"unsupported value {node.value!r}")
+        value = _check(node.value)
+        return lambda variables: value
+    
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in CONSTANTS:
+            constant = CONSTANTS[name]
+            return lambda variables: constant
+        
+        def load(variables: Mapping[str, Number]) -> Number:
+            try:
+                return variables[name]
+            except KeyError:
+                raise CalculationError(f"unknown variable '{name}'") from None
+        return load
+    
+    if isinstance(node, ast.BinOp):
+        binary = BINARY_OPERATORS.get(type(node.op))
+        if binary is None:
+            raise CalculationError(f"unsupported operator {type(node.op).__name__}")
+        left, right = _build(node.left), _build(node.right)
+        return lambda variables: _check(binary(left(variables), right(variables)))
+    
+    if isinstance(node, ast.UnaryOp):
+        unary = UNARY_OPERATORS.get(type(node.op))
+        if unary is None:
+            raise CalculationError(f"unsupported operator {type(node.op).__name__}")
+        operand = _build(node.operand)
+        return lambda variables: unary(operand(variables))
+    
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            raise CalculationError(f"unknown function '{ast.unparse(node.func)}'")
+        if node.keywords:
+            raise CalculationError("keyword arguments are not supported")
+        name, function = node.func.id, FUNCTIONS[node.func.id]
+        arguments = [_build(argument) for argument in node.args]
+        
+        def call(variables: Mapping[str, Number]) -> Number:
+            values = [argument(variables) for argument in arguments]
+            try:
+                return _check(function(*values))
+            except CalculationError:
+                raise
+            except (ValueError, TypeError, OverflowError) as e:
+                raise CalculationError(f"{name}: {e}") from None
+        return call
+    
+    raise CalculationError(f"unsupported syntax ({type(node).__name__})")
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def compile_expression(expression: str) -> Callable[[Mapping[str, Number]], Number]:
+    """
+    Parse, validate and compile a normalized expression (cached)
+    
+    Args:
+        expression: Output of normalize()
+    
+    Returns:
+        Function evaluating the expression against a variable mapping
+    
+    Raises:
+        CalculationError: If the expression is invalid, unsupported or too large
+    """
+    if not expression:
+        raise CalculationError("empty expression")
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise CalculationError(f"expressions are limited to {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError:
+        raise CalculationError("invalid expression") from None
+    
+    if sum(1 for _ in ast.walk(tree.body)) > MAX_NODES:
+        raise CalculationError(f"expressions are limited to {MAX_NODES} terms")
+    return _build(tree.body)
+
+
+class CalculatorSessions:
+    """Calculator variables kept separately for each session (e.g. HTTP user)"""
+    
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._sessions: 'OrderedDict[str, Dict[str, Number]]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def variables(self, session_id: str) -> Dict[str, Number]:
+        """The variables of a session, created empty on first use"""
+        with self._lock:
+            variables = self._sessions.get(session_id)
+            if variables is None:
+                variables = self._sessions[session_id] = {}
+                if len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            return variables
+
+
 class Calculator:
     """Perform mathematical calculations"""
     
-    @staticmethod
-    def calculate(expression: str) -> Optional[float]:
+    def __init__(self):
+        # Variables set with "x = ..." plus the previous result under LAST_RESULT
+        self.variables: Dict[str, Number] = {}
+    
+    def evaluate(self, expression: str, variables: Optional[Dict[str, Number]] = None) -> float:
+        """
+        Evaluate an expression, or assign it with "name = expression"
+        
+        Args:
+            expression: Expression such as "15% of 200", "sqrt(2) * ans" or "rate = 0.07"
+            variables: Variables to read and update (e.g. one session's, from
+                       CalculatorSessions); defaults to this calculator's own
+        
+        Returns:
+            Result as float (also stored as `ans`, and under the name when assigning)
+        
+        Raises:
+            CalculationError: If the expression cannot be evaluated
+        """
+        expression = normalize(expression)
+        target = None
+        assignment = _ASSIGNMENT_PATTERN.match(expression)
+        if assignment:
+            target, expression = assignment.groups()
+            if target in FUNCTIONS or target in CONSTANTS:
+                raise CalculationError(f"'{target}' is a built-in name")
+        
+        if variables is None:
+            variables = self.variables
+        try:
+            result = float(compile_expression(expression)(variables))
+        except (ArithmeticError, ValueError) as e:
+            if isinstance(e, CalculationError):
+                raise
+            raise CalculationError(str(e)) from None
+        
+        variables[LAST_RESULT] = result
+        if target:
+            variables[target] = result
+        return result
+    
+    def calculate(self, expression: str) -> Optional[float]:
         """
         Evaluate a mathematical expression
         
@@ -21,42 +372,9 @@ class Calculator:
             Result as float or None if invalid
         """
         try:
-            # Clean the expression
-            expression = expression.lower().strip()
-            
-            # Remove common words
-            expression = re.sub(r'\b(what is|calculate|compute|solve)\b', '', expression, flags=re.IGNORECASE)
-            
-            # Replace common operations
-            replacements = {
-                'plus': '+',
-                'minus': '-',
-                'times': '*',
-                'multiply': '*',
-                'multiplied by': '*',
-                'divided by': '/',
-                'divide': '/',
-                'power': '**',
-                'squared': '**2',
-                'cubed': '**3'
-            }
-            
-            for word, symbol in replacements.items():
-                expression = expression.replace(word, symbol)
-            
-            # Remove extra spaces
-            expression = re.sub(r'\s+', '', expression)
-            
-            # Validate expression (only allow safe characters)
-            if not re.match(r'^[\d\+\-\*/\(\)\.\s\*]+$', expression):
-                return None
-            
-            # Evaluate safely
-            result = eval(expression)
-            return float(result)
-            
-        except Exception as e:
-            logger.error(f"Calculation error: {e}")
+            return self.evaluate(expression)
+        except CalculationError as e:
+            logger.warning(f"Calculation error for {expression!r}: {e}")
             return None
     
     @staticmethod
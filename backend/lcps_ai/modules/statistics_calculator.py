@@ -0,0 +1,499 @@
+"""
+Statistics and grade calculations for the calculate intent
+
+Reads number lists ("average of 78, 91, 85") and weighted grade tables
+("homework 92 (20%), midterm 78 (30%), final is 50%") from the query, or
+from a CSV file in settings.STATISTICS_CSV_DIR named in it, and answers
+with NumPy:
+
+- count, sum, mean, median, standard deviation, variance, min/max/range
+  and percentiles of a list
+- weighted averages of a grade table
+- the score still needed on the final (or the remaining work) to reach a
+  letter grade or percentage
+
+Long lists are cut out of the text in one linear scan and converted by
+NumPy, so the word patterns only ever run over the short prose around them
+(a 100,000-number query is answered in tens of milliseconds). All order
+statistics (median, percentiles, min, max) come from a single sort: with
+NumPy's vectorized sort that is faster in practice than np.partition
+selection, even for millions of values.
+"""
+import csv
+import math
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import config.settings as settings
+from modules.calculator import CalculationError
+from utils.logger import logger
+
+
+# Runs of at least this many number/separator characters take the fast path
+LONG_LIST_CHARS = 1000
+# Largest CSV file read for a statistics request
+MAX_CSV_BYTES = 10 * 1024 * 1024
+# Percentiles reported for "percentiles" without a number
+DEFAULT_PERCENTILES = (25, 50, 75)
+
+_NUMBER_TEXT = r'[-+]?(?:\d+(?:\.\d+)?|\.\d+)'
+# A standalone number: not part of a word ("90th", "cs101") or a path
+_NUMBER_PATTERN = re.compile(r'(?<![\w./\\])' + _NUMBER_TEXT + r'(?![\w/\\]|\.\d)')
+_NUMBER_RUN_PATTERN = re.compile(r'[-+\d.,;\s]{%d,}' % LONG_LIST_CHARS)
+
+# Operation -> words that ask for it (checked in this order)
+_OPERATIONS = {
+    'std': r'standard deviation|std\.? ?dev|stdev|\bstd\b|\bsd\b|spread',
+    'variance': r'\bvariance\b',
+    'median': r'\bmedian\b|\bmiddle value\b',
+    'mean': r'\baverage\b|\bmean\b|\bavg\b',
+    'min': r'\bmin(?:imum)?\b|\blowest\b|\bsmallest\b',
+    'max': r'\bmax(?:imum)?\b|\bhighest\b|\blargest\b',
+    'range': r'\brange\b',
+    'sum': r'\bsum\b|\btotal\b',
+    'count': r'\bcount\b|\bhow many\b',
+    'percentile': r'\bpercentiles?\b|\bquartiles?\b',
+    'summary': r'\bstats\b|\bstatistics\b|\bsummar(?:y|ize)\b|\bdescribe\b',
+}
+_OPERATION_PATTERNS = {name: re.compile(pattern) for name, pattern in _OPERATIONS.items()}
+_PERCENTILE_PATTERN = re.compile(r'\b(\d{1,2}(?:\.\d+)?|100)(?:st|nd|rd|th)\s+percentile')
+_POPULATION_PATTERN = re.compile(r'\bpopulation\b')
+
+_CSV_PATH_PATTERN = re.compile(r'"([^"]+\.csv)"|\'([^\']+\.csv)\'|(\S+\.csv)\b', re.IGNORECASE)
+
+# Grade requests
+_TARGET_PATTERN = re.compile(
+    r'\b(?:to|for)\s+(?:get|getting|earn|earning|end up with|finish with|keep|have|pass with)\s+'
+    r'(?:an?\s+)?(?:(?P<letter>[a-f][+-]?)(?![\w+-])|(?P<percent>\d+(?:\.\d+)?)\s*%?)'
+)
+_WEIGHT_PATTERN = re.compile(
+    r'\(\s*(?:worth\s+|weight\s+)?(' + _NUMBER_TEXT + r')\s*%\s*\)'
+    r'|(?:\bworth|\bweight(?:ed)?(?:\s+at)?|\bweighs|\bcounts?\s+(?:for|as)|@)\s*(' + _NUMBER_TEXT + r')\s*%?'
+)
+_SEGMENT_PATTERN = re.compile(r'[,;\n]|\band\b|\.(?!\d)')
+_FINAL_PATTERN = re.compile(r'\bfinal\b')
+_WEIGHTS_LIST_PATTERN = re.compile(r'\bweights?\b\s*(?:of|are|is|=|:)?')
+# Arithmetic, which the expression evaluator answers instead ("total of 5 * 3")
+_EXPRESSION_PATTERN = re.compile(r'[*/^]|\d\s*[+-]\s*\d|\b(?:plus|minus|times|divided|multiplied|squared)\b')
+
+
+def parse_numbers(text: str):
+    """
+    Every standalone number in the text, as a float array
+    
+    Commas separate values ("78, 91, 85"); they are not thousands separators.
+    """
+    import numpy as np
+    return np.array(_NUMBER_PATTERN.findall(text), dtype=np.float64)
+
+
+def _split_long_lists(text: str):
+    """
+    Cut long number lists out of the text
+    
+    Returns:
+        (prose, values): the text with the lists replaced by a space, and
+        the listed numbers as a float array
+    """
+    import numpy as np
+    
+    runs = []
+    for match in _NUMBER_RUN_PATTERN.finditer(text):
+        run = match.group()
+        try:
+            # str.split and NumPy's float parser are both linear and in C
+            runs.append(np.array(run.replace(',', ' ').replace(';', ' ').split(), dtype=np.float64))
+        except ValueError:
+            runs.append(parse_numbers(run))  # Stray "-" or "." tokens
+    if not runs:
+        return text, np.empty(0)
+    return _NUMBER_RUN_PATTERN.sub(' ', text), np.concatenate(runs)
+
+
+def _format(value: float) -> str:
+    if not math.isfinite(value):
+        return str(value)
+    return f"{value:,.2f}".rstrip('0').rstrip('.')
+
+
+def _ordinal(value: float) -> str:
+    number = _format(value)
+    if not number.isdigit():
+        return f"{number}th"
+    suffix = 'th' if 10 <= int(number) % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(int(number) % 10, 'th')
+    return f"{number}{suffix}"
+
+
+class StatisticsCalculator:
+    """Statistics of number lists and weighted grade calculations"""
+    
+    def __init__(self, grade_scale: Dict[str, float] = None):
+        """
+        Args:
+            grade_scale: Minimum percentage per letter grade (default: settings.GRADE_SCALE)
+        """
+        self.grade_scale = grade_scale or settings.GRADE_SCALE
+    
+    @staticmethod
+    def percentiles(ordered, percentiles: Sequence[float]):
+        """
+        Percentiles of sorted values, interpolated like np.percentile's default
+        
+        Args:
+            ordered: Sorted 1-D float array
+            percentiles: Percentiles between 0 and 100
+        
+        Returns:
+            Array with one value per requested percentile
+        """
+        import numpy as np
+        
+        ranks = np.asarray(percentiles, dtype=np.float64) / 100 * (len(ordered) - 1)
+        lower = np.floor(ranks).astype(np.intp)
+        upper = np.ceil(ranks).astype(np.intp)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (ranks - lower)
+    
+    def describe(self, values, percentiles: Sequence[float] = (), population: bool = False) -> Dict:
+        """
+        Summary statistics of a list of numbers
+        
+        Args:
+            values: Numbers (any sequence or array)
+            percentiles: Extra percentiles to compute
+            population: Population instead of sample standard deviation/variance
+        
+        Returns:
+            Dictionary with count, sum, mean, median, std, variance, min, max,
+            range and percentiles ({percentile: value})
+        """
+        import numpy as np
+        
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not len(values):
+            raise CalculationError("there are no numbers to work with")
+        if not np.isfinite(values).all():
+            raise CalculationError("the list contains values that are not finite numbers")
+        
+        requested = [float(p) for p in percentiles]
+        if any(not 0 <= p <= 100 for p in requested):
+            raise CalculationError("percentiles must be between 0 and 100")
+        ordered = np.sort(values)
+        order = self.percentiles(ordered, [50.0] + requested)
+        
+        ddof = 0 if population or len(values) == 1 else 1
+        variance = float(np.var(values, ddof=ddof))
+        minimum, maximum = float(ordered[0]), float(ordered[-1])
+        return {
+            'count': len(values),
+            'sum': float(values.sum()),
+            'mean': float(values.mean()),
+            'median': float(order[0]),
+            'std': math.sqrt(variance),
+            'variance': variance,
+            'min': minimum,
+            'max': maximum,
+            'range': maximum - minimum,
+            'percentiles': dict(zip(requested, (float(v) for v in order[1:]))),
+            'population': ddof == 0,
+        }
+    
+    @staticmethod
+    def weighted_average(scores: Sequence[float], weights: Sequence[float]) -> float:
+        """
+        Weighted average of scores
+        
+        Args:
+            scores: Scores (e.g. percentages)
+            weights: Weight of each score (any scale; they are normalized)
+        
+        Returns:
+            Weighted average
+        """
+        import numpy as np
+        
+        scores = np.asarray(scores, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+        if scores.shape != weights.shape or not len(scores):
+            raise CalculationError("every score needs exactly one weight")
+        if (weights < 0).any() or weights.sum() <= 0:
+            raise CalculationError("weights must be positive")
+        return float(np.dot(scores, weights) / weights.sum())
+    
+    def target_percentage(self, target: str) -> float:
+        """Minimum percentage for a letter grade ("B", "a-") or a number ("85")"""
+        letter = target.strip().upper()
+        if letter in self.grade_scale:
+            return float(self.grade_scale[letter])
+        try:
+            return float(letter.rstrip('%'))
+        except ValueError:
+            raise CalculationError(f"I don't know the grade '{target}'") from None
+    
+    @staticmethod
+    def required_score(scores: Sequence[float], weights: Sequence[float],
+                       remaining_weight: float, target: float) -> float:
+        """
+        Average score needed on the remaining work to finish at the target
+        
+        Args:
+            scores: Scores so far
+            weights: Weights of the scores so far
+            remaining_weight: Weight of the remaining work (e.g. the final)
+            target: Target overall percentage
+        
+        Returns:
+            Required average on the remaining work (may be below 0 or above 100)
+        """
+        import numpy as np
+        
+        if remaining_weight <= 0:
+            raise CalculationError("the remaining work must have a positive weight")
+        scores = np.asarray(scores, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+        total_weight = weights.sum() + remaining_weight
+        return float((target * total_weight - np.dot(scores, weights)) / remaining_weight)
+    
+    def answer(self, text: str) -> Optional[str]:
+        """
+        Answer a statistics or grade request
+        
+        Args:
+            text: User query
+        
+        Returns:
+            Formatted answer, or None if the text is not a statistics or
+            grade request (so it can be evaluated as an expression instead)
+        
+        Raises:
+            CalculationError: If it is such a request but cannot be answered
+        """
+        import numpy as np
+        
+        # Lists hold no letters, so they can be cut out before lower-casing
+        prose, listed = _split_long_lists(text)
+        csv_path = self._csv_path(prose)
+        prose = prose.lower()
+        if csv_path:
+            return self._answer_csv(csv_path, prose)
+        
+        grade = self._answer_grades(prose)
+        if grade is not None:
+            return grade
+        
+        operations = [name for name, pattern in _OPERATION_PATTERNS.items() if pattern.search(prose)]
+        if not operations or _EXPRESSION_PATTERN.search(prose):
+            return None
+        # Ordinals of the percentiles asked for are not data
+        percentiles = [float(p) for p in _PERCENTILE_PATTERN.findall(prose)]
+        values = np.concatenate([parse_numbers(_PERCENTILE_PATTERN.sub(' ', prose)), listed])
+        if len(values) < 2 and operations != ['count']:
+            return None
+        if 'percentile' in operations and not percentiles:
+            percentiles = list(DEFAULT_PERCENTILES)
+        return self._format_statistics(
+            self.describe(values, percentiles, population=bool(_POPULATION_PATTERN.search(prose))),
+            operations
+        )
+    
+    def _format_statistics(self, stats: Dict, operations: List[str], label: str = None) -> str:
+        count = stats['count']
+        heading = f"📊 {label}: " if label else ""
+        if 'summary' in operations or len(operations) > 3:
+            operations = ['mean', 'median', 'std', 'min', 'max']
+        
+        kind = 'population' if stats['population'] else 'sample'
+        parts = []
+        for operation in operations:
+            if operation == 'percentile':
+                parts += [f"{_ordinal(p)} percentile {_format(v)}" for p, v in stats['percentiles'].items()]
+            elif operation == 'std':
+                parts.append(f"standard deviation {_format(stats['std'])} ({kind})")
+            elif operation == 'variance':
+                parts.append(f"variance {_format(stats['variance'])} ({kind})")
+            elif operation == 'count':
+                parts.append(f"count {count}")
+            elif operation != 'summary':
+                parts.append(f"{operation} {_format(stats[operation])}")
+        return f"{heading or '📊 '}{', '.join(parts)} ({count} value{'s' if count != 1 else ''})"
+    
+    def _answer_grades(self, text: str) -> Optional[str]:
+        """Weighted average, or the score needed to reach a target grade"""
+        target_match = _TARGET_PATTERN.search(text)
+        body = _TARGET_PATTERN.sub(' ', text) if target_match else text
+        
+        graded, pending = self._parse_grade_table(body)
+        if not graded and not pending:
+            graded = self._parse_weight_lists(body)
+        if target_match is None:
+            if not graded:
+                return None
+            scores, weights = zip(*graded)
+            average = self.weighted_average(scores, weights)
+            return (f"🎓 Weighted average: {_format(average)}% "
+                    f"(over {_format(sum(weights))}% of the course)")
+        
+        target = self.target_percentage(target_match.group('letter') or target_match.group('percent'))
+        wanted = (target_match.group('letter') or '').upper() or f"{_format(target)}%"
+        if not graded:
+            raise CalculationError(
+                "list your grades with their weights, e.g. 'homework 92 (20%), midterm 78 (30%), final is 50%'")
+        scores, weights = zip(*graded)
+        
+        if pending:
+            remaining_weight = sum(weight for _, weight in pending)
+            remaining = "the final" if len(pending) == 1 and pending[0][0] else "the remaining work"
+        elif sum(weights) < 100:
+            remaining_weight = 100 - sum(weights)
+            remaining = "the final" if _FINAL_PATTERN.search(text) else "the remaining work"
+        else:
+            raise CalculationError("tell me how much the final is worth, e.g. 'final is 40%'")
+        
+        current = self.weighted_average(scores, weights)
+        needed = self.required_score(scores, weights, remaining_weight, target)
+        best = self.weighted_average(list(scores) + [100], list(weights) + [remaining_weight])
+        reply = f"🎓 You have {_format(current)}% over {_format(sum(weights))}% of the course. "
+        if target_match.group('letter'):
+            target_text = f"{'an' if wanted[0] in 'AF' else 'a'} {wanted} ({_format(target)}%)"
+        else:
+            target_text = wanted
+        if needed <= 0:
+            return reply + f"You'll finish with at least {target_text} even with 0% on {remaining}."
+        if needed > 100:
+            return reply + (f"Reaching {target_text} would take {_format(needed)}% on {remaining} "
+                            f"(worth {_format(remaining_weight)}%), so the most you can reach is {_format(best)}%.")
+        return reply + (f"To get {target_text} you need {_format(needed)}% on {remaining} "
+                        f"(worth {_format(remaining_weight)}%).")
+    
+    @staticmethod
+    def _parse_grade_table(text: str) -> Tuple[List[Tuple[float, float]], List[Tuple[bool, float]]]:
+        """
+        Grade entries, one per comma/semicolon/"and"-separated segment
+        
+        Returns:
+            (score, weight) pairs, and (is_final, weight) for weighted
+            entries without a score yet ("final (40%)", "the final is 40%")
+        """
+        graded, pending = [], []
+        for segment in _SEGMENT_PATTERN.split(text):
+            weight_match = _WEIGHT_PATTERN.search(segment)
+            is_final = bool(_FINAL_PATTERN.search(segment))
+            if weight_match:
+                weight = float(weight_match.group(1) or weight_match.group(2))
+                rest = segment[:weight_match.start()] + ' ' + segment[weight_match.end():]
+            elif is_final and segment.count('%') == 1:
+                # "the final is 40%": its only number is the weight
+                numbers = _NUMBER_PATTERN.findall(segment)
+                if len(numbers) != 1:
+                    continue
+                pending.append((True, float(numbers[0])))
+                continue
+            else:
+                continue
+            
+            scores = _NUMBER_PATTERN.findall(rest)
+            if not scores:
+                pending.append((is_final, weight))
+            elif len(scores) == 1:
+                graded.append((float(scores[0]), weight))
+            else:
+                # "42/50 (10%)" style scores are not supported; skip rather than guess
+                logger.info(f"Ignoring ambiguous grade entry: {segment.strip()!r}")
+        return graded, pending
+    
+    @staticmethod
+    def _parse_weight_lists(text: str) -> List[Tuple[float, float]]:
+        """'90, 85, 70 with weights 30, 50, 20' style tables"""
+        match = _WEIGHTS_LIST_PATTERN.search(text)
+        if not match:
+            return []
+        scores = parse_numbers(text[:match.start()])
+        weights = parse_numbers(text[match.end():])
+        if len(scores) != len(weights) or not len(scores):
+            raise CalculationError(
+                f"found {len(scores)} scores but {len(weights)} weights; give one weight per score")
+        return list(zip(scores.tolist(), weights.tolist()))
+    
+    @staticmethod
+    def _csv_path(text: str) -> Optional[str]:
+        match = _CSV_PATH_PATTERN.search(text)
+        if not match:
+            return None
+        return next(group for group in match.groups() if group)
+    
+    def _answer_csv(self, path: str, text: str) -> str:
+        """Statistics of each numeric column, or the weighted average of a grade table"""
+        import numpy as np
+        
+        header, columns = self.read_csv(path)
+        weight_column = next((i for i, name in enumerate(header) if re.search(r'weight|percent|%', name)), None)
+        score_column = next((i for i, name in enumerate(header)
+                             if i != weight_column and re.search(r'score|grade|mark|points|result', name)), None)
+        if weight_column is not None and score_column is not None:
+            pairs = [(score, weight) for score, weight in zip(columns[score_column], columns[weight_column])
+                     if score is not None and weight is not None]
+            if pairs:
+                scores, weights = zip(*pairs)
+                return (f"🎓 Weighted average of {len(pairs)} graded items in {Path(path).name}: "
+                        f"{_format(self.weighted_average(scores, weights))}%")
+        
+        operations = [name for name, pattern in _OPERATION_PATTERNS.items() if pattern.search(text)] or ['summary']
+        percentiles = [float(p) for p in _PERCENTILE_PATTERN.findall(text)]
+        if 'percentile' in operations and not percentiles:
+            percentiles = list(DEFAULT_PERCENTILES)
+        numeric = [(name, np.array([v for v in column if v is not None], dtype=np.float64))
+                   for name, column in zip(header, columns) if any(v is not None for v in column)]
+        # Only the columns named in the query, if any are
+        named = [(name, values) for name, values in numeric if name and name in text]
+        if not numeric:
+            raise CalculationError(f"{Path(path).name} has no numeric columns")
+        return "\n".join(
+            self._format_statistics(self.describe(values, percentiles, population=bool(_POPULATION_PATTERN.search(text))),
+                                    operations, label=name or f"column {i + 1}")
+            for i, (name, values) in enumerate(named or numeric)
+        )
+    
+    @staticmethod
+    def read_csv(path: str, data_dir: Optional[Path] = None) -> Tuple[List[str], List[List[Optional[float]]]]:
+        """
+        Read a CSV file column by column
+        
+        Args:
+            path: CSV file path, relative to the data directory or inside it
+            data_dir: Directory the file must be in (default: settings.STATISTICS_CSV_DIR)
+        
+        Returns:
+            (header, columns): lower-cased column names ('' without a header
+            row) and each column's values as floats (None where not numeric)
+        
+        Raises:
+            CalculationError: If the file is outside the data directory,
+                              missing, too large or empty
+        """
+        # Queries come from any user of the service, so they may only name
+        # files in the data directory (symlinks and '..' are resolved first)
+        data_dir = Path(data_dir or settings.STATISTICS_CSV_DIR).resolve()
+        file = (data_dir / path).resolve()
+        if not file.is_relative_to(data_dir) or file.suffix.lower() != '.csv':
+            raise CalculationError(f"I can only read CSV files in the data folder, not {path}")
+        if not file.is_file():
+            raise CalculationError(f"I couldn't find {path}")
+        if file.stat().st_size > MAX_CSV_BYTES:
+            raise CalculationError(f"{file.name} is larger than {MAX_CSV_BYTES // (1024 * 1024)} MB")
+        
+        with open(file, newline='', encoding='utf-8-sig') as handle:
+            rows = [row for row in csv.reader(handle) if any(cell.strip() for cell in row)]
+        if not rows:
+            raise CalculationError(f"{file.name} is empty")
+        
+        def number(cell: str) -> Optional[float]:
+            try:
+                return float(cell.strip().rstrip('%'))
+            except ValueError:
+                return None
+        
+        width = max(len(row) for row in rows)
+        has_header = all(number(cell) is None for cell in rows[0] if cell.strip())
+        header = [cell.strip().lower() for cell in rows[0]] + [''] * (width - len(rows[0])) if has_header else [''] * width
+        data = rows[1:] if has_header else rows
+        columns = [[number(row[i]) if i < len(row) else None for row in data] for i in range(width)]
+        return header, columns
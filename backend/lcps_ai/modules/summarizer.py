@@ -1,182 +1,674 @@
 """
 Document Summarizer using BART model
 """
+import os
+import re
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+import torch
 from transformers import pipeline
 import config.settings as settings
 from utils.logger import logger
 from utils.document_parser import DocumentParser
+from utils import model_bundle
+from storage import DocumentCache
+
+# Sentence ends (kept with the sentence) and paragraph breaks
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n{2,}')
+
+# Reply for text too short to summarize. It is a message, not a summary of
+# the document, so it is never stored in the summary cache.
+TOO_SHORT_SUMMARY = "Text is too short to summarize effectively."
+
+# Pipeline used inside a pool worker process
+_worker_pipeline = None
+
+
+def _build_pipeline(model_name: str, device: int):
+    """Create a summarization pipeline (from the offline bundle when present)"""
+    source, location = model_bundle.locate(model_name)
+    return pipeline(
+        "summarization",
+        model=source,
+        device=device,
+        model_kwargs={**location, "low_cpu_mem_usage": True}
+    )
+
+
+def _run_pipeline(summarizer, texts: List[str], max_length: int, min_length: int, batch_size: int) -> List[str]:
+    """Summarize several texts with one batched pipeline call"""
+    outputs = summarizer(
+        texts,
+        max_length=max_length,
+        min_length=min(min_length, max_length - 1),
+        do_sample=False,
+        truncation=True,
+        batch_size=batch_size
+    )
+    return [output['summary_text'] for output in outputs]
+
+
+def _textrank(embeddings: np.ndarray, damping: float = 0.85, max_iter: int = 100, tol: float = 1e-6) -> np.ndarray:
+    """
+    Score sentences by TextRank centrality
+    
+    Args:
+        embeddings: Unit-normalized sentence embeddings, one row per sentence
+        damping: PageRank damping factor
+        max_iter: Maximum power iterations
+        tol: L1 convergence tolerance
+    
+    Returns:
+        Score per sentence (sums to 1)
+    """
+    n = len(embeddings)
+    if n == 1:
+        return np.ones(1, dtype=np.float32)
+    
+    # Cosine similarity graph without self-loops or negative edges
+    similarity = np.clip(embeddings @ embeddings.T, 0.0, None)
+    np.fill_diagonal(similarity, 0.0)
+    
+    # Row-normalize into a transition matrix; isolated sentences jump uniformly
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, row_sums, out=np.full_like(similarity, 1.0 / n), where=row_sums > 0)
+    
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(max_iter):
+        updated = (1.0 - damping) / n + damping * (transition.T @ scores)
+        converged = np.abs(updated - scores).sum() < tol
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def _init_worker(model_name: str, num_threads: int):
+    """Pool initializer: load the model once per worker process"""
+    global _worker_pipeline
+    torch.set_num_threads(num_threads)
+    _worker_pipeline = _build_pipeline(model_name, device=-1)
+
+
+def _summarize_in_worker(texts: List[str], max_length: int, min_length: int, batch_size: int) -> List[str]:
+    """Summarize a batch of chunks inside a pool worker"""
+    return _run_pipeline(_worker_pipeline, texts, max_length, min_length, batch_size)
 
 
 class Summarizer:
     """Document summarization using BART"""
     
-    def __init__(self):
+    def __init__(self, tier: str = None, encoder=None):
+        """
+        Args:
+            tier: Quality/latency tier from settings.SUMMARIZATION_TIERS
+                  (defaults to the interactive tier)
+            encoder: Optional SentenceTransformer to share for TextRank
+                     (loaded on first use otherwise)
+        """
+        self.tier = tier or settings.SUMMARIZATION_INTERACTIVE_TIER
+        if self.tier not in settings.SUMMARIZATION_TIERS:
+            raise ValueError(f"Unknown summarization tier: {self.tier}")
+        
         self.summarizer = None
+        self.tokenizer = None
+        self.model_name = settings.SUMMARIZATION_TIERS[self.tier]
+        self.device = 0 if torch.cuda.is_available() else -1
+        self.max_input_tokens = settings.SUMMARIZATION_MAX_INPUT_TOKENS
+        self.batch_size = settings.SUMMARIZATION_BATCH_SIZE
+        self.workers = settings.SUMMARIZATION_WORKERS or os.cpu_count() or 1
+        self._pool = None
+        self.document_cache = DocumentCache()
+        self.encoder = encoder
+        self.prefilter = settings.SUMMARIZATION_EXTRACTIVE_PREFILTER
         logger.info("Initializing summarizer...")
         self._load_model()
     
     def _load_model(self):
         """Load BART summarization model"""
         try:
-            logger.info(f"Loading summarization model: {settings.SUMMARIZATION_MODEL}")
-            self.summarizer = pipeline(
-                "summarization",
-                model=settings.SUMMARIZATION_MODEL,
-                device=0 if settings.CONVERSATIONAL_MODEL else -1,  # Use GPU if available
-                model_kwargs={"cache_dir": str(settings.MODELS_DIR)}
-            )
+            logger.info(f"Loading summarization model ({self.tier}): {self.model_name}")
+            self.summarizer = _build_pipeline(self.model_name, device=self.device)
+            self.tokenizer = self.summarizer.tokenizer
+            
+            # Leave room for the special tokens the pipeline adds around each input
+            model_limit = min(self.tokenizer.model_max_length, settings.SUMMARIZATION_MAX_INPUT_TOKENS)
+            self.max_input_tokens = model_limit - self.tokenizer.num_special_tokens_to_add()
             logger.info("Summarization model loaded successfully!")
         except Exception as e:
             logger.error(f"Error loading summarization model: {e}")
             raise
     
-    def summarize_text(self, text: str, max_length: int = 150, min_length: int = 50) -> str:
+    def summarize_text(self, text: str, max_length: int = 150, min_length: int = 50,
+                       progress_callback: Optional[Callable[[str, int, int], None]] = None) -> str:
         """
         Summarize text
         
+        Long texts are summarized map-reduce style: every chunk is summarized
+        (across a process pool when there are many), then the summaries are
+        grouped into model-sized inputs and summarized again, level by level,
+        until a single input remains for the final pass.
+        
         Args:
             text: Text to summarize
             max_length: Maximum length of summary
             min_length: Minimum length of summary
+            progress_callback: Optional callable(stage, done, total) called as chunks finish
         
         Returns:
             Summarized text
         """
         try:
-            if not text or len(text.strip()) < 100:
-                return "Text is too short to summarize effectively."
-            
-            # BART has a max input length of 1024 tokens
-            # Split text into chunks if necessary
-            max_input_length = 1024
-            if len(text.split()) > max_input_length:
-                # Summarize in chunks
-                chunks = self._chunk_text(text, max_input_length)
-                summaries = []
-                
-                for chunk in chunks:
-                    summary = self.summarizer(
-                        chunk,
-                        max_length=max_length // len(chunks) + 50,
-                        min_length=min_length // len(chunks),
-                        do_sample=False
-                    )[0]['summary_text']
-                    summaries.append(summary)
-                
-                # If multiple chunks, summarize the summaries
-                if len(summaries) > 1:
-                    combined = " ".join(summaries)
-                    if len(combined.split()) > max_input_length // 2:
-                        final_summary = self.summarizer(
-                            combined,
-                            max_length=max_length,
-                            min_length=min_length,
-                            do_sample=False
-                        )[0]['summary_text']
-                        return final_summary
-                
-                return " ".join(summaries)
-            else:
-                # Summarize directly
-                summary = self.summarizer(
-                    text,
-                    max_length=max_length,
-                    min_length=min_length,
-                    do_sample=False
-                )[0]['summary_text']
-                return summary
-            
+            return self._summarize(text, max_length, min_length, progress_callback)
         except Exception as e:
             logger.error(f"Error summarizing text: {e}")
             return "Failed to generate summary. The text might be too complex or short."
     
-    def summarize_document(self, file_path: str, max_length: int = 150, min_length: int = 50) -> str:
+    def _summarize(self, text: str, max_length: int, min_length: int,
+                   progress_callback: Optional[Callable[[str, int, int], None]] = None) -> str:
+        """Map-reduce summarization behind summarize_text (raises on failure)"""
+        if not text or len(text.strip()) < 100:
+            return TOO_SHORT_SUMMARY
+        return self._summarize_pieces([text], max_length, min_length, progress_callback)
+    
+    def _summarize_pieces(self, pieces: Iterable[str], max_length: int, min_length: int,
+                          progress_callback: Optional[Callable[[str, int, int], None]] = None) -> str:
+        """
+        Summarize text arriving in pieces (e.g. pages as they are extracted)
+        
+        Chunks are cut and their map-stage summaries dispatched while later
+        pieces are still being produced. The pieces are always fully consumed.
+        """
+        pieces = iter(pieces)
+        seen = []
+        
+        def consume():
+            for piece in pieces:
+                seen.append(piece)
+                yield piece
+        
+        # Split on tokenizer boundaries so no chunk exceeds BART's input limit
+        chunks = self._iter_chunks(consume())
+        first, second = next(chunks, None), next(chunks, None)
+        
+        if second is None:
+            # Everything fits in one input: summarize directly
+            if first is None or len(first.strip()) < 100:
+                return TOO_SHORT_SUMMARY
+            summary = self._summarize_batch([first], max_length, min_length)[0]
+            if progress_callback:
+                progress_callback("final", 1, 1)
+            return summary
+        
+        # Intermediate summaries must be well under the input limit so every
+        # reduce level packs several of them together
+        step_max_length = min(max_length, self.max_input_tokens // 4)
+        max_chunks = settings.SUMMARIZATION_PREFILTER_MAX_CHUNKS if self.prefilter else None
+        summaries = self._map_summaries(
+            itertools.chain([first, second], chunks), step_max_length, min_length // 2,
+            "map", progress_callback, limit=max_chunks
+        )
+        
+        if summaries is None:
+            # Too long for the abstractive stage: read the rest and cap the
+            # workload by keeping only the most central sentences. Map work
+            # already dispatched was speculative and is discarded.
+            seen.extend(pieces)
+            logger.info(f"Pre-filtering document down to ~{max_chunks} chunks with TextRank")
+            text = self.extract_central_text("\n".join(seen), max_chunks * self.max_input_tokens)
+            summaries = self._map_summaries(
+                self._iter_chunks([text]), step_max_length, min_length // 2, "map", progress_callback
+            )
+        
+        chunks = self._group_by_tokens(summaries)
+        level = 1
+        while len(chunks) > 1:
+            summaries = self._map_summaries(
+                chunks, step_max_length, min_length // 2, f"reduce-{level}", progress_callback
+            )
+            chunks = self._group_by_tokens(summaries)
+            level += 1
+        
+        summary = self._summarize_batch(chunks, max_length, min_length)[0]
+        if progress_callback:
+            progress_callback("final", 1, 1)
+        return summary
+    
+    def _summarize_batch(self, texts: List[str], max_length: int, min_length: int) -> List[str]:
+        """Run the pipeline over several texts, batch_size at a time"""
+        return _run_pipeline(self.summarizer, texts, max_length, min_length, self.batch_size)
+    
+    def _map_summaries(self, texts: Iterable[str], max_length: int, min_length: int, stage: str,
+                       progress_callback: Optional[Callable[[str, int, int], None]] = None,
+                       limit: Optional[int] = None) -> Optional[List[str]]:
+        """
+        Summarize every text, in order, reporting progress per finished batch
+        
+        Texts may be a generator. Once there are enough of them to use the
+        worker pool, batches are dispatched as soon as they fill. While texts
+        are still arriving, the reported total is the count seen so far.
+        
+        Returns:
+            Summaries, or None if more than `limit` texts arrive
+        """
+        batches = []
+        current = []
+        futures = {}
+        pool = None
+        pool_checked = False
+        count = 0
+        
+        def dispatch(index):
+            future = pool.submit(_summarize_in_worker, batches[index], max_length, min_length, self.batch_size)
+            futures[future] = index
+        
+        for text in texts:
+            count += 1
+            if limit is not None and count > limit:
+                for future in futures:
+                    future.cancel()
+                return None
+            
+            current.append(text)
+            if len(current) < self.batch_size:
+                continue
+            batches.append(current)
+            current = []
+            
+            if pool is not None:
+                dispatch(len(batches) - 1)
+            elif not pool_checked and count >= settings.SUMMARIZATION_PARALLEL_MIN_CHUNKS:
+                pool_checked = True
+                pool = self._get_pool()
+                if pool is not None:
+                    for index in range(len(batches)):
+                        dispatch(index)
+        
+        if current:
+            batches.append(current)
+            if pool is not None:
+                dispatch(len(batches) - 1)
+        
+        results = [None] * len(batches)
+        done = 0
+        
+        if pool is not None:
+            try:
+                for future in as_completed(futures):
+                    index = futures[future]
+                    results[index] = future.result()
+                    done += len(batches[index])
+                    if progress_callback:
+                        progress_callback(stage, done, count)
+                return [summary for batch in results for summary in batch]
+            except BrokenProcessPool as e:
+                logger.warning(f"Summarizer worker pool failed, continuing in-process: {e}")
+                self.close()
+                results = [None] * len(batches)
+                done = 0
+        
+        for index, batch in enumerate(batches):
+            results[index] = self._summarize_batch(batch, max_length, min_length)
+            done += len(batch)
+            if progress_callback:
+                progress_callback(stage, done, count)
+        return [summary for batch in results for summary in batch]
+    
+    def _group_by_tokens(self, texts: List[str]) -> List[str]:
+        """Pack consecutive texts into groups that each fit the model input"""
+        lengths = [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)['input_ids']]
+        groups = []
+        current, current_tokens = [], 0
+        
+        for text, length in zip(texts, lengths):
+            if current and current_tokens + length > self.max_input_tokens:
+                groups.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += length
+        
+        if current:
+            groups.append(" ".join(current))
+        return groups
+    
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Get the worker pool, creating it on first use (None when single-process)"""
+        if self.workers <= 1 or self.device != -1:
+            # A GPU is better served by larger batches than by CPU workers
+            return None
+        
+        if self._pool is None:
+            # Never fork: this process runs server and torch threads, and a
+            # child forked while one of them holds a lock can deadlock. Workers
+            # come from a clean forkserver process (or are spawned) and load
+            # their own copy of the model.
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            threads_per_worker = max(1, (os.cpu_count() or 1) // self.workers)
+            
+            logger.info(f"Starting {self.workers} summarizer worker processes")
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.model_name, threads_per_worker)
+            )
+        return self._pool
+    
+    def close(self):
+        """Shut down the worker pool"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def summarize_document(self, file_path: str, max_length: int = 150, min_length: int = 50,
+                           progress_callback: Optional[Callable[[str, int, int], None]] = None,
+                           raise_errors: bool = False) -> str:
         """
         Summarize a document (PDF or Word)
         
+        Parsed text and summaries are cached by content hash, so repeat
+        requests for an unchanged document skip parsing and the model.
+        
         Args:
             file_path: Path to document
             max_length: Maximum length of summary
             min_length: Minimum length of summary
+            progress_callback: Optional callable(stage, done, total) called as pages
+                               are parsed ("parse") and chunks finish
+            raise_errors: Raise on failure instead of returning an error message
+        
+        Returns:
+            Summarized text
+        """
+        try:
+            digest = self.document_cache.fingerprint(file_path)
+        except Exception as e:
+            logger.error(f"Error summarizing document: {e}")
+            if raise_errors:
+                raise
+            return f"Failed to summarize document: {str(e)}"
+        return self._summarize_source(file_path, digest, None, max_length, min_length,
+                                      progress_callback, raise_errors)
+    
+    def summarize_upload(self, data, filename: str, max_length: int = 150, min_length: int = 50,
+                         progress_callback: Optional[Callable[[str, int, int], None]] = None,
+                         raise_errors: bool = False) -> str:
+        """
+        Summarize a document held in memory, e.g. uploaded over HTTP
+        
+        The contents are parsed straight from the buffer, so nothing is
+        written to disk and no shared filesystem is needed.
+        
+        Args:
+            data: Document contents (bytes, bytearray or memoryview)
+            filename: Original file name, used to detect the type
+            max_length: Maximum length of summary
+            min_length: Minimum length of summary
+            progress_callback: Optional callable(stage, done, total)
+            raise_errors: Raise on failure instead of returning an error message
         
         Returns:
             Summarized text
         """
+        digest = DocumentCache.fingerprint_bytes(data)
+        return self._summarize_source(data, digest, filename, max_length, min_length,
+                                      progress_callback, raise_errors)
+    
+    def _summarize_source(self, source, digest: Optional[str], filename: Optional[str],
+                          max_length: int, min_length: int,
+                          progress_callback: Optional[Callable[[str, int, int], None]],
+                          raise_errors: bool) -> str:
+        """Summarize a document path or in-memory contents, going through the cache"""
         try:
-            # Parse document
-            logger.info(f"Parsing document: {file_path}")
-            text = DocumentParser.parse_document(file_path)
+            if digest:
+                summary = self.document_cache.get_summary(digest, self._cache_model_key, max_length, min_length)
+                if summary is not None:
+                    logger.info("Retrieved document summary from cache")
+                    return summary
             
-            if not text:
-                return "Failed to extract text from document."
+            text = self.document_cache.get_text(digest) if digest else None
+            summary = None
+            if text is None:
+                # Parse document, summarizing pages as they are extracted
+                logger.info(f"Parsing document: {filename or source}")
+                text, summary = self._summarize_stream(source, max_length, min_length,
+                                                       progress_callback, filename)
+                
+                if not text:
+                    if raise_errors:
+                        raise ValueError("Failed to extract text from document.")
+                    return "Failed to extract text from document."
+                
+                if digest:
+                    self.document_cache.set_text(digest, text)
             
             logger.info(f"Extracted {len(text)} characters from document")
             
             # Summarize
-            return self.summarize_text(text, max_length, min_length)
+            if summary is None:
+                summary = self._summarize(text, max_length, min_length, progress_callback)
+            if digest and summary != TOO_SHORT_SUMMARY:
+                self.document_cache.set_summary(digest, self._cache_model_key, max_length, min_length, summary)
+            return summary
             
         except Exception as e:
             logger.error(f"Error summarizing document: {e}")
+            if raise_errors:
+                raise
             return f"Failed to summarize document: {str(e)}"
     
-    def _chunk_text(self, text: str, max_words: int) -> list:
-        """Split text into chunks of maximum word count"""
-        words = text.split()
-        chunks = []
-        current_chunk = []
+    def _summarize_stream(self, source, max_length: int, min_length: int,
+                          progress_callback: Optional[Callable[[str, int, int], None]] = None,
+                          filename: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Extract a document page by page while summarizing it
+        
+        Returns:
+            (text, summary)
+        """
+        parts = []
+        
+        def read_pages():
+            for record in DocumentParser.iter_document(source, filename=filename):
+                if progress_callback:
+                    progress_callback("parse", record['index'], record['total'])
+                if record['text']:
+                    parts.append(record['text'])
+                    yield record['text']
+        
+        summary = self._summarize_pieces(read_pages(), max_length, min_length, progress_callback)
+        return "\n".join(parts).strip(), summary
+    
+    @property
+    def _cache_model_key(self) -> str:
+        """Model identity for summary cache keys (pre-filtering changes the output)"""
+        return f"{self.model_name}+textrank" if self.prefilter else self.model_name
+    
+    def _chunk_text(self, text: str, max_tokens: Optional[int] = None, overlap: Optional[int] = None) -> List[str]:
+        """
+        Split text into chunks that fit the model's input window
+        
+        Args:
+            text: Text to split
+            max_tokens: Maximum tokens per chunk (defaults to the model limit)
+            overlap: Tokens of overlap between consecutive chunks
+        
+        Returns:
+            List of text chunks
+        """
+        return list(self._iter_chunks([text], max_tokens, overlap))
+    
+    def _iter_chunks(self, pieces: Iterable[str], max_tokens: Optional[int] = None,
+                     overlap: Optional[int] = None) -> Iterator[str]:
+        """
+        Cut streamed text into chunks that fit the model's input window
+        
+        Chunks are packed from whole sentences, and the trailing sentences of
+        each chunk (up to `overlap` tokens) are repeated at the start of the
+        next one so context is not lost at the boundary. Sentences may span
+        pieces; each chunk is yielded as soon as it is complete.
+        """
+        max_tokens = max_tokens or self.max_input_tokens
+        if overlap is None:
+            overlap = settings.SUMMARIZATION_CHUNK_OVERLAP
+        overlap = max(0, min(overlap, max_tokens // 2))
         
-        for word in words:
-            current_chunk.append(word)
-            if len(current_chunk) >= max_words:
-                chunks.append(" ".join(current_chunk))
-                current_chunk = []
+        current = []  # (sentence, token_count) pairs
+        current_tokens = 0
         
-        # Add remaining words
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
+        for sentences in self._iter_sentences(pieces, max_tokens):
+            lengths = [len(ids) for ids in self.tokenizer(sentences, add_special_tokens=False)['input_ids']]
+            
+            for sentence, length in zip(sentences, lengths):
+                if length > max_tokens:
+                    # A single run-on sentence: flush and split it on token boundaries
+                    if current:
+                        yield " ".join(s for s, _ in current)
+                        current, current_tokens = [], 0
+                    yield from self._split_tokens(sentence, max_tokens, overlap)
+                    continue
+                
+                if current and current_tokens + length > max_tokens:
+                    yield " ".join(s for s, _ in current)
+                    
+                    # Carry trailing sentences forward as overlap
+                    carried, carried_tokens = [], 0
+                    for prev, prev_length in reversed(current):
+                        if carried_tokens + prev_length > overlap:
+                            break
+                        carried.insert(0, (prev, prev_length))
+                        carried_tokens += prev_length
+                    if carried_tokens + length > max_tokens:
+                        carried, carried_tokens = [], 0
+                    current, current_tokens = carried, carried_tokens
+                
+                current.append((sentence, length))
+                current_tokens += length
+        
+        if current:
+            yield " ".join(s for s, _ in current)
+    
+    @staticmethod
+    def _iter_sentences(pieces: Iterable[str], max_tokens: int) -> Iterator[List[str]]:
+        """Yield lists of complete sentences as pieces of text arrive"""
+        pending = ""
+        for piece in pieces:
+            pending = f"{pending}\n{piece}" if pending else piece
+            sentences = [s for s in _SENTENCE_BOUNDARY.split(pending.strip()) if s.strip()]
+            if not sentences:
+                continue
+            
+            # The last sentence may continue in the next piece, unless it is
+            # already far too long to fit a chunk anyway
+            pending = sentences.pop()
+            if len(pending) > 8 * max_tokens:
+                sentences.append(pending)
+                pending = ""
+            if sentences:
+                yield sentences
         
-        return chunks
+        if pending.strip():
+            yield [pending.strip()]
+    
+    def _split_tokens(self, text: str, max_tokens: int, overlap: int) -> List[str]:
+        """Split text with no sentence boundaries into overlapping token windows"""
+        ids = self.tokenizer(text, add_special_tokens=False)['input_ids']
+        step = max(1, max_tokens - overlap)
+        return [
+            self.tokenizer.decode(ids[i:i + max_tokens], skip_special_tokens=True)
+            for i in range(0, max(1, len(ids) - overlap), step)
+        ]
     
     def get_key_points(self, text: str, num_points: int = 5) -> list:
         """
-        Extract key points from text using simple sentence extraction
+        Extract key points from text using embedding-based TextRank
         
         Args:
             text: Text to analyze
             num_points: Number of key points to extract
         
         Returns:
-            List of key sentences
+            List of key sentences, most central first
         """
         try:
-            # Split into sentences
-            import re
-            sentences = re.split(r'[.!?]+', text)
-            sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
+            sentences = self._split_sentences(text)
             
             if len(sentences) <= num_points:
                 return sentences
             
-            # Simple scoring: prefer sentences in the beginning and those with numbers
-            scored_sentences = []
-            for i, sentence in enumerate(sentences):
-                score = 0
-                # Position score (earlier is better)
-                score += (len(sentences) - i) / len(sentences) * 10
-                # Length score (moderate length is better)
-                word_count = len(sentence.split())
-                if 10 <= word_count <= 30:
-                    score += 5
-                # Has numbers (might be important fact)
-                if re.search(r'\d+', sentence):
-                    score += 3
-                
-                scored_sentences.append((score, sentence))
-            
-            # Sort by score and return top N
-            scored_sentences.sort(reverse=True, key=lambda x: x[0])
-            return [s[1] for s in scored_sentences[:num_points]]
+            scores = self._rank_sentences(sentences)
+            top = np.argsort(-scores, kind='stable')[:num_points]
+            return [sentences[i] for i in top]
             
         except Exception as e:
             logger.error(f"Error extracting key points: {e}")
             return []
+    
+    def extract_central_text(self, text: str, max_tokens: int) -> str:
+        """
+        Shrink text to its most central sentences
+        
+        Sentences are picked by TextRank score until the token budget is
+        spent, then joined back in their original order.
+        
+        Args:
+            text: Text to shrink
+            max_tokens: Token budget for the result
+        
+        Returns:
+            Extracted text
+        """
+        sentences = self._split_sentences(text)
+        if not sentences:
+            return text
+        
+        lengths = np.array([
+            len(ids) for ids in self.tokenizer(sentences, add_special_tokens=False)['input_ids']
+        ])
+        if lengths.sum() <= max_tokens:
+            return text
+        
+        scores = self._rank_sentences(sentences)
+        order = np.argsort(-scores, kind='stable')
+        # Keep the best-ranked sentences whose running total fits the budget
+        keep = order[np.cumsum(lengths[order]) <= max_tokens]
+        return " ".join(sentences[i] for i in np.sort(keep))
+    
+    @staticmethod
+    def _split_sentences(text: str) -> List[str]:
+        """Split text into sentences worth ranking"""
+        sentences = (s.strip() for s in _SENTENCE_BOUNDARY.split(text.strip()))
+        return [s for s in sentences if len(s) > 20]
+    
+    def _rank_sentences(self, sentences: List[str]) -> np.ndarray:
+        """TextRank scores for sentences, ranked in blocks to bound memory"""
+        embeddings = self._get_encoder().encode(
+            sentences,
+            batch_size=64,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32)
+        
+        block = settings.TEXTRANK_MAX_SENTENCES
+        scores = np.empty(len(sentences), dtype=np.float32)
+        for start in range(0, len(sentences), block):
+            block_embeddings = embeddings[start:start + block]
+            # Scale by block size so scores from different blocks are comparable
+            scores[start:start + block] = _textrank(block_embeddings) * len(block_embeddings)
+        return scores
+    
+    def _get_encoder(self):
+        """Get the sentence embedding model, loading it on first use"""
+        if self.encoder is None:
+            from sentence_transformers import SentenceTransformer
+            logger.info(f"Loading sentence transformer: {settings.SENTENCE_TRANSFORMER_MODEL}")
+            self.encoder = SentenceTransformer(
+                settings.SENTENCE_TRANSFORMER_MODEL,
+                cache_folder=str(settings.MODELS_DIR)
+            )
+        return self.encoder
@@ -0,0 +1,136 @@
+"""
+Background queue for document summarization jobs
+"""
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+import config.settings as settings
+from storage import Database
+from utils.logger import logger
+
+
+class SummaryJobQueue:
+    """Run summarization jobs on a bounded worker pool, with state kept in the database"""
+    
+    def __init__(self, db: Database, get_summarizer: Callable, max_workers: int = None):
+        """
+        Args:
+            db: Database holding job state
+            get_summarizer: Callable(tier) returning a Summarizer, or None if unavailable
+            max_workers: Number of jobs run at once
+        """
+        self.db = db
+        self.get_summarizer = get_summarizer
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.SUMMARY_JOB_WORKERS,
+            thread_name_prefix="summary-job"
+        )
+    
+    def submit(self, file_path: str, tier: str = None, max_length: int = 150, min_length: int = 50) -> str:
+        """
+        Queue a document for summarization
+        
+        Args:
+            file_path: Path to document
+            tier: Summarization tier (defaults to the background tier)
+            max_length: Maximum length of summary
+            min_length: Minimum length of summary
+        
+        Returns:
+            Job ID
+        """
+        return self._submit(file_path, tier, max_length, min_length)
+    
+    def submit_upload(self, data, filename: str, tier: str = None,
+                      max_length: int = 150, min_length: int = 50) -> str:
+        """
+        Queue an uploaded document for summarization
+        
+        The contents are stored with the job, so it can resume after a
+        restart without the document ever being written to a file.
+        
+        Args:
+            data: Document contents (bytes, bytearray or memoryview)
+            filename: Original file name, used to detect the type
+            tier: Summarization tier (defaults to the background tier)
+            max_length: Maximum length of summary
+            min_length: Minimum length of summary
+        
+        Returns:
+            Job ID
+        """
+        return self._submit(filename, tier, max_length, min_length, upload=data)
+    
+    def _submit(self, file_path: str, tier: Optional[str], max_length: int, min_length: int,
+                upload=None) -> str:
+        job_id = uuid.uuid4().hex
+        tier = tier or settings.SUMMARIZATION_BACKGROUND_TIER
+        self.db.add_summary_job(job_id, file_path, tier, max_length, min_length, upload=upload)
+        # The stored copy is only read back when resuming; this run uses the buffer it was given
+        self.executor.submit(self._run, job_id, upload)
+        logger.info(f"Queued summary job {job_id} for {file_path}")
+        return job_id
+    
+    def resume(self) -> int:
+        """Re-queue jobs left unfinished by a previous run, returning how many"""
+        jobs = self.db.get_unfinished_summary_jobs()
+        for job in jobs:
+            logger.info(f"Resuming summary job {job['id']}")
+            self.db.update_summary_job(job['id'], status='queued')
+            self.executor.submit(self._run, job['id'])
+        return len(jobs)
+    
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Get job state, including the result once finished"""
+        return self.db.get_summary_job(job_id)
+    
+    def shutdown(self):
+        """Stop accepting jobs; unfinished ones resume on the next start"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _run(self, job_id: str, upload=None):
+        """Run one job and record its progress and outcome"""
+        job = self.db.get_summary_job(job_id)
+        if not job:
+            return
+        
+        def on_progress(stage: str, done: int, total: int):
+            fields = {'stage': stage}
+            if stage == 'parse':
+                fields.update(pages_parsed=done, pages_total=total)
+            elif stage == 'map':
+                fields.update(chunks_done=done, chunks_total=total)
+            self.db.update_summary_job(job_id, **fields)
+        
+        self.db.update_summary_job(job_id, status='running', stage='parse')
+        try:
+            summarizer = self.get_summarizer(job['tier'])
+            if summarizer is None:
+                raise RuntimeError("Summarization feature is unavailable at the moment.")
+            
+            if upload is None:
+                upload = self.db.get_summary_job_upload(job_id)
+            if upload is not None:
+                result = summarizer.summarize_upload(
+                    upload,
+                    job['file_path'],
+                    job['max_length'],
+                    job['min_length'],
+                    progress_callback=on_progress,
+                    raise_errors=True
+                )
+            else:
+                result = summarizer.summarize_document(
+                    job['file_path'],
+                    job['max_length'],
+                    job['min_length'],
+                    progress_callback=on_progress,
+                    raise_errors=True
+                )
+            self.db.update_summary_job(job_id, status='done', stage='done', result=result)
+            logger.info(f"Summary job {job_id} finished")
+        except Exception as e:
+            logger.error(f"Summary job {job_id} failed: {e}")
+            self.db.update_summary_job(job_id, status='failed', error=str(e))
+        finally:
+            self.db.delete_summary_job_upload(job_id)
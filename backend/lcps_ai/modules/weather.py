@@ -1,7 +1,6 @@
 """
 Weather module for fetching weather information
 """
-import requests
 from typing import Optional, Dict
 import config.settings as settings
 from config import api_keys
@@ -29,6 +28,9 @@ class Weather:
             logger.error("Weather API key not configured")
             return None
         
+        # requests (with urllib3/certifi) is imported on the first weather lookup
+        import requests
+        
         try:
             params = {
                 'q': city,
@@ -1,16 +1,12 @@
 """
 YouTube Handler for opening and searching YouTube
 """
-import os
 import webbrowser
 import urllib.parse
+from utils.helpers import is_headless
 from utils.logger import logger
 
 
-def _is_headless() -> bool:
-    return os.environ.get('LCPS_AI_HEADLESS', '0') in ['1', 'true', 'True']
-
-
 class YouTubeHandler:
     """Handle YouTube operations"""
     
@@ -22,7 +18,7 @@ class YouTubeHandler:
         """
         url = "https://www.youtube.com"
         try:
-            if not _is_headless():
+            if not is_headless():
                 webbrowser.open(url)
                 logger.info("Opened YouTube")
             return url
@@ -41,7 +37,7 @@ class YouTubeHandler:
         url = f"https://www.youtube.com/results?search_query={encoded_query}"
 
         try:
-            if not _is_headless():
+            if not is_headless():
                 webbrowser.open(url)
                 logger.info(f"Searching YouTube for: {query}")
             return url
@@ -57,7 +53,7 @@ class YouTubeHandler:
         """
         url = f"https://www.youtube.com/watch?v={video_id}"
         try:
-            if not _is_headless():
+            if not is_headless():
                 webbrowser.open(url)
                 logger.info(f"Opening YouTube video: {video_id}")
             return url
@@ -76,7 +72,7 @@ class YouTubeHandler:
         url = f"https://www.youtube.com/results?search_query={encoded_name}"
 
         try:
-            if not _is_headless():
+            if not is_headless():
                 webbrowser.open(url)
                 logger.info(f"Searching for YouTube channel: {channel_name}")
             return url
@@ -1,5 +1,6 @@
 """Storage package"""
 from .database import Database
 from .cache_manager import CacheManager
+from .document_cache import DocumentCache
 
-__all__ = ['Database', 'CacheManager']
+__all__ = ['Database', 'CacheManager', 'DocumentCache']
@@ -83,6 +83,35 @@ class Database:
                 )
             """)
             
+            # Background summarization jobs
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS summary_jobs (
+                    id TEXT PRIMARY KEY,
+                    file_path TEXT NOT NULL,
+                    tier TEXT NOT NULL,
+                    max_length INTEGER NOT NULL,
+                    min_length INTEGER NOT NULL,
+                    status TEXT DEFAULT 'queued',
+                    stage TEXT,
+                    pages_parsed INTEGER DEFAULT 0,
+                    pages_total INTEGER DEFAULT 0,
+                    chunks_done INTEGER DEFAULT 0,
+                    chunks_total INTEGER DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Uploaded documents awaiting summarization (kept apart so polling a job never loads them)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS summary_job_uploads (
+                    job_id TEXT PRIMARY KEY,
+                    data BLOB NOT NULL
+                )
+            """)
+            
             # Cache responses table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS cache_responses (
@@ -208,6 +237,88 @@ class Database:
             )
             return [dict(row) for row in cursor.fetchall()]
     
+    def get_frequent_inputs(self, limit: int = 200, window: int = 50000) -> List[str]:
+        """Most frequently asked user inputs (ignoring case and surrounding spaces) among the latest window"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT MIN(user_input) AS user_input, COUNT(*) AS asked
+                FROM (SELECT user_input FROM conversation_history ORDER BY id DESC LIMIT ?)
+                GROUP BY LOWER(TRIM(user_input))
+                ORDER BY asked DESC
+                LIMIT ?
+                """,
+                (window, limit)
+            )
+            return [row['user_input'] for row in cursor.fetchall()]
+    
+    # Summary job methods
+    SUMMARY_JOB_FIELDS = (
+        'status', 'stage', 'pages_parsed', 'pages_total',
+        'chunks_done', 'chunks_total', 'result', 'error'
+    )
+    
+    def add_summary_job(self, job_id: str, file_path: str, tier: str, max_length: int, min_length: int,
+                        upload=None):
+        """Add a queued summarization job, with the document contents if it was uploaded"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO summary_jobs (id, file_path, tier, max_length, min_length) VALUES (?, ?, ?, ?, ?)",
+                (job_id, file_path, tier, max_length, min_length)
+            )
+            if upload is not None:
+                cursor.execute(
+                    "INSERT INTO summary_job_uploads (job_id, data) VALUES (?, ?)",
+                    (job_id, upload)
+                )
+    
+    def update_summary_job(self, job_id: str, **fields):
+        """Update status/progress columns of a summarization job"""
+        unknown = set(fields) - set(self.SUMMARY_JOB_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown summary job fields: {', '.join(sorted(unknown))}")
+        
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"UPDATE summary_jobs SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (*fields.values(), job_id)
+            )
+    
+    def get_summary_job(self, job_id: str) -> Optional[Dict]:
+        """Get a summarization job"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM summary_jobs WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+    
+    def get_summary_job_upload(self, job_id: str) -> Optional[bytes]:
+        """Get the uploaded document of a summarization job, or None if it summarizes a path"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT data FROM summary_job_uploads WHERE job_id = ?", (job_id,))
+            row = cursor.fetchone()
+            return row['data'] if row else None
+    
+    def delete_summary_job_upload(self, job_id: str):
+        """Drop the uploaded document of a finished summarization job"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM summary_job_uploads WHERE job_id = ?", (job_id,))
+    
+    def get_unfinished_summary_jobs(self) -> List[Dict]:
+        """Get queued or running summarization jobs, oldest first"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT * FROM summary_jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            )
+            return [dict(row) for row in cursor.fetchall()]
+    
     # Cache methods
     def get_cached_response(self, query_hash: str) -> Optional[str]:
         """Get cached response for a query"""
@@ -0,0 +1,82 @@
+"""
+Content-addressed cache for parsed documents and their summaries
+"""
+import hashlib
+import os
+from typing import Optional
+from diskcache import Cache
+import config.settings as settings
+from utils.document_parser import DocumentParser
+
+
+class DocumentCache:
+    """Disk cache of document text and summaries keyed by content hash"""
+    
+    def __init__(self, directory=None):
+        self.cache = Cache(
+            str(directory or settings.DOCUMENT_CACHE_DIR),
+            size_limit=settings.DOCUMENT_CACHE_SIZE_LIMIT
+        )
+    
+    def fingerprint(self, file_path: str) -> Optional[str]:
+        """
+        Get the SHA-256 of a document's contents
+        
+        The hash is remembered alongside the file's size and modification
+        time, so unchanged files are not re-read on later calls.
+        
+        Args:
+            file_path: Path to document
+        
+        Returns:
+            Hex digest, or None if the file does not exist
+        """
+        info = DocumentParser.get_document_info(file_path)
+        if not info:
+            return None
+        
+        stat_key = f"stat:{os.path.abspath(file_path)}"
+        known = self.cache.get(stat_key)
+        if known and known['size'] == info['size'] and known['modified'] == info['modified']:
+            return known['digest']
+        
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(block)
+        
+        self.cache.set(stat_key, {
+            'size': info['size'],
+            'modified': info['modified'],
+            'digest': digest.hexdigest()
+        })
+        return digest.hexdigest()
+    
+    @staticmethod
+    def fingerprint_bytes(data) -> str:
+        """Get the SHA-256 of a document held in memory (bytes, bytearray or memoryview)"""
+        return hashlib.sha256(data).hexdigest()
+    
+    def get_text(self, digest: str) -> Optional[str]:
+        """Get parsed text for a document hash"""
+        return self.cache.get(f"text:{digest}")
+    
+    def set_text(self, digest: str, text: str):
+        """Cache parsed text for a document hash"""
+        self.cache.set(f"text:{digest}", text)
+    
+    def get_summary(self, digest: str, model: str, max_length: int, min_length: int) -> Optional[str]:
+        """Get a cached summary for a document hash and summarizer parameters"""
+        return self.cache.get(self._summary_key(digest, model, max_length, min_length))
+    
+    def set_summary(self, digest: str, model: str, max_length: int, min_length: int, summary: str):
+        """Cache a summary for a document hash and summarizer parameters"""
+        self.cache.set(self._summary_key(digest, model, max_length, min_length), summary)
+    
+    def clear(self):
+        """Clear all cached documents"""
+        self.cache.clear()
+    
+    @staticmethod
+    def _summary_key(digest: str, model: str, max_length: int, min_length: int) -> str:
+        return f"summary:{digest}:{model}:{max_length}:{min_length}"
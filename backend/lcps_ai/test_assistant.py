@@ -2,11 +2,21 @@
 Test script for LCPS AI Assistant
 Verifies all core components work correctly
 """
+import os
+import subprocess
 import sys
 from colorama import init, Fore, Style
 
 init(autoreset=True)
 
+# Cold "import main" (no model weights) must stay under this
+IMPORT_BUDGET_SECONDS = 1.0
+# Libraries that must only be imported on first use
+DEFERRED_MODULES = [
+    'torch', 'transformers', 'sentence_transformers',
+    'pyttsx3', 'speech_recognition', 'PyPDF2', 'pdfplumber', 'docx',
+]
+
 def print_test_header(test_name):
     """Print test section header"""
     print(f"\n{Fore.CYAN}{'='*60}")
@@ -38,6 +48,7 @@ def test_imports():
         ("Deadline Tracker", "modules.deadline_tracker", "DeadlineTracker"),
         ("Weather", "modules.weather", "Weather"),
         ("Calculator", "modules.calculator", "Calculator"),
+        ("Statistics Calculator", "modules.statistics_calculator", "StatisticsCalculator"),
         ("YouTube Handler", "modules.youtube_handler", "YouTubeHandler"),
         ("Database", "storage.database", "Database"),
         ("Cache Manager", "storage.cache_manager", "CacheManager"),
@@ -56,6 +67,49 @@ def test_imports():
     return len(failed) == 0, failed
 
 
+def test_import_budget():
+    """Test that importing the assistant is fast and defers heavy libraries"""
+    print_test_header("Import-time Budget")
+    
+    try:
+        # Fresh headless interpreter, as the HTTP service imports it
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import main'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=dict(os.environ, LCPS_AI_HEADLESS='1'),
+            capture_output=True,
+            text=True,
+            timeout=120
+        )
+        if result.returncode != 0:
+            print_error(f"Importing main failed:\n{result.stderr[-500:]}")
+            return False
+        
+        # Lines look like "import time: <self us> | <cumulative us> | <module>"
+        cumulative = {}
+        for line in result.stderr.splitlines():
+            fields = line.partition('import time:')[2].split('|')
+            if len(fields) == 3 and fields[1].strip().isdigit():
+                cumulative[fields[2].strip()] = int(fields[1]) / 1e6
+        
+        eager = [name for name in DEFERRED_MODULES if name in cumulative]
+        if eager:
+            print_error(f"Imported at startup instead of on first use: {', '.join(eager)}")
+            return False
+        print_success("Heavy libraries are deferred to first use")
+        
+        elapsed = cumulative.get('main', 0.0)
+        if elapsed > IMPORT_BUDGET_SECONDS:
+            print_error(f"import main took {elapsed:.2f}s (budget {IMPORT_BUDGET_SECONDS:.2f}s)")
+            return False
+        print_success(f"import main took {elapsed:.3f}s (budget {IMPORT_BUDGET_SECONDS:.2f}s)")
+        
+        return True
+    except Exception as e:
+        print_error(f"Import budget test failed: {e}")
+        return False
+
+
 def test_database():
     """Test database functionality"""
     print_test_header("Database Operations")
@@ -96,6 +150,13 @@ def test_calculator():
             ("10 * 2", 20),
             ("15 - 7", 8),
             ("20 / 4", 5),
+            ("15% of 200", 30),
+            ("sqrt(16) + 2 ** 3", 12),
+            ("ans / 2", 6),
+            ("round(2.345, 2)", 2.35),
+            ("7 % 3", 1),
+            ("10 mod 4", 2),
+            ("50% times 4", 2),
         ]
         
         for expression, expected in test_cases:
@@ -106,12 +167,90 @@ def test_calculator():
                 print_error(f"{expression} = {result}, expected {expected}")
                 return False
         
+        # Arguments that would make a function run for minutes are refused
+        for expression in ["round(5, -99999999)", "round(5, 0.5)", "factorial(100000)"]:
+            if calc.calculate(expression) is not None:
+                print_error(f"{expression} was not refused")
+                return False
+            print_success(f"{expression} refused")
+        
         return True
     except Exception as e:
         print_error(f"Calculator test failed: {e}")
         return False
 
 
+def test_statistics():
+    """Test statistics and grade calculations"""
+    print_test_header("Statistics")
+    
+    try:
+        from modules.statistics_calculator import StatisticsCalculator
+        stats = StatisticsCalculator()
+        
+        test_cases = [
+            ("average of 78, 91, 85", "mean 84.67"),
+            ("median of 3, 1, 4, 1, 5", "median 3"),
+            ("90th percentile of 10, 20, 30, 40, 50", "90th percentile 46"),
+            ("weighted average of 90 (30%), 85 (50%), 70 (20%)", "83.5%"),
+            ("homework 92 (20%), midterm 78 (30%): what do I need on the final to get a B?", "82.4%"),
+        ]
+        
+        for query, expected in test_cases:
+            answer = stats.answer(query)
+            if answer and expected in answer:
+                print_success(f"{query} → {answer}")
+            else:
+                print_error(f"{query} → {answer}, expected '{expected}'")
+                return False
+        
+        if stats.answer("calculate 5 + 3") is not None:
+            print_error("Plain arithmetic was taken for a statistics request")
+            return False
+        
+        return True
+    except Exception as e:
+        print_error(f"Statistics test failed: {e}")
+        return False
+
+
+def test_entities():
+    """Test entity extraction"""
+    print_test_header("Entity Extraction")
+    
+    try:
+        from core.entity_extractor import EntityExtractor
+        extractor = EntityExtractor()
+        
+        test_cases = [
+            ("What's my schedule on Monday and tomorrow?", "schedule", "days", ["Monday", "tomorrow"]),
+            ("Show my midterms and tuition fees", "deadline", "types", ["exam", "fee"]),
+            ("Weather in New York?", "weather", "city", "New York"),
+            ("Weather in Springfield", "weather", "city", "Springfield"),
+            ("Average of 78, 91 and 85.5", "calculate", "numbers", [78.0, 91.0, 85.5]),
+        ]
+        
+        for text, intent, key, expected in test_cases:
+            value = extractor.entities_for_intent(text, intent).get(key)
+            if value == expected:
+                print_success(f"'{text}' → {key}: {value}")
+            else:
+                print_error(f"'{text}' → {key}: {value}, expected {expected}")
+                return False
+        
+        text = "Exam on Fri, 15% of 200"
+        spans = [(e.label, text[e.start:e.end]) for e in extractor.extract(text)]
+        if spans != [('deadline_type', 'Exam'), ('day', 'Fri'), ('percent', '15%'), ('number', '200')]:
+            print_error(f"Unexpected spans: {spans}")
+            return False
+        print_success(f"Spans: {spans}")
+        
+        return True
+    except Exception as e:
+        print_error(f"Entity extraction test failed: {e}")
+        return False
+
+
 def test_intent_analyzer():
     """Test intent detection"""
     print_test_header("Intent Analysis (may take a moment to load model)")
@@ -240,8 +379,11 @@ def run_all_tests():
         print_info("pip install -r requirements.txt")
         return
     
+    results["Import Budget"] = test_import_budget()
     results["Database"] = test_database()
     results["Calculator"] = test_calculator()
+    results["Statistics"] = test_statistics()
+    results["Entities"] = test_entities()
     results["Helpers"] = test_helpers()
     results["Cache"] = test_cache()
     results["Intent Analyzer"] = test_intent_analyzer()
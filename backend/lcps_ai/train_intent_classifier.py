@@ -0,0 +1,112 @@
+"""
+Train the intent classifier used for semantic routing
+
+Builds a labelled corpus from the intent keywords, from logged conversation
+inputs that a keyword labels, and from any hand-labelled JSONL files, embeds
+it with the configured sentence transformer (reusing cached embeddings), and
+fits a logistic-regression classifier saved as a NumPy weight matrix. The
+assistant picks it up on its next start.
+
+Usage:
+    python train_intent_classifier.py                          # keywords + conversation history
+    python train_intent_classifier.py --corpus labelled.jsonl  # plus hand-labelled examples
+    python train_intent_classifier.py --export-corpus corpus.jsonl   # write the corpus to review/relabel
+    python train_intent_classifier.py --evaluate labelled.jsonl      # score the saved classifier
+
+A corpus file has one {"text": "...", "intent": "..."} object per line; its
+labels override the bootstrapped ones for the same text.
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+import config.settings as settings
+
+
+def main():
+    """Entry point"""
+    parser = argparse.ArgumentParser(description='Train the LCPS AI intent classifier')
+    parser.add_argument('--corpus', action='append', type=Path, default=[],
+                        help='Hand-labelled JSONL examples (repeatable)')
+    parser.add_argument('--no-history', action='store_true', help='Do not use logged conversation inputs')
+    parser.add_argument('--history-limit', type=int, default=5000, help='Most recent conversation inputs to use')
+    parser.add_argument('--holdout', type=float, default=0.2,
+                        help='Fraction kept for validation and probability calibration (default 0.2)')
+    parser.add_argument('--l2', type=float, default=1e-3, help='L2 regularization strength')
+    parser.add_argument('--epochs', type=int, default=400, help='Gradient steps')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the holdout split')
+    parser.add_argument('--output', type=Path, default=settings.INTENT_CLASSIFIER_PATH,
+                        help=f'Classifier file (default {settings.INTENT_CLASSIFIER_PATH})')
+    parser.add_argument('--export-corpus', type=Path, help='Write the corpus as JSONL and stop')
+    parser.add_argument('--evaluate', type=Path, help='Evaluate the saved classifier on this JSONL file and stop')
+    args = parser.parse_args()
+    
+    from core.intent_analyzer import IntentAnalyzer
+    from core import intent_classifier
+    
+    analyzer = IntentAnalyzer(load_model=True)
+    
+    if args.evaluate:
+        classifier = intent_classifier.IntentClassifier.load_for(
+            args.output, settings.SENTENCE_TRANSFORMER_MODEL, analyzer.model.get_sentence_embedding_dimension())
+        if classifier is None:
+            print(f"No usable classifier at {args.output}")
+            return 1
+        texts, intents = zip(*intent_classifier.load_corpus(args.evaluate))
+        embeddings = intent_classifier.encode_cached(
+            analyzer.model, texts, settings.INTENT_EMBEDDING_CACHE, settings.SENTENCE_TRANSFORMER_MODEL)
+        print_report(intent_classifier.evaluate(classifier, embeddings, intents))
+        return 0
+    
+    history = []
+    if not args.no_history:
+        from storage.database import Database
+        history = [row['user_input'] for row in Database().get_recent_conversations(limit=args.history_limit)]
+    examples = dict(intent_classifier.bootstrap_corpus(analyzer.intent_patterns, history, analyzer.match_keywords))
+    bootstrapped = len(examples)
+    for path in args.corpus:
+        examples.update(intent_classifier.load_corpus(path))
+    print(f"Corpus: {len(examples)} examples ({bootstrapped} bootstrapped from keywords and "
+          f"{len(history)} logged inputs, {len(examples) - bootstrapped} more from corpus files)")
+    
+    if args.export_corpus:
+        with open(args.export_corpus, 'w', encoding='utf-8') as file:
+            for text, intent in examples.items():
+                file.write(json.dumps({'text': text, 'intent': intent}, ensure_ascii=False) + "\n")
+        print(f"Corpus written to {args.export_corpus}")
+        return 0
+    
+    texts, intents = zip(*examples.items())
+    embeddings = intent_classifier.encode_cached(
+        analyzer.model, texts, settings.INTENT_EMBEDDING_CACHE, settings.SENTENCE_TRANSFORMER_MODEL)
+    try:
+        classifier = intent_classifier.train(
+            embeddings, intents, list(analyzer.intent_patterns), settings.SENTENCE_TRANSFORMER_MODEL,
+            l2=args.l2, epochs=args.epochs, holdout=args.holdout, seed=args.seed,
+            groups=[intent_classifier.template_group(text) for text in texts]
+        )
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    
+    metadata = classifier.metadata
+    print(f"Trained on {metadata['trained_examples']} examples in {metadata['train_seconds']}s: "
+          f"training accuracy {metadata['train_accuracy']:.1%}")
+    if 'holdout_accuracy' in metadata:
+        print(f"Holdout: {metadata['holdout_examples']} examples, accuracy {metadata['holdout_accuracy']:.1%}, "
+              f"calibration temperature {metadata['temperature']:.2f}")
+    classifier.save(args.output)
+    print(f"\n✓ Classifier saved to {args.output}")
+    return 0
+
+
+def print_report(report: dict):
+    """Print an evaluation report"""
+    print(f"Accuracy: {report['accuracy']:.1%} on {report['examples']} examples "
+          f"(mean confidence {report['mean_confidence']:.1%})")
+    for intent, recall in report['recall'].items():
+        print(f"  {intent:<14} recall {recall:.1%}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,134 @@
 """
 Document parsing utilities for PDF and Word documents
 """
+import io
 import os
+import re
+import multiprocessing
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Optional
-import PyPDF2
-import pdfplumber
-from docx import Document
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Union
+import config.settings as settings
 from utils.logger import logger
 
 
+# A path on disk, or the document's contents already in memory (e.g. an upload)
+DocumentSource = Union[str, os.PathLike, bytes, bytearray, memoryview]
+
+# Glyph codes pdfminer emits for fonts it cannot map to text
+_CID_CODE = re.compile(r'\(cid:\d+\)')
+
+# Page extraction pool, started on the first large PDF and reused after that
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_lock = threading.Lock()
+
+
+def _alnum_count(text: str) -> int:
+    return sum(c.isalnum() for c in text)
+
+
+def _is_poor_text(text: str) -> bool:
+    """Heuristic check for a page that came back empty or garbled"""
+    stripped = text.strip()
+    if len(stripped) < settings.PDF_MIN_PAGE_CHARS:
+        return True
+    if _CID_CODE.search(stripped) or stripped.count('\ufffd') > len(stripped) * 0.01:
+        return True
+    # Mostly symbols, or long runs of words glued together without spaces
+    if _alnum_count(stripped) < len(stripped) * 0.5:
+        return True
+    return len(stripped) > 200 and sum(c.isspace() for c in stripped) < len(stripped) * 0.05
+
+
+def _is_path(source: DocumentSource) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+
+def _source_name(source: DocumentSource) -> str:
+    """Name of a document source for log messages"""
+    return str(source) if _is_path(source) else f"<{len(source)} byte upload>"
+
+
+@contextmanager
+def _open_source(source: DocumentSource) -> Iterator[BinaryIO]:
+    """Open a path, or wrap in-memory contents in a seekable stream without touching disk"""
+    if _is_path(source):
+        with open(source, 'rb') as file:
+            yield file
+    else:
+        yield io.BytesIO(source)
+
+
+# PyPDF2, pdfplumber (pdfminer) and python-docx are imported on first use, so
+# importing this module stays cheap for callers that never parse a document
+def _pdf_reader(file: BinaryIO):
+    import PyPDF2
+    return PyPDF2.PdfReader(file)
+
+
+def _open_pdfplumber(file: BinaryIO):
+    import pdfplumber
+    return pdfplumber.open(file)
+
+
+def _extract_page_range(file_path: str, method: str, start: int, stop: int) -> List[Dict]:
+    """Extract pages [start, stop) of a PDF; runs in a worker process that opens the file itself"""
+    return list(DocumentParser._iter_pages(file_path, method, start, stop))
+
+
+def _get_page_pool(workers: int) -> ProcessPoolExecutor:
+    """The page extraction pool, created on first use"""
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            # Never fork: the server is threaded, and a child forked while another
+            # thread holds a lock can deadlock. Workers come from a clean forkserver
+            # process (or are spawned), which costs an import, so the pool is kept.
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _page_pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        return _page_pool
+
+
+def _discard_page_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next document starts a new one"""
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is pool:
+            _page_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _forget_page_pool_in_child():
+    # A forked child has none of the pool's processes or threads
+    global _page_pool, _page_pool_lock
+    _page_pool = None
+    _page_pool_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_page_pool_in_child)
+
+
 class DocumentParser:
     """Parse PDF and Word documents"""
     
     @staticmethod
-    def parse_pdf(file_path: str, method: str = 'pypdf2') -> Optional[str]:
+    def parse_pdf(file_path: str, method: str = 'pypdf2',
+                  progress_callback: Optional[Callable[[str, int, int], None]] = None,
+                  max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> Optional[str]:
         """
         Parse PDF file and extract text
         
         Args:
             file_path: Path to PDF file
-            method: 'pypdf2' or 'pdfplumber' (pdfplumber is better for complex PDFs)
+            method: 'auto', 'pypdf2' or 'pdfplumber' (pdfplumber is better for complex PDFs)
+            progress_callback: Optional callable("parse", pages_done, total_pages)
+            max_pages: Stop after this many pages
+            max_chars: Stop once this many characters are extracted
         
         Returns:
             Extracted text or None if parsing fails
@@ -30,42 +138,165 @@ class DocumentParser:
             return None
         
         try:
-            if method == 'pdfplumber':
-                return DocumentParser._parse_with_pdfplumber(file_path)
-            else:
-                return DocumentParser._parse_with_pypdf2(file_path)
+            pages = DocumentParser.iter_pdf_pages(file_path, method, max_pages, max_chars)
+            return DocumentParser._assemble(pages, progress_callback)
         except Exception as e:
             logger.error(f"Error parsing PDF: {e}")
             return None
     
     @staticmethod
-    def _parse_with_pypdf2(file_path: str) -> str:
-        """Parse PDF using PyPDF2"""
-        text = ""
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        return text.strip()
+    def iter_pdf_pages(source: DocumentSource, method: str = 'auto',
+                       max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Extract a PDF page by page
+        
+        Args:
+            source: Path to PDF file, or its contents as bytes
+            method: 'auto' (PyPDF2 with per-page pdfplumber fallback), 'pypdf2' or 'pdfplumber'
+            max_pages: Stop after this many pages
+            max_chars: Stop once this many characters are extracted
+        
+        Yields:
+            Records with 'kind', 'index' (1-based), 'total', 'text', 'offset'
+            (position of the text in the assembled document) and 'extractor'
+        """
+        workers = settings.PDF_PARSE_WORKERS or os.cpu_count() or 1
+        # Worker processes open the file themselves; in-memory uploads are extracted here
+        # rather than copying the whole buffer into every worker
+        total = DocumentParser._count_pages(source) if workers > 1 and _is_path(source) else 0
+        
+        if total >= settings.PDF_PARALLEL_MIN_PAGES:
+            pages = DocumentParser._iter_parallel(source, method, total, workers, max_pages)
+        else:
+            pages = DocumentParser._iter_pages(source, method)
+        return DocumentParser._with_offsets(pages, max_pages, max_chars)
     
     @staticmethod
-    def _parse_with_pdfplumber(file_path: str) -> str:
-        """Parse PDF using pdfplumber (better for complex PDFs)"""
-        text = ""
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        return text.strip()
+    def _count_pages(source: DocumentSource) -> int:
+        """Count PDF pages without extracting any text (0 if PyPDF2 cannot read it)"""
+        try:
+            with _open_source(source) as file:
+                return len(_pdf_reader(file).pages)
+        except Exception:
+            return 0
     
     @staticmethod
-    def parse_docx(file_path: str) -> Optional[str]:
+    def _iter_parallel(file_path: str, method: str, total: int, workers: int,
+                       max_pages: Optional[int] = None) -> Iterator[Dict]:
+        """Extract page ranges across a process pool, yielding pages in order"""
+        stop = min(total, max_pages) if max_pages is not None else total
+        # Several ranges per worker keeps the pool balanced when some pages are slower
+        range_size = max(4, -(-stop // (workers * 4)))
+        ranges = [(start, min(start + range_size, stop)) for start in range(0, stop, range_size)]
+        
+        pool = _get_page_pool(workers)
+        futures = [pool.submit(_extract_page_range, file_path, method, start, end) for start, end in ranges]
+        try:
+            # Ranges finish roughly in order, so early pages stream out while later ones are extracted
+            for index, future in enumerate(futures):
+                try:
+                    pages = future.result()
+                except BrokenProcessPool as e:
+                    logger.warning(f"PDF worker pool failed, extracting the rest in-process: {e}")
+                    _discard_page_pool(pool)
+                    yield from DocumentParser._iter_pages(file_path, method, ranges[index][0], stop)
+                    return
+                yield from pages
+        finally:
+            # The pool is shared, so only this document's unstarted ranges are dropped
+            for future in futures:
+                future.cancel()
+    
+    @staticmethod
+    def _iter_pages(source: DocumentSource, method: str, start: int = 0,
+                    stop: Optional[int] = None) -> Iterator[Dict]:
+        """Extract pages [start, stop) with the given method"""
+        if method == 'pdfplumber':
+            return DocumentParser._iter_with_pdfplumber(source, start, stop)
+        elif method == 'pypdf2':
+            return DocumentParser._iter_with_pypdf2(source, start, stop)
+        return DocumentParser._iter_auto(source, start, stop)
+    
+    @staticmethod
+    def _iter_with_pypdf2(source: DocumentSource, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+        """Extract PDF pages using PyPDF2"""
+        with _open_source(source) as file:
+            pdf_reader = _pdf_reader(file)
+            total = len(pdf_reader.pages)
+            for index in range(start, total if stop is None else min(stop, total)):
+                text = pdf_reader.pages[index].extract_text() or ""
+                yield {'kind': 'page', 'index': index + 1, 'total': total, 'text': text, 'extractor': 'pypdf2'}
+    
+    @staticmethod
+    def _iter_with_pdfplumber(source: DocumentSource, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+        """Extract PDF pages using pdfplumber (better for complex PDFs)"""
+        with _open_source(source) as file, _open_pdfplumber(file) as pdf:
+            total = len(pdf.pages)
+            for index in range(start, total if stop is None else min(stop, total)):
+                page = pdf.pages[index]
+                text = page.extract_text() or ""
+                # Release the page's parsed layout objects as we go
+                page.close()
+                yield {'kind': 'page', 'index': index + 1, 'total': total, 'text': text, 'extractor': 'pdfplumber'}
+    
+    @staticmethod
+    def _iter_auto(source: DocumentSource, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Extract PDF pages with PyPDF2, falling back to pdfplumber per page
+        
+        The file is opened once. pdfplumber is only set up once a page comes
+        back empty or garbled, and its text is kept only if it is better.
+        """
+        with _open_source(source) as file:
+            try:
+                pdf_reader = _pdf_reader(file)
+                total = len(pdf_reader.pages)
+            except Exception as e:
+                logger.warning(f"PyPDF2 could not read {_source_name(source)}, using pdfplumber: {e}")
+                pdf_reader = None
+            
+            plumber = None
+            fallbacks = 0
+            try:
+                if pdf_reader is None:
+                    plumber = _open_pdfplumber(file)
+                    total = len(plumber.pages)
+                
+                for index in range(start, total if stop is None else min(stop, total)):
+                    text, extractor = "", None
+                    if pdf_reader is not None:
+                        try:
+                            text, extractor = pdf_reader.pages[index].extract_text() or "", 'pypdf2'
+                        except Exception as e:
+                            logger.debug(f"PyPDF2 failed on page {index + 1}: {e}")
+                    
+                    if extractor is None or _is_poor_text(text):
+                        if plumber is None:
+                            plumber = _open_pdfplumber(file)
+                        page = plumber.pages[index]
+                        fallback_text = page.extract_text() or ""
+                        page.close()
+                        
+                        if (extractor is None or not _is_poor_text(fallback_text)
+                                or _alnum_count(fallback_text) > _alnum_count(text)):
+                            text, extractor = fallback_text, 'pdfplumber'
+                            fallbacks += 1
+                    
+                    yield {'kind': 'page', 'index': index + 1, 'total': total, 'text': text, 'extractor': extractor}
+            finally:
+                if plumber is not None:
+                    plumber.close()
+                if fallbacks:
+                    logger.info(f"Used pdfplumber for {fallbacks} page(s) of {_source_name(source)}")
+    
+    @staticmethod
+    def parse_docx(file_path: str, max_chars: Optional[int] = None) -> Optional[str]:
         """
         Parse Word document and extract text
         
         Args:
             file_path: Path to Word document
+            max_chars: Stop once this many characters are extracted
         
         Returns:
             Extracted text or None if parsing fails
@@ -75,32 +306,109 @@ class DocumentParser:
             return None
         
         try:
-            doc = Document(file_path)
-            text = ""
-            
-            # Extract text from paragraphs
+            return DocumentParser._assemble(DocumentParser.iter_docx_paragraphs(file_path, max_chars))
+        except Exception as e:
+            logger.error(f"Error parsing Word document: {e}")
+            return None
+    
+    @staticmethod
+    def iter_docx_paragraphs(source: DocumentSource, max_chars: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Extract a Word document paragraph by paragraph, then table row by row
+        
+        Args:
+            source: Path to Word document, or its contents as bytes
+            max_chars: Stop once this many characters are extracted
+        
+        Yields:
+            Records with 'kind', 'index' (1-based), 'total', 'text' and 'offset'
+        """
+        from docx import Document
+        
+        with _open_source(source) as file:
+            doc = Document(file)
+        total = len(doc.paragraphs) + sum(len(table.rows) for table in doc.tables)
+        
+        def records():
+            index = 0
             for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            
-            # Extract text from tables
+                index += 1
+                yield {'kind': 'paragraph', 'index': index, 'total': total, 'text': paragraph.text}
             for table in doc.tables:
                 for row in table.rows:
-                    for cell in row.cells:
-                        text += cell.text + " "
-                    text += "\n"
+                    index += 1
+                    text = " ".join(cell.text for cell in row.cells)
+                    yield {'kind': 'table_row', 'index': index, 'total': total, 'text': text}
+        
+        return DocumentParser._with_offsets(records(), None, max_chars)
+    
+    @staticmethod
+    def _with_offsets(records: Iterable[Dict], max_pages: Optional[int],
+                      max_chars: Optional[int]) -> Iterator[Dict]:
+        """Add document offsets to records and stop at the page/character budget"""
+        offset = 0
+        for count, record in enumerate(records, 1):
+            if max_pages is not None and count > max_pages:
+                return
             
-            return text.strip()
-        except Exception as e:
-            logger.error(f"Error parsing Word document: {e}")
-            return None
+            text = record['text']
+            if max_chars is not None and offset + len(text) >= max_chars:
+                yield {**record, 'text': text[:max(0, max_chars - offset)], 'offset': offset}
+                return
+            
+            yield {**record, 'offset': offset}
+            if text:
+                offset += len(text) + 1  # Records are joined with newlines
+    
+    @staticmethod
+    def _assemble(records: Iterable[Dict],
+                  progress_callback: Optional[Callable[[str, int, int], None]] = None) -> str:
+        """Join record texts in one pass"""
+        parts = []
+        for record in records:
+            if record['text']:
+                parts.append(record['text'])
+            if progress_callback:
+                progress_callback("parse", record['index'], record['total'])
+        return "\n".join(parts).strip()
     
     @staticmethod
-    def parse_document(file_path: str) -> Optional[str]:
+    def iter_document(source: DocumentSource, max_pages: Optional[int] = None,
+                      max_chars: Optional[int] = None, filename: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Auto-detect document type and extract it record by record
+        
+        Args:
+            source: Path to document, or its contents as bytes
+            max_pages: Stop after this many PDF pages
+            max_chars: Stop once this many characters are extracted
+            filename: Name used to detect the type (required for in-memory contents)
+        
+        Yields:
+            Page (PDF) or paragraph/table row (Word) records
+        """
+        file_extension = Path(filename or (source if _is_path(source) else "")).suffix.lower()
+        
+        if file_extension == '.pdf':
+            return DocumentParser.iter_pdf_pages(source, 'auto', max_pages, max_chars)
+        elif file_extension in ['.docx', '.doc']:
+            return DocumentParser.iter_docx_paragraphs(source, max_chars)
+        else:
+            logger.error(f"Unsupported file format: {file_extension}")
+            return iter(())
+    
+    @staticmethod
+    def parse_document(file_path: str,
+                       progress_callback: Optional[Callable[[str, int, int], None]] = None,
+                       max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> Optional[str]:
         """
         Auto-detect document type and parse
         
         Args:
             file_path: Path to document
+            progress_callback: Optional callable("parse", pages_done, total_pages) for PDFs
+            max_pages: Stop after this many PDF pages
+            max_chars: Stop once this many characters are extracted
         
         Returns:
             Extracted text or None if parsing fails
@@ -108,17 +416,38 @@ class DocumentParser:
         file_extension = Path(file_path).suffix.lower()
         
         if file_extension == '.pdf':
-            # Try pdfplumber first, fallback to PyPDF2
-            text = DocumentParser.parse_pdf(file_path, method='pdfplumber')
-            if not text or len(text) < 50:  # If extraction failed or too short
-                text = DocumentParser.parse_pdf(file_path, method='pypdf2')
-            return text
+            # Single pass: PyPDF2 per page, pdfplumber only for pages it handles badly
+            return DocumentParser.parse_pdf(file_path, 'auto', progress_callback, max_pages, max_chars)
         elif file_extension in ['.docx', '.doc']:
-            return DocumentParser.parse_docx(file_path)
+            return DocumentParser.parse_docx(file_path, max_chars)
         else:
             logger.error(f"Unsupported file format: {file_extension}")
             return None
     
+    @staticmethod
+    def parse_bytes(data: Union[bytes, bytearray, memoryview], filename: str,
+                    progress_callback: Optional[Callable[[str, int, int], None]] = None,
+                    max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> Optional[str]:
+        """
+        Parse a document held in memory, e.g. an upload, without writing it to disk
+        
+        Args:
+            data: Document contents
+            filename: Original file name, used to detect the type
+            progress_callback: Optional callable("parse", pages_done, total_pages)
+            max_pages: Stop after this many PDF pages
+            max_chars: Stop once this many characters are extracted
+        
+        Returns:
+            Extracted text or None if parsing fails
+        """
+        try:
+            records = DocumentParser.iter_document(data, max_pages, max_chars, filename=filename)
+            return DocumentParser._assemble(records, progress_callback)
+        except Exception as e:
+            logger.error(f"Error parsing uploaded document {filename}: {e}")
+            return None
+    
     @staticmethod
     def get_document_info(file_path: str) -> dict:
         """Get basic document information"""
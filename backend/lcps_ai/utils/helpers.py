@@ -1,11 +1,17 @@
 """
 Helper utilities for the AI Assistant
 """
+import os
 from datetime import datetime, timedelta
 from typing import Dict, List
 import re
 
 
+def is_headless() -> bool:
+    """Whether running as a service (no voice, browser or other interactive side-effects)"""
+    return os.environ.get('LCPS_AI_HEADLESS', '0') in ['1', 'true', 'True']
+
+
 def parse_date(date_str: str) -> str:
     """Parse various date formats to ISO format"""
     # Common date patterns
@@ -61,6 +67,14 @@ def get_day_of_week(date_str: str = None) -> str:
     return dt.strftime('%A')
 
 
+def resolve_day(day: str) -> str:
+    """Day name for a day entity: a day name, or 'today', 'tomorrow' or 'yesterday'"""
+    offsets = {'today': 0, 'tomorrow': 1, 'yesterday': -1}
+    if day in offsets:
+        return (datetime.now() + timedelta(days=offsets[day])).strftime('%A')
+    return day
+
+
 def is_date_approaching(date_str: str, days: int = 7) -> bool:
     """Check if a date is within specified days"""
     try:
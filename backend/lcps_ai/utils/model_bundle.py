@@ -0,0 +1,186 @@
+"""
+Offline model bundle: the configured models saved locally as safetensors
+"""
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import config.settings as settings
+from utils.logger import logger
+
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Model kinds, which decide how a model is downloaded and saved
+KIND_CAUSAL_LM = 'causal-lm'
+KIND_SEQ2SEQ = 'seq2seq'
+KIND_SENTENCE_TRANSFORMER = 'sentence-transformer'
+
+
+def configured_models() -> Dict[str, str]:
+    """Map every model the assistant can load to its kind"""
+    models = {
+        settings.CONVERSATIONAL_MODEL: KIND_CAUSAL_LM,
+        settings.SENTENCE_TRANSFORMER_MODEL: KIND_SENTENCE_TRANSFORMER,
+    }
+    for model_name in settings.SUMMARIZATION_TIERS.values():
+        models[model_name] = KIND_SEQ2SEQ
+    return models
+
+
+def load_manifest() -> Dict:
+    """Read the bundle manifest (empty if nothing is bundled yet)"""
+    manifest_path = settings.MODEL_BUNDLE_DIR / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {'version': MANIFEST_VERSION, 'models': {}}
+    with open(manifest_path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def resolve(model_name: str) -> Optional[str]:
+    """
+    Find the bundled copy of a model
+    
+    Only file sizes are checked here, to keep startup cheap; use
+    verify_bundle() for a full hash check.
+    
+    Args:
+        model_name: Hub model ID from settings
+    
+    Returns:
+        Path of the bundled model, or None if it is not bundled
+    
+    Raises:
+        FileNotFoundError: If the model is not bundled and MODELS_OFFLINE is set
+    """
+    entry = load_manifest()['models'].get(model_name)
+    if entry:
+        path = settings.MODEL_BUNDLE_DIR / entry['path']
+        problems = _check_files(path, entry['files'], verify_hashes=False)
+        if not problems:
+            return str(path)
+        logger.warning(f"Ignoring incomplete bundle for {model_name}: {problems[0]}")
+    
+    if settings.MODELS_OFFLINE:
+        raise FileNotFoundError(
+            f"Model {model_name} is not bundled and offline mode is on. Run: python bundle_models.py"
+        )
+    return None
+
+
+def locate(model_name: str) -> Tuple[str, Dict]:
+    """
+    Get what to pass to transformers' from_pretrained() for a model
+    
+    Returns:
+        (name or path, keyword arguments): the bundle, strictly local, if
+        there is one; otherwise the hub ID with the download cache
+    """
+    path = resolve(model_name)
+    if path:
+        return path, {'local_files_only': True}
+    return model_name, {'cache_dir': str(settings.MODELS_DIR)}
+
+
+def bundle_model(model_name: str, kind: Optional[str] = None) -> Dict:
+    """
+    Download a model (if needed) and save it into the bundle
+    
+    Args:
+        model_name: Hub model ID
+        kind: Model kind (looked up from settings if omitted)
+    
+    Returns:
+        The manifest entry written for the model
+    """
+    kind = kind or configured_models().get(model_name)
+    if kind is None:
+        raise ValueError(f"Unknown model {model_name}; pass its kind explicitly")
+    
+    target = settings.MODEL_BUNDLE_DIR / model_name.replace('/', '--')
+    # Save next to the target and swap it in, so a failed run never leaves a half-written bundle
+    staging = target.with_name(target.name + '.partial')
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.parent.mkdir(parents=True, exist_ok=True)
+    
+    logger.info(f"Bundling {model_name} ({kind})...")
+    if kind == KIND_SENTENCE_TRANSFORMER:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(model_name, cache_folder=str(settings.MODELS_DIR))
+        model.save(str(staging), safe_serialization=True)
+    else:
+        from transformers import AutoModelForCausalLM, AutoModelForSeq2SeqLM, AutoTokenizer
+        model_class = AutoModelForCausalLM if kind == KIND_CAUSAL_LM else AutoModelForSeq2SeqLM
+        tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=str(settings.MODELS_DIR))
+        model = model_class.from_pretrained(model_name, cache_dir=str(settings.MODELS_DIR))
+        model.save_pretrained(str(staging), safe_serialization=True)
+        tokenizer.save_pretrained(str(staging))
+    
+    files = {}
+    for file_path in sorted(staging.rglob('*')):
+        if file_path.is_file():
+            files[file_path.relative_to(staging).as_posix()] = {
+                'sha256': _hash_file(file_path),
+                'size': file_path.stat().st_size
+            }
+    
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+    
+    entry = {
+        'kind': kind,
+        'path': target.name,
+        'files': files,
+        'bundled_at': datetime.now().isoformat()
+    }
+    manifest = load_manifest()
+    manifest['models'][model_name] = entry
+    _save_manifest(manifest)
+    logger.info(f"Bundled {model_name}: {len(files)} files in {target}")
+    return entry
+
+
+def verify_bundle() -> Dict[str, List[str]]:
+    """
+    Check every bundled model against the manifest hashes
+    
+    Returns:
+        Problems found per model (an empty list means the model is intact)
+    """
+    return {
+        model_name: _check_files(settings.MODEL_BUNDLE_DIR / entry['path'], entry['files'], verify_hashes=True)
+        for model_name, entry in load_manifest()['models'].items()
+    }
+
+
+def _check_files(path: Path, files: Dict[str, Dict], verify_hashes: bool) -> List[str]:
+    problems = []
+    for relative, expected in files.items():
+        file_path = path / relative
+        if not file_path.is_file():
+            problems.append(f"{relative} is missing")
+        elif file_path.stat().st_size != expected['size']:
+            problems.append(f"{relative} has the wrong size")
+        elif verify_hashes and _hash_file(file_path) != expected['sha256']:
+            problems.append(f"{relative} does not match its hash")
+    return problems
+
+
+def _hash_file(file_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _save_manifest(manifest: Dict):
+    manifest_path = settings.MODEL_BUNDLE_DIR / MANIFEST_NAME
+    temp_path = manifest_path.with_suffix('.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
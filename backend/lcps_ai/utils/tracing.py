@@ -0,0 +1,137 @@
+"""
+Per-stage latency tracing for request handling
+
+A trace times the named stages of one request (cache lookup, intent
+detection, handler, model call, ...) with monotonic clocks. Code marks a
+stage with `with tracing.span("name"):`. Outside a sampled trace that
+returns a shared no-op context, so unsampled requests pay one context
+variable lookup per stage.
+"""
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+import config.settings as settings
+
+
+_current_trace: ContextVar[Optional['Trace']] = ContextVar('lcps_ai_trace', default=None)
+_NO_SPAN = nullcontext()
+
+
+def _setup_trace_logger() -> logging.Logger:
+    """Traces go to the main log, or only to TRACE_LOG_FILE (one JSON object per line) when set"""
+    trace_logger = logging.getLogger("AI_Assistant.trace")
+    if settings.TRACE_LOG_FILE and not trace_logger.handlers:
+        handler = logging.FileHandler(settings.TRACE_LOG_FILE, encoding='utf-8')
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        trace_logger.addHandler(handler)
+        trace_logger.setLevel(logging.INFO)
+        trace_logger.propagate = False
+    return trace_logger
+
+
+trace_logger = _setup_trace_logger()
+
+
+class Trace:
+    """Timed stages of one request"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.spans: List[Dict] = []
+        self.attributes: Dict = {}
+        self.total_ms: Optional[float] = None
+        self._depth = 0
+        self._start = time.perf_counter()
+    
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time a stage; stages opened inside it are recorded one level deeper"""
+        start = time.perf_counter()
+        # Recorded on entry so spans stay in start order
+        record = {
+            'name': name,
+            'depth': self._depth,
+            'start_ms': _ms(start - self._start),
+            'duration_ms': None
+        }
+        self.spans.append(record)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            record['duration_ms'] = _ms(time.perf_counter() - start)
+    
+    def finish(self):
+        """Stop the clock on the whole trace"""
+        self.total_ms = _ms(time.perf_counter() - self._start)
+    
+    def to_dict(self) -> Dict:
+        """The trace as JSON-serializable data"""
+        return {
+            'trace': self.name,
+            'total_ms': self.total_ms,
+            **self.attributes,
+            'spans': self.spans
+        }
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _sampled() -> bool:
+    rate = settings.TRACE_SAMPLE_RATE
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+@contextmanager
+def trace(name: str, force: bool = False) -> Iterator[Optional[Trace]]:
+    """
+    Trace a request
+    
+    Inside an active trace this is just a span of it, so an entry point
+    can be traced both on its own and as part of a caller's trace.
+    
+    Args:
+        name: Trace name
+        force: Trace even if the request is not sampled
+    
+    Yields:
+        The active trace, or None if the request is not traced
+    """
+    active = _current_trace.get()
+    if active is not None:
+        with active.span(name):
+            yield active
+        return
+    
+    if not (force or _sampled()):
+        yield None
+        return
+    
+    current = Trace(name)
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+        current.finish()
+        trace_logger.info(json.dumps(current.to_dict(), ensure_ascii=False))
+
+
+def span(name: str):
+    """Time a stage of the active trace (a no-op when nothing is traced)"""
+    current = _current_trace.get()
+    return _NO_SPAN if current is None else current.span(name)
+
+
+def annotate(**attributes):
+    """Attach attributes (e.g. the detected intent) to the active trace"""
+    current = _current_trace.get()
+    if current is not None:
+        current.attributes.update(attributes)
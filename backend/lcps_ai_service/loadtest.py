@@ -0,0 +1,458 @@
+"""Load generator for the LCPS AI HTTP bridge.
+
+Replays a JSONL corpus of queries ({"query": ..., "userId": ..., "intent": ...}
+per line; "intent" is an optional label used when a request fails) against
+POST /query and reports throughput, latency percentiles per intent, error and
+429 rates, and the server's /metrics sampled during the run.
+
+Two load models:
+- closed loop (--concurrency N): N clients each send their next request as
+  soon as the previous one is answered
+- open loop (--rate R): requests arrive as a Poisson process at R per second
+  whether or not earlier ones have finished; latency is measured from the
+  scheduled arrival, so queueing delay is included
+
+Examples (from backend/lcps_ai_service):
+    python loadtest.py --start stub --concurrency 8 --duration 30
+    python loadtest.py --start real --rate 5 --requests 200 --output report.json
+    python loadtest.py --url http://127.0.0.1:8001 --corpus queries.jsonl
+    python loadtest.py --write-corpus queries.jsonl     # dump the built-in corpus
+
+--start launches a local service on a free port against scratch storage (the
+real assistant database is untouched) and stops it afterwards; nothing leaves
+the machine unless the corpus asks for weather.
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+SERVICE_DIR = Path(__file__).resolve().parent
+LCPS_DIR = Path(os.environ.get("LCPS_AI_DIR", str(SERVICE_DIR.parent / "lcps_ai"))).resolve()
+
+# Queries per intent for the built-in corpus (no weather: that would call the weather API)
+CORPUS_TEMPLATES: Dict[str, List[str]] = {
+    "schedule": ["What is my schedule today?", "Show my timetable for Monday", "Which classes do I have on Friday?"],
+    "deadline": ["Show my exam deadlines", "When is the fee deadline?", "List my assignment deadlines"],
+    "task": ["Show my tasks", "What is on my todo list?", "Show my reminders"],
+    "calculate": ["calculate 12 * (3 + 4)", "calculate 250 / 8", "compute 2 ** 10 minus 24"],
+    "youtube": ["search youtube for calculus lectures", "search youtube for python tutorials"],
+    "joke": ["tell me a joke", "make me laugh"],
+    "conversation": ["hello, how are you?", "good morning", "hey, what's up?"],
+}
+
+# Launches server.py with scratch storage (and, for "stub", the deterministic stub models)
+_LAUNCHER = """
+import runpy, sys
+sys.path[:0] = [{lcps_dir!r}, {service_dir!r}]
+from pathlib import Path
+from benchmarks.fixtures import use_scratch_storage
+use_scratch_storage(Path({scratch!r}))
+if {stub!r}:
+    from benchmarks.stubs import install_stub_models
+    install_stub_models()
+runpy.run_path({server!r}, run_name="__main__")
+"""
+
+
+def default_corpus(users: int = 25, seed: int = 0) -> List[Dict[str, Any]]:
+    """A shuffled corpus mixing every template across ``users`` user IDs."""
+    rng = random.Random(seed)
+    corpus = [
+        {"query": query, "userId": f"user-{rng.randrange(users):03d}", "intent": intent}
+        for intent, queries in CORPUS_TEMPLATES.items()
+        for query in queries
+        for _ in range(4)
+    ]
+    rng.shuffle(corpus)
+    return corpus
+
+
+def load_corpus(path: Path) -> List[Dict[str, Any]]:
+    corpus = []
+    with open(path, "r", encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if not str(entry.get("query", "")).strip():
+                raise ValueError(f"{path}:{number}: entry has no 'query'")
+            corpus.append(entry)
+    if not corpus:
+        raise ValueError(f"{path} has no queries")
+    return corpus
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return ordered[max(0, min(len(ordered), math.ceil(fraction * len(ordered))) - 1)]
+
+
+class Client:
+    """Sends queries to one service base URL."""
+
+    def __init__(self, url: str, timeout: float) -> None:
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> tuple:
+        """Return (status, parsed JSON body or None)."""
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            data = json.dumps(body).encode("utf-8") if body is not None else None
+            headers = {"Content-Type": "application/json"} if data is not None else {}
+            connection.request(method, self.prefix + path, body=data, headers=headers)
+            response = connection.getresponse()
+            raw = response.read()
+            try:
+                payload = json.loads(raw.decode("utf-8")) if raw else None
+            except ValueError:
+                payload = None
+            return response.status, payload
+        finally:
+            connection.close()
+
+    def metrics(self) -> Optional[Dict[str, Any]]:
+        try:
+            status, payload = self.request("GET", "/metrics")
+        except OSError:
+            return None
+        return payload.get("data") if status == 200 and payload else None
+
+
+class Recorder:
+    """Collects one record per request (thread-safe)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.records: List[Dict[str, Any]] = []
+
+    def send(self, client: Client, entry: Dict[str, Any], scheduled: Optional[float] = None) -> None:
+        started = time.perf_counter()
+        status, intent, error = 0, entry.get("intent") or "unknown", None
+        try:
+            status, payload = client.request("POST", "/query", {"query": entry["query"], "userId": entry.get("userId")})
+            if status == 200 and payload:
+                intent = payload.get("data", {}).get("intent") or intent
+            elif payload and not payload.get("success", True):
+                error = payload.get("message")
+        except OSError as e:
+            error = f"{type(e).__name__}: {e}"
+        finished = time.perf_counter()
+        record = {
+            "intent": intent,
+            "status": status,
+            # Open loop: from the scheduled arrival, so time spent waiting for a free client counts
+            "latency": finished - (scheduled if scheduled is not None else started),
+            "error": error,
+        }
+        with self._lock:
+            self.records.append(record)
+
+
+class MetricsSampler(threading.Thread):
+    """Polls /metrics during the run."""
+
+    def __init__(self, client: Client, interval: float) -> None:
+        super().__init__(name="metrics-sampler", daemon=True)
+        self.client = client
+        self.interval = interval
+        self.samples: List[Dict[str, Any]] = []
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            sample = self.client.metrics()
+            if sample:
+                self.samples.append(sample)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def _entries(corpus: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    while True:
+        yield from corpus
+
+
+def run_closed_loop(client: Client, corpus: List[Dict[str, Any]], concurrency: int,
+                    requests: Optional[int], duration: Optional[float], recorder: Recorder) -> None:
+    entries = _entries(corpus)
+    lock = threading.Lock()
+    sent = 0
+    deadline = time.perf_counter() + duration if duration else None
+
+    def next_entry() -> Optional[Dict[str, Any]]:
+        nonlocal sent
+        with lock:
+            if (requests is not None and sent >= requests) or (deadline and time.perf_counter() >= deadline):
+                return None
+            sent += 1
+            return next(entries)
+
+    def worker() -> None:
+        while True:
+            entry = next_entry()
+            if entry is None:
+                return
+            recorder.send(client, entry)
+
+    threads = [threading.Thread(target=worker, name=f"client-{index}") for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_open_loop(client: Client, corpus: List[Dict[str, Any]], rate: float, max_in_flight: int,
+                  requests: Optional[int], duration: Optional[float], recorder: Recorder, seed: int) -> None:
+    rng = random.Random(seed)
+    entries = _entries(corpus)
+    start = time.perf_counter()
+    arrival = start
+    sent = 0
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="client") as pool:
+        while (requests is None or sent < requests) and (not duration or arrival - start < duration):
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(recorder.send, client, next(entries), arrival)
+            sent += 1
+            arrival += rng.expovariate(rate)
+
+
+def _latency_stats(latencies: List[float]) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "meanMs": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p50Ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95Ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99Ms": round(percentile(ordered, 0.99) * 1000, 2),
+        "maxMs": round(ordered[-1] * 1000, 2),
+    }
+
+
+def _server_report(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]],
+                   samples: List[Dict[str, Any]], elapsed: float) -> Optional[Dict[str, Any]]:
+    if not before or not after:
+        return None
+    report: Dict[str, Any] = {
+        "pid": after["pid"],
+        "modelsReady": after.get("modelsReady"),
+        "requests": after["requests"]["total"] - before["requests"]["total"],
+        "cpuSeconds": round(after["process"]["cpuSeconds"] - before["process"]["cpuSeconds"], 3),
+        "peakThreads": max([s["process"]["threads"] for s in samples] + [after["process"]["threads"]]),
+        "peakInFlight": max([s["requests"]["inFlight"] for s in samples] + [0]),
+        "samples": len(samples),
+    }
+    report["cpuUtilization"] = round(report["cpuSeconds"] / elapsed, 3) if elapsed else None
+    if "maxRssMb" in after["process"]:
+        report["maxRssMb"] = after["process"]["maxRssMb"]
+    query_before = before["requests"]["byRoute"].get("/query", {"count": 0, "totalMs": 0.0})
+    query_after = after["requests"]["byRoute"].get("/query", {"count": 0, "totalMs": 0.0})
+    count = query_after["count"] - query_before["count"]
+    if count:
+        # Time inside the server, excluding the network and client queueing
+        report["queryServiceMeanMs"] = round((query_after["totalMs"] - query_before["totalMs"]) / count, 2)
+    if after.get("pid") != before.get("pid"):
+        report["note"] = "metrics came from different worker processes; deltas are approximate"
+    return report
+
+
+def build_report(records: List[Dict[str, Any]], elapsed: float, mode: Dict[str, Any],
+                 server: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    total = len(records)
+    rate_limited = sum(1 for r in records if r["status"] == 429)
+    errors = sum(1 for r in records if r["status"] != 429 and not 200 <= r["status"] < 300)
+    statuses = Counter(str(r["status"] or "connection error") for r in records)
+
+    ok = [r for r in records if 200 <= r["status"] < 300]
+    by_intent: Dict[str, List[float]] = {}
+    for record in ok:
+        by_intent.setdefault(record["intent"], []).append(record["latency"])
+
+    error_samples = sorted({r["error"] for r in records if r["error"]})[:5]
+    return {
+        "mode": mode,
+        "elapsedSeconds": round(elapsed, 3),
+        "requests": total,
+        "throughput": round(total / elapsed, 2) if elapsed else None,
+        "errorRate": round(errors / total, 4) if total else 0.0,
+        "rateLimitedRate": round(rate_limited / total, 4) if total else 0.0,
+        "statuses": dict(statuses),
+        "latency": _latency_stats([r["latency"] for r in ok]) if ok else None,
+        "latencyByIntent": {intent: _latency_stats(values) for intent, values in sorted(by_intent.items())},
+        "errorSamples": error_samples,
+        "server": server,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    mode = report["mode"]
+    load = f"{mode['concurrency']} concurrent clients" if mode["type"] == "closed" else f"{mode['rate']}/s open-loop arrivals"
+    print(f"\n{report['requests']} requests in {report['elapsedSeconds']:.1f}s ({load}): {report['throughput']} req/s")
+    print(f"errors {report['errorRate']:.2%}   429s {report['rateLimitedRate']:.2%}   statuses {report['statuses']}")
+    print(f"\n{'intent':<14}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    rows = list(report["latencyByIntent"].items())
+    if report["latency"]:
+        rows.append(("all", report["latency"]))
+    for intent, stats in rows:
+        print(f"{intent:<14}{stats['count']:>7}{stats['p50Ms']:>10}{stats['p95Ms']:>10}{stats['p99Ms']:>10}{stats['maxMs']:>10}")
+    for message in report["errorSamples"]:
+        print(f"  error: {message}")
+    server = report["server"]
+    if server:
+        print(f"\nserver (pid {server['pid']}): {server['requests']} requests, CPU {server['cpuSeconds']}s "
+              f"({server['cpuUtilization']:.0%} of one core), peak in-flight {server['peakInFlight']}, "
+              f"peak threads {server['peakThreads']}, max RSS {server.get('maxRssMb', '?')} MB, "
+              f"mean /query service time {server.get('queryServiceMeanMs', '?')} ms")
+        if "note" in server:
+            print(f"  note: {server['note']}")
+    else:
+        print("\nserver metrics unavailable (GET /metrics failed)")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_service(models: str, scratch: Path, ready_timeout: float) -> tuple:
+    """Start server.py on a free port; return (process, base URL) once it is ready."""
+    port = _free_port()
+    env = dict(os.environ, LCPS_AI_HOST="127.0.0.1", LCPS_AI_PORT=str(port), LCPS_AI_DIR=str(LCPS_DIR))
+    code = _LAUNCHER.format(
+        lcps_dir=str(LCPS_DIR),
+        service_dir=str(SERVICE_DIR),
+        scratch=str(scratch),
+        stub=models == "stub",
+        server=str(SERVICE_DIR / "server.py"),
+    )
+    with open(scratch / "service.log", "w", encoding="utf-8") as log:
+        process = subprocess.Popen([sys.executable, "-c", code], cwd=str(LCPS_DIR), env=env,
+                                   stdout=log, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}"
+    client = Client(url, timeout=5)
+    deadline = time.monotonic() + ready_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            status, payload = client.request("GET", "/ready")
+            if status == 200:
+                return process, url
+            if payload and "failed" in str(payload.get("message", "")):
+                break
+        except OSError:
+            pass
+        time.sleep(0.25)
+    stop_service(process)
+    raise RuntimeError(f"Service did not become ready; see {scratch / 'service.log'}")
+
+
+def stop_service(process: subprocess.Popen) -> None:
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test the LCPS AI service's /query endpoint")
+    parser.add_argument("--url", default="http://127.0.0.1:8001", help="Service to test (ignored with --start)")
+    parser.add_argument("--start", choices=["stub", "real"], help="Start a local service with stub or real models")
+    parser.add_argument("--corpus", type=Path, help="JSONL queries to replay (default: built-in mixed corpus)")
+    parser.add_argument("--write-corpus", type=Path, help="Write the built-in corpus to this file and exit")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=8, help="Closed loop: concurrent clients (default 8)")
+    load.add_argument("--rate", type=float, help="Open loop: mean arrivals per second")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open loop: most requests outstanding at once")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests")
+    parser.add_argument("--duration", type=float, help="Stop sending after this many seconds (default 30)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--metrics-interval", type=float, default=1.0, help="Seconds between /metrics samples")
+    parser.add_argument("--ready-timeout", type=float, default=600.0, help="Seconds to wait for a started service")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for corpus shuffling and arrival times")
+    parser.add_argument("--output", type=Path, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if args.write_corpus:
+        with open(args.write_corpus, "w", encoding="utf-8") as file:
+            for entry in default_corpus(seed=args.seed):
+                file.write(json.dumps(entry) + "\n")
+        print(f"Corpus written to {args.write_corpus}")
+        return 0
+
+    corpus = load_corpus(args.corpus) if args.corpus else default_corpus(seed=args.seed)
+    duration = args.duration if args.duration or args.requests else 30.0
+
+    scratch = Path(tempfile.mkdtemp(prefix="lcps-loadtest-"))
+    process = None
+    try:
+        url = args.url
+        if args.start:
+            print(f"[loadtest] Starting a local service with {args.start} models...")
+            process, url = start_service(args.start, scratch, args.ready_timeout)
+        client = Client(url, timeout=args.timeout)
+
+        if args.rate:
+            mode = {"type": "open", "rate": args.rate, "maxInFlight": args.max_in_flight}
+        else:
+            mode = {"type": "closed", "concurrency": args.concurrency}
+        mode.update(requests=args.requests, duration=duration, corpusSize=len(corpus), url=url, models=args.start)
+        print(f"[loadtest] {mode}")
+
+        recorder = Recorder()
+        before = client.metrics()
+        sampler = MetricsSampler(client, args.metrics_interval)
+        sampler.start()
+        started = time.perf_counter()
+        if args.rate:
+            run_open_loop(client, corpus, args.rate, args.max_in_flight, args.requests, duration, recorder, args.seed)
+        else:
+            run_closed_loop(client, corpus, args.concurrency, args.requests, duration, recorder)
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+        after = client.metrics()
+
+        report = build_report(recorder.records, elapsed, mode, _server_report(before, after, sampler.samples, elapsed))
+        print_report(report)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2)
+            print(f"\nReport written to {args.output}")
+        return 0 if report["requests"] else 1
+    finally:
+        if process is not None:
+            stop_service(process)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Pre-fork process supervisor for the LCPS AI HTTP bridge.
+
+The master process loads everything expensive (model weights) and then forks
+workers. Forked children share the master's memory pages copy-on-write, so the
+weights are held in RAM once no matter how many workers serve requests, and
+each worker has its own GIL.
+
+The master stays single-threaded while supervising: forking a process that
+has other threads running can leave locks held forever in the child.
+"""
+
+from __future__ import annotations
+
+import gc
+import os
+import signal
+import sys
+import time
+import traceback
+from typing import Callable, Dict, Tuple
+
+# A worker that dies sooner than this after starting counts as crash-looping
+MIN_HEALTHY_UPTIME = 5.0
+MAX_RESTART_DELAY = 30.0
+
+
+def can_fork() -> bool:
+    return hasattr(os, "fork")
+
+
+def run_prefork(workers: int, worker_main: Callable[[int, int], None]) -> None:
+    """Fork ``workers`` children running ``worker_main(index, generation)`` and restart them when they die.
+
+    ``generation`` counts how many times the worker slot has been started, so
+    one-off duties (such as resuming unfinished jobs) can run only in the
+    first generation. Returns once SIGTERM/SIGINT has stopped every worker.
+    """
+    children: Dict[int, Tuple[int, float]] = {}  # pid -> (index, started at)
+    generations = [0] * workers
+    stopping = False
+
+    def spawn(index: int) -> None:
+        generation = generations[index]
+        generations[index] += 1
+        pid = os.fork()
+        if pid == 0:
+            # Child: drop the master's signal handlers and never return into its loop
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                worker_main(index, generation)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        children[pid] = (index, time.monotonic())
+        print(f"[lcps_ai_service] Worker {index} started (pid {pid})")
+
+    def stop(signum, frame) -> None:  # noqa: ARG001
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # Objects loaded so far live for the whole process; keep the collector from
+    # touching (and so un-sharing) their pages in every worker.
+    gc.freeze()
+
+    for index in range(workers):
+        spawn(index)
+
+    restart_delay = 1.0
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        if pid not in children:
+            continue
+
+        index, started = children.pop(pid)
+        if stopping:
+            continue
+
+        print(f"[lcps_ai_service] Worker {index} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}; restarting")
+        if time.monotonic() - started < MIN_HEALTHY_UPTIME:
+            # Back off so a worker that fails on startup does not spin the CPU
+            time.sleep(restart_delay)
+            restart_delay = min(restart_delay * 2, MAX_RESTART_DELAY)
+        else:
+            restart_delay = 1.0
+        if not stopping:
+            spawn(index)
@@ -0,0 +1,207 @@
+"""On-demand profiling hooks for the LCPS AI HTTP bridge.
+
+Two opt-in tools, both off by default and both per process (each pre-forked
+worker keeps its own state and writes its own files, named with its pid):
+
+- Request profiling: a sampled fraction of requests runs under cProfile. Each
+  capture is written as a .pstats file (for pstats, snakeviz, ...) and a
+  .folded file of collapsed stacks (for flamegraph.pl / speedscope). The
+  stacks are rebuilt from cProfile's caller edges, so time is split
+  proportionally where a function has several callers.
+- Memory snapshots: tracemalloc snapshots dumped to .tracemalloc files, each
+  reported with its top allocation sites and its growth since the previous
+  snapshot.
+
+While off, a request pays one float comparison and tracemalloc is not
+running at all.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Deepest call path written to a .folded file
+MAX_STACK_DEPTH = 64
+# Call paths under this fraction of the profile's total time are not expanded
+MIN_PATH_FRACTION = 1e-4
+# Allocation sites listed per memory snapshot report
+TOP_ALLOCATIONS = 20
+
+_NO_PROFILE = nullcontext()
+
+
+class RequestProfiler:
+    """Samples requests into cProfile captures."""
+
+    def __init__(self, directory: Path, rate: float = 0.0) -> None:
+        self.directory = directory
+        self.rate = rate
+        self.captured = 0
+        self.skipped = 0
+        # One capture at a time: Python 3.12+ allows a single active profiler
+        # per process, and serializing also bounds the overhead under load.
+        self._busy = threading.Lock()
+
+    def maybe_profile(self, label: str):
+        """Profile the enclosed request if it is sampled (a shared no-op context otherwise)."""
+        if self.rate <= 0 or (self.rate < 1 and random.random() >= self.rate):
+            return _NO_PROFILE
+        return self._profile(label)
+
+    @contextmanager
+    def _profile(self, label: str) -> Iterator[None]:
+        if not self._busy.acquire(blocking=False):
+            self.skipped += 1
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # Another profiler is active in this process
+            self._busy.release()
+            self.skipped += 1
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            # Free for the next request before the (slower) file writes
+            self._busy.release()
+            self._save(profiler, label)
+
+    def _save(self, profiler: cProfile.Profile, label: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{os.getpid()}-{label}"
+        stats = pstats.Stats(profiler)
+        stats.dump_stats(str(self.directory / f"{stem}.pstats"))
+        with open(self.directory / f"{stem}.folded", "w", encoding="utf-8") as file:
+            for stack, microseconds in folded_stacks(stats):
+                file.write(f"{stack} {microseconds}\n")
+        self.captured += 1
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "rate": self.rate,
+            "directory": str(self.directory),
+            "captured": self.captured,
+            "skipped": self.skipped,
+        }
+
+
+def _frame_label(func: Tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == "~":  # Built-in functions
+        return name.replace(";", ":")
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ":")
+
+
+def folded_stacks(stats: pstats.Stats) -> List[Tuple[str, int]]:
+    """Collapsed stacks ("root;caller;callee microseconds") rebuilt from cProfile's caller graph."""
+    entries = stats.stats  # type: ignore[attr-defined]
+    children: Dict[Any, List[Tuple[Any, float]]] = defaultdict(list)
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            children[caller].append((func, edge[3]))  # Cumulative time spent in func when called from caller
+
+    totals: Counter = Counter()
+    min_time = stats.total_tt * MIN_PATH_FRACTION  # type: ignore[attr-defined]
+
+    def walk(func: Any, path: Tuple[str, ...], on_path: frozenset, share: float) -> None:
+        _, _, self_time, cumulative, _ = entries[func]
+        path = path + (_frame_label(func),)
+        if self_time * share > 0:
+            totals[";".join(path)] += self_time * share
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for child, edge_time in children.get(func, ()):
+            child_cumulative = entries[child][3]
+            if child in on_path or child_cumulative <= 0 or share * edge_time < min_time:
+                continue  # Recursion is folded into the outermost call; tiny paths are dropped
+            walk(child, path, on_path | {child}, share * edge_time / child_cumulative)
+
+    for func, (_, _, _, _, callers) in entries.items():
+        if not callers:
+            walk(func, (), frozenset({func}), 1.0)
+
+    return [(stack, int(seconds * 1_000_000)) for stack, seconds in totals.most_common() if seconds >= 1e-6]
+
+
+class MemoryTracker:
+    """tracemalloc snapshots and diffs on demand."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._count = 0
+
+    @staticmethod
+    def start(frames: int = 25) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self._previous = None
+
+    def snapshot(self, group_by: str = "lineno") -> Dict[str, Any]:
+        """Dump a snapshot and report its top allocation sites and the growth since the previous one."""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running; start it first")
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._count += 1
+        path = self.directory / f"memory-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._count}.tracemalloc"
+        snapshot.dump(str(path))
+
+        current, peak = tracemalloc.get_traced_memory()
+        report: Dict[str, Any] = {
+            "pid": os.getpid(),
+            "file": str(path),
+            "tracedMb": round(current / 2**20, 2),
+            "peakMb": round(peak / 2**20, 2),
+            "top": [
+                {"site": str(stat.traceback), "sizeKb": round(stat.size / 1024, 1), "count": stat.count}
+                for stat in snapshot.statistics(group_by)[:TOP_ALLOCATIONS]
+            ],
+        }
+        if self._previous is not None:
+            report["growth"] = [
+                {
+                    "site": str(stat.traceback),
+                    "sizeDiffKb": round(stat.size_diff / 1024, 1),
+                    "countDiff": stat.count_diff,
+                    "sizeKb": round(stat.size / 1024, 1),
+                }
+                for stat in snapshot.compare_to(self._previous, group_by)[:TOP_ALLOCATIONS]
+            ]
+        self._previous = snapshot
+        return report
+
+    def status(self) -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "pid": os.getpid(),
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else None,
+            "tracedMb": round(current / 2**20, 2),
+            "peakMb": round(peak / 2**20, 2),
+            "snapshots": self._count,
+        }
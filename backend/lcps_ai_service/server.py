@@ -4,37 +4,152 @@ This small server loads the LCPS AI assistant (copied into "backend/lcps_ai")
 once and exposes a minimal HTTP API that the Node/Express backend can call.
 
 Endpoints:
-- GET  /health
-- POST /query   { "query": "...", "userId": "..." }
+- GET  /health     liveness: the process is up and serving
+- GET  /ready      readiness: AI models are loaded (503 while warming up)
+- POST /query      { "query": "...", "userId": "...", "summaryTier": "fast|balanced|best", "timings": true }
+                   ("timings" adds the per-stage latency trace of the request to the response)
+- POST /summarize  { "path": "...", "summaryTier": "...", "maxLength": 150, "minLength": 50 }
+                   or an uploaded document: multipart/form-data with a "file" part (plus the
+                   fields above), or the raw bytes with "X-Filename" (or ?filename=) and the
+                   options as query parameters
+- GET  /jobs/{id}  progress and result of a queued summarization job
+- GET  /metrics    request counts, latencies and resource use of the answering process
+- GET/POST /admin/profile         request profiling status / { "rate": 0.05 } to sample requests
+- GET  /admin/memory              tracemalloc status
+- POST /admin/memory/start        { "frames": 25 } start tracemalloc
+- POST /admin/memory/snapshot     dump a snapshot; reports top allocations and growth since the last one
+- POST /admin/memory/stop
+                   Admin endpoints need the X-Admin-Token header when LCPS_AI_ADMIN_TOKEN is set,
+                   and otherwise accept loopback clients only.
 
 Notes:
 - Uses only the Python standard library (no FastAPI/Flask dependency).
-- First start can be slow because it loads Transformers models.
+- The port is bound immediately and Transformers models load in the background.
+  Model-free intents (tasks, schedule, deadlines, calculations, ...) are served
+  meanwhile; anything needing a model gets 503 with Retry-After until /ready.
+- LCPS_AI_WORKERS=N (N > 1, 0 = one per CPU core) serves from N pre-forked
+  processes. The master loads the models once, then forks workers that share
+  the weights copy-on-write. Each worker gets its own share of CPU threads
+  (LCPS_AI_WORKER_THREADS). Crashed workers are restarted.
+  LCPS_AI_PRELOAD_SUMMARIZER=1 also loads the interactive summarizer before forking.
+- LCPS_AI_TRACE_SAMPLE_RATE (0..1) logs per-stage latency traces for that fraction of
+  queries as JSON, to LCPS_AI_TRACE_LOG if set.
+- LCPS_AI_PROFILE_RATE (0..1) runs that fraction of /query and /summarize requests under
+  cProfile from startup; LCPS_AI_TRACEMALLOC=N starts tracemalloc with N frames.
+  Captures go to LCPS_AI_PROFILE_DIR (default storage/data/profiles). See profiling.py.
 """
 
 from __future__ import annotations
 
+import email.message
+import hmac
 import json
 import os
 import sys
+import threading
+import time
 import traceback
+from collections import Counter
 
 # Service mode should be headless (no opening browsers, no interactive UI side-effects).
 os.environ.setdefault('LCPS_AI_HEADLESS', '1')
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any, Dict
-
-
-def _json_response(handler: BaseHTTPRequestHandler, status: int, payload: Dict[str, Any]) -> None:
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+# Request bodies are read in blocks of this size
+_READ_BLOCK = 64 * 1024
+
+# Routes reported separately by /metrics; anything else is counted as "other"
+_METRIC_ROUTES = ("/health", "/ready", "/query", "/summarize", "/jobs/{id}", "/metrics")
+
+
+class _RequestError(Exception):
+    """A client error reported with a specific HTTP status"""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class _Metrics:
+    """Request counters behind GET /metrics (per process: each pre-forked worker keeps its own)"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._in_flight = 0
+        self._statuses: Counter = Counter()
+        self._routes: Dict[str, Dict[str, float]] = {}
+
+    def begin(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def end(self, route: str, status: int, seconds: float) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._statuses[str(status)] += 1
+            stats = self._routes.setdefault(route, {"count": 0, "totalMs": 0.0, "maxMs": 0.0})
+            stats["count"] += 1
+            stats["totalMs"] += seconds * 1000
+            stats["maxMs"] = max(stats["maxMs"], seconds * 1000)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            payload: Dict[str, Any] = {
+                "pid": os.getpid(),
+                "uptimeSeconds": round(time.time() - self._started, 3),
+                "requests": {
+                    "total": sum(self._statuses.values()),
+                    "inFlight": self._in_flight,
+                    "byStatus": dict(self._statuses),
+                    "byRoute": {route: dict(stats) for route, stats in self._routes.items()},
+                },
+            }
+        payload["process"] = {
+            "cpuSeconds": round(time.process_time(), 3),
+            "threads": threading.active_count(),
+        }
+        if resource is not None:
+            # ru_maxrss is in kilobytes on Linux and bytes on macOS
+            scale = 1 if sys.platform == "darwin" else 1024
+            payload["process"]["maxRssMb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20, 1)
+        return payload
+
+
+def _metric_route(path: str) -> str:
+    path = urlsplit(path).path.rstrip("/")
+    if path.startswith("/jobs/"):
+        return "/jobs/{id}"
+    return path if path in _METRIC_ROUTES else "other"
+
+
+metrics = _Metrics()
+
+
+def _json_response(
+    handler: BaseHTTPRequestHandler,
+    status: int,
+    payload: Dict[str, Any],
+    headers: Optional[Dict[str, str]] = None,
+) -> None:
     body = json.dumps(payload).encode("utf-8")
 
     handler.send_response(status)
     handler.send_header("Content-Type", "application/json; charset=utf-8")
     handler.send_header("Content-Length", str(len(body)))
+    for name, value in (headers or {}).items():
+        handler.send_header(name, value)
     # Helpful for local dev (Node calls this server, but CORS doesn't hurt)
     handler.send_header("Access-Control-Allow-Origin", "*")
-    handler.send_header("Access-Control-Allow-Headers", "Content-Type")
+    handler.send_header("Access-Control-Allow-Headers", "Content-Type, X-Filename")
     handler.send_header("Access-Control-Allow-Methods", "GET,POST,OPTIONS")
     handler.end_headers()
     handler.wfile.write(body)
@@ -49,6 +164,57 @@ def _read_json(handler: BaseHTTPRequestHandler) -> Dict[str, Any]:
         raise ValueError("Invalid JSON payload")
 
 
+def _read_body(handler: BaseHTTPRequestHandler, limit: int) -> bytearray:
+    """Stream the request body into one preallocated buffer, refusing bodies over the limit."""
+    length = handler.headers.get("content-length")
+    if length is None:
+        raise _RequestError(411, "Content-Length is required")
+    length = int(length)
+    if length > limit:
+        # The body is left unread, so the connection cannot be reused
+        handler.close_connection = True
+        raise _RequestError(413, f"Upload exceeds the {limit // (1024 * 1024)} MB limit")
+
+    body = bytearray(length)
+    view = memoryview(body)
+    received = 0
+    while received < length:
+        count = handler.rfile.readinto(view[received:received + _READ_BLOCK])
+        if not count:
+            raise _RequestError(400, "Incomplete request body")
+        received += count
+    return body
+
+
+def _parse_multipart(body: bytearray, content_type: str) -> Dict[str, Tuple[Optional[str], memoryview]]:
+    """Split a multipart/form-data body into {name: (filename, contents)} without copying part contents."""
+    header = email.message.Message()
+    header["content-type"] = content_type
+    boundary = header.get_param("boundary")
+    if not boundary:
+        raise ValueError("multipart/form-data body has no boundary")
+
+    delimiter = b"--" + str(boundary).encode("latin-1")
+    view = memoryview(body)
+    parts: Dict[str, Tuple[Optional[str], memoryview]] = {}
+    start = body.find(delimiter)
+    while start != -1:
+        start += len(delimiter)
+        if body[start:start + 2] == b"--":
+            break
+        end = body.find(b"\r\n" + delimiter, start)
+        headers_end = body.find(b"\r\n\r\n", start, end)
+        if end == -1 or headers_end == -1:
+            raise ValueError("Malformed multipart/form-data body")
+
+        part = email.message_from_bytes(bytes(body[start:headers_end]).lstrip(b"\r\n"))
+        name = part.get_param("name", header="content-disposition")
+        if name:
+            parts[str(name)] = (part.get_filename(), view[headers_end + 4:end])
+        start = end + 2
+    return parts
+
+
 # Resolve the LCPS AI folder.
 REPO_ROOT = Path(__file__).resolve().parents[2]
 # Default to the in-backend copy so the repo can delete the original "LCPS AI" folder.
@@ -62,13 +228,69 @@ if not LCPS_DIR.exists():
 sys.path.insert(0, str(LCPS_DIR))
 
 # Import after sys.path update
-from main import LCPSAssistant  # type: ignore
+from main import LCPSAssistant, ModelsNotReady  # type: ignore
+from modules.summary_jobs import SummaryJobQueue  # type: ignore
+import config.settings as settings  # type: ignore
+from utils import tracing  # type: ignore
+import prefork
+import profiling
+
 
+# Seconds clients are asked to wait before retrying a request that needs the models
+WARM_UP_RETRY_AFTER = "5"
+
+# Opt-in profiling; both hooks cost nothing until enabled here or through /admin
+PROFILE_DIR = Path(os.environ.get("LCPS_AI_PROFILE_DIR", str(settings.STORAGE_DIR / "profiles")))
+request_profiler = profiling.RequestProfiler(PROFILE_DIR, float(os.environ.get("LCPS_AI_PROFILE_RATE", "0")))
+memory_tracker = profiling.MemoryTracker(PROFILE_DIR)
+if int(os.environ.get("LCPS_AI_TRACEMALLOC", "0")):
+    memory_tracker.start(int(os.environ["LCPS_AI_TRACEMALLOC"]))
 
 print(f"[lcps_ai_service] Using LCPS AI directory: {LCPS_DIR}")
-print("[lcps_ai_service] Loading LCPSAssistant (can take a while on first run)...")
-assistant = LCPSAssistant(use_voice=False)
-print("[lcps_ai_service] LCPSAssistant loaded.")
+# Models are loaded by main() after the port is bound, so health checks pass right away.
+assistant = LCPSAssistant(use_voice=False, load_models=False, local_session=False)
+
+# Summarization runs as background jobs so long documents never hold a request thread.
+# Created by main() in the process that serves requests (each worker when pre-forking).
+job_queue: Optional[SummaryJobQueue] = None
+
+
+def _jobs() -> SummaryJobQueue:
+    if job_queue is None:
+        raise ModelsNotReady("The service is still starting. Please try again shortly.")
+    return job_queue
+
+
+def _job_payload(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "jobId": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "tier": job["tier"],
+        "progress": {
+            "pagesParsed": job["pages_parsed"],
+            "pagesTotal": job["pages_total"],
+            "chunksDone": job["chunks_done"],
+            "chunksTotal": job["chunks_total"],
+        },
+        "result": job["result"],
+        "error": job["error"],
+        "createdAt": job["created_at"],
+        "updatedAt": job["updated_at"],
+    }
+
+
+def _admin_allowed(handler: BaseHTTPRequestHandler) -> bool:
+    token = os.environ.get("LCPS_AI_ADMIN_TOKEN")
+    if token:
+        return hmac.compare_digest(handler.headers.get("x-admin-token", ""), token)
+    return handler.client_address[0] in ("127.0.0.1", "::1")
+
+
+def _validate_tier(summary_tier: Any) -> None:
+    if summary_tier is not None and summary_tier not in settings.SUMMARIZATION_TIERS:
+        tiers = ", ".join(settings.SUMMARIZATION_TIERS)
+        raise ValueError(f"'summaryTier' must be one of: {tiers}")
 
 
 class Handler(BaseHTTPRequestHandler):
@@ -77,45 +299,258 @@ class Handler(BaseHTTPRequestHandler):
         # super().log_message(format, *args)
         return
 
+    def handle_one_request(self) -> None:
+        # Timed from parse_request(), so idle keep-alive waits are not counted
+        self._started: Optional[float] = None
+        self._status = 0
+        try:
+            super().handle_one_request()
+        finally:
+            if self._started is not None:
+                metrics.end(_metric_route(getattr(self, "path", "")), self._status, time.perf_counter() - self._started)
+
+    def parse_request(self) -> bool:
+        self._started = time.perf_counter()
+        metrics.begin()
+        return super().parse_request()
+
+    def send_response(self, code: int, message: Optional[str] = None) -> None:
+        self._status = code
+        super().send_response(code, message)
+
     def do_OPTIONS(self) -> None:  # noqa: N802
         _json_response(self, 200, {"success": True})
 
     def do_GET(self) -> None:  # noqa: N802
-        if self.path.rstrip("/") == "/health":
+        path = self.path.rstrip("/")
+        if path == "/health":
             _json_response(self, 200, {"success": True, "message": "LCPS AI service is running"})
             return
 
+        if path == "/ready":
+            if assistant.models_ready:
+                _json_response(self, 200, {"success": True, "ready": True})
+            elif assistant.warm_up_error is not None:
+                _json_response(
+                    self,
+                    503,
+                    {"success": False, "ready": False, "message": f"Model loading failed: {assistant.warm_up_error}"},
+                )
+            else:
+                _json_response(
+                    self,
+                    503,
+                    {"success": False, "ready": False, "message": "AI models are loading"},
+                    headers={"Retry-After": WARM_UP_RETRY_AFTER},
+                )
+            return
+
+        if path == "/metrics":
+            payload = metrics.snapshot()
+            payload["modelsReady"] = assistant.models_ready
+            payload["responseCache"] = assistant.cache.get_stats()
+            payload["handlers"] = assistant.handlers.stats()
+            payload["intentMemo"] = assistant.intent_analyzer.memo.stats()
+            _json_response(self, 200, {"success": True, "data": payload})
+            return
+
+        if path.startswith("/admin/"):
+            self._handle_admin(path)
+            return
+
+        if path.startswith("/jobs/"):
+            try:
+                job = _jobs().get(path[len("/jobs/"):])
+            except ModelsNotReady as e:
+                _json_response(
+                    self,
+                    503,
+                    {"success": False, "message": str(e)},
+                    headers={"Retry-After": WARM_UP_RETRY_AFTER},
+                )
+                return
+            if not job:
+                _json_response(self, 404, {"success": False, "message": "Job not found"})
+                return
+            _json_response(self, 200, {"success": True, "data": _job_payload(job)})
+            return
+
         _json_response(self, 404, {"success": False, "message": "Not found"})
 
     def do_POST(self) -> None:  # noqa: N802
-        if self.path.rstrip("/") != "/query":
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/")
+        if path == "/query":
+            with request_profiler.maybe_profile("query"):
+                self._handle_query()
+        elif path == "/summarize":
+            with request_profiler.maybe_profile("summarize"):
+                self._handle_summarize(url.query)
+        elif path.startswith("/admin/"):
+            self._handle_admin(path)
+        else:
             _json_response(self, 404, {"success": False, "message": "Not found"})
+
+    def _handle_admin(self, path: str) -> None:
+        if not _admin_allowed(self):
+            _json_response(self, 403, {"success": False, "message": "Admin access denied"})
             return
 
+        post = self.command == "POST"
+        try:
+            payload = _read_json(self) if post else {}
+            if path == "/admin/profile":
+                if post:
+                    rate = float(payload.get("rate", 0))
+                    if not 0 <= rate <= 1:
+                        raise ValueError("'rate' must be between 0 and 1")
+                    request_profiler.rate = rate
+                data = request_profiler.status()
+            elif path == "/admin/memory" and not post:
+                data = memory_tracker.status()
+            elif path == "/admin/memory/start" and post:
+                memory_tracker.start(int(payload.get("frames", 25)))
+                data = memory_tracker.status()
+            elif path == "/admin/memory/snapshot" and post:
+                data = memory_tracker.snapshot(str(payload.get("groupBy", "lineno")))
+            elif path == "/admin/memory/stop" and post:
+                memory_tracker.stop()
+                data = memory_tracker.status()
+            else:
+                _json_response(self, 404, {"success": False, "message": "Not found"})
+                return
+        except (ValueError, RuntimeError) as e:
+            _json_response(self, 400, {"success": False, "message": str(e)})
+            return
+        _json_response(self, 200, {"success": True, "data": data})
+
+    def _handle_summarize(self, query_string: str = "") -> None:
+        try:
+            content_type = self.headers.get("content-type", "application/json")
+            media_type = content_type.split(";", 1)[0].strip().lower()
+            if media_type != "application/json":
+                self._handle_upload(content_type, media_type, query_string)
+                return
+
+            payload = _read_json(self)
+            file_path = str(payload.get("path", "")).strip()
+            summary_tier = payload.get("summaryTier")
+
+            if not file_path:
+                _json_response(self, 400, {"success": False, "message": "'path' is required"})
+                return
+            _validate_tier(summary_tier)
+            if not os.path.exists(file_path):
+                _json_response(self, 404, {"success": False, "message": f"File not found: {file_path}"})
+                return
+
+            job_id = _jobs().submit(
+                file_path,
+                tier=summary_tier,
+                max_length=int(payload.get("maxLength", 150)),
+                min_length=int(payload.get("minLength", 50)),
+            )
+            _json_response(self, 202, {"success": True, "data": _job_payload(_jobs().get(job_id))})
+        except _RequestError as e:
+            _json_response(self, e.status, {"success": False, "message": str(e)})
+        except ModelsNotReady as e:
+            _json_response(
+                self,
+                503,
+                {"success": False, "message": str(e)},
+                headers={"Retry-After": WARM_UP_RETRY_AFTER},
+            )
+        except ValueError as e:
+            _json_response(self, 400, {"success": False, "message": str(e)})
+        except Exception as e:
+            _json_response(
+                self,
+                500,
+                {
+                    "success": False,
+                    "message": str(e),
+                    "stack": traceback.format_exc(),
+                },
+            )
+
+    def _handle_upload(self, content_type: str, media_type: str, query_string: str) -> None:
+        # Uploaded bytes are parsed straight from memory; nothing is written to disk.
+        body = _read_body(self, settings.UPLOAD_MAX_BYTES)
+        options = {name: values[-1] for name, values in parse_qs(query_string).items()}
+
+        if media_type == "multipart/form-data":
+            parts = _parse_multipart(body, content_type)
+            if "file" not in parts:
+                raise ValueError("multipart upload needs a 'file' part")
+            for name, (_, value) in parts.items():
+                if name != "file":
+                    options[name] = bytes(value).decode("utf-8")
+            filename, data = parts["file"]
+        else:
+            filename, data = self.headers.get("x-filename") or options.get("filename"), memoryview(body)
+
+        filename = os.path.basename(filename or "")
+        if Path(filename).suffix.lower() not in (".pdf", ".docx", ".doc"):
+            raise ValueError("Uploads need a .pdf or .docx filename")
+        if not len(data):
+            raise ValueError("Uploaded document is empty")
+
+        summary_tier = options.get("summaryTier")
+        _validate_tier(summary_tier)
+        job_id = _jobs().submit_upload(
+            data,
+            filename,
+            tier=summary_tier,
+            max_length=int(options.get("maxLength", 150)),
+            min_length=int(options.get("minLength", 50)),
+        )
+        _json_response(self, 202, {"success": True, "data": _job_payload(_jobs().get(job_id))})
+
+    def _handle_query(self) -> None:
         try:
             payload = _read_json(self)
             query = str(payload.get("query", "")).strip()
-            user_id = payload.get("userId")  # optional; currently unused
+            user_id = payload.get("userId")  # optional; scopes calculator variables
+            # Optional summarization quality/latency tier; by default inline summaries
+            # use the interactive tier and queued jobs the background tier
+            summary_tier = payload.get("summaryTier")
+            want_timings = bool(payload.get("timings"))
 
             if not query:
                 _json_response(self, 400, {"success": False, "message": "'query' is required"})
                 return
 
-            # Keep intent separately so Node can store a queryType.
-            intent = assistant.intent_analyzer.detect_intent(query)
-            response = assistant.process_input(query)
-
+            _validate_tier(summary_tier)
+
+            job_id = None
+            with tracing.trace("query", force=want_timings) as trace:
+                # Keep intent separately so Node can store a queryType.
+                with tracing.span("detect_intent"):
+                    intent = assistant.detect_intent(query)
+
+                # Document summaries can take minutes; queue them instead of answering inline.
+                file_path = assistant.extract_document_path(query) if intent == "summarize" else None
+                if file_path and os.path.exists(file_path):
+                    with tracing.span("submit_job"):
+                        job_id = _jobs().submit(file_path, tier=summary_tier)
+                    response = f"📄 Summarizing {os.path.basename(file_path)} in the background. Job ID: {job_id}"
+                else:
+                    response = assistant.process_input(
+                        query, summary_tier=summary_tier, session_id=f"user:{user_id}" if user_id else None
+                    )
+
+            data: Dict[str, Any] = {"response": response, "intent": intent, "userId": user_id}
+            if job_id:
+                data["jobId"] = job_id
+            if want_timings and trace is not None:
+                data["timings"] = trace.to_dict()
+            _json_response(self, 200, {"success": True, "data": data})
+        except ModelsNotReady as e:
             _json_response(
                 self,
-                200,
-                {
-                    "success": True,
-                    "data": {
-                        "response": response,
-                        "intent": intent,
-                        "userId": user_id,
-                    },
-                },
+                503,
+                {"success": False, "message": str(e)},
+                headers={"Retry-After": WARM_UP_RETRY_AFTER},
             )
         except ValueError as e:
             _json_response(self, 400, {"success": False, "message": str(e)})
@@ -131,13 +566,92 @@ class Handler(BaseHTTPRequestHandler):
             )
 
 
+def _start_jobs(resume: bool) -> None:
+    global job_queue
+    job_queue = SummaryJobQueue(assistant.db, assistant.get_summarizer)
+    if resume:
+        # Resumed jobs wait for the models inside get_summarizer
+        resumed = job_queue.resume()
+        if resumed:
+            print(f"[lcps_ai_service] Resumed {resumed} unfinished summarization job(s).")
+
+
+def _set_cpu_threads(threads: int) -> None:
+    """Cap the intra-op thread pools (torch/OpenMP/MKL) of this process."""
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[name] = str(threads)
+    try:
+        import torch  # type: ignore
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+def _serve_single(server: ThreadingHTTPServer) -> None:
+    print("[lcps_ai_service] Loading AI models in the background (can take a while on first run)...")
+    assistant.start_warm_up()
+    _start_jobs(resume=True)
+    server.serve_forever()
+
+
+def _serve_prefork(server: ThreadingHTTPServer, workers: int) -> None:
+    threads = int(os.environ.get("LCPS_AI_WORKER_THREADS", "0")) or max(1, (os.cpu_count() or 1) // workers)
+    print(f"[lcps_ai_service] Pre-fork mode: {workers} workers x {threads} CPU thread(s)")
+
+    # Thread pools started in the master would be inherited broken by forked workers,
+    # so the master loads the models single-threaded and workers size their own pools.
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    _set_cpu_threads(1)
+    settings.SUMMARIZATION_WORKERS = settings.SUMMARIZATION_WORKERS or 1
+    settings.PDF_PARSE_WORKERS = settings.PDF_PARSE_WORKERS or threads
+
+    # Serve model-free requests from the master until the models are loaded
+    warm_up_server = threading.Thread(target=server.serve_forever, name="warm-up-server", daemon=True)
+    warm_up_server.start()
+    print("[lcps_ai_service] Loading AI models before forking workers...")
+    try:
+        assistant.warm_up()
+        if os.environ.get("LCPS_AI_PRELOAD_SUMMARIZER", "0") in ("1", "true", "True"):
+            assistant.get_summarizer()
+    except Exception:
+        pass  # Recorded in assistant.warm_up_error; workers report it through /ready
+    finally:
+        server.shutdown()
+        warm_up_server.join()
+        # Stop the handler pools warm-up requests started, so their threads exit
+        assistant.handlers.shutdown()
+
+    # Let in-flight warm-up requests finish so no thread holds a lock across fork()
+    deadline = time.monotonic() + 30
+    while threading.active_count() > 1 and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    def worker_main(index: int, generation: int) -> None:
+        _set_cpu_threads(threads)
+        # Jobs a crashed worker was running are resumed on the next service start
+        _start_jobs(resume=index == 0 and generation == 0)
+        server.serve_forever()
+
+    prefork.run_prefork(workers, worker_main)
+
+
 def main() -> None:
     host = os.environ.get("LCPS_AI_HOST", "127.0.0.1")
     port = int(os.environ.get("LCPS_AI_PORT", "8001"))
+    workers = int(os.environ.get("LCPS_AI_WORKERS", "1")) or (os.cpu_count() or 1)
 
     server = ThreadingHTTPServer((host, port), Handler)
     print(f"[lcps_ai_service] Listening on http://{host}:{port}")
-    server.serve_forever()
+
+    try:
+        if workers > 1 and prefork.can_fork():
+            _serve_prefork(server, workers)
+        else:
+            if workers > 1:
+                print("[lcps_ai_service] os.fork is unavailable; serving from a single process.")
+            _serve_single(server)
+    finally:
+        server.server_close()
 
 
 if __name__ == "__main__":